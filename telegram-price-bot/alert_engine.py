@@ -0,0 +1,339 @@
+import heapq
+import itertools
+import logging
+from typing import Dict, List, Optional, Tuple, Any
+from threading import Lock
+
+from alert_record import AlertRecord, Direction
+
+logger = logging.getLogger(__name__)
+
+# "any" bounds are loosened by this relative margin when indexed, and the
+# exact percentage check is redone on the candidates, so float rounding in
+# the bound never hides an alert the percentage check would fire
+_ANY_BOUND_SLACK = 1e-9
+
+
+def evaluate_alert(alert: Dict[str, Any], current_price: float) -> Optional[float]:
+    """
+    Check one alert against a price using the bot's up/down/any semantics.
+    
+    Args:
+        alert: Alert dictionary (or ``AlertRecord``)
+        current_price: Current token price in USD
+        
+    Returns:
+        The actual % change since the alert was created if it triggers, else None
+    """
+    initial_price = float(alert['initial_price'])
+    target_price = float(alert['target_price'])
+    direction = alert['direction']
+    
+    if initial_price == 0:
+        return None
+    
+    # Calculate actual change
+    actual_change = ((current_price - initial_price) / initial_price) * 100
+    
+    if direction == "up":
+        # Check if price went up by target percentage
+        if current_price >= target_price:
+            return actual_change
+    elif direction == "down":
+        # Check if price went down by target percentage
+        if current_price <= target_price:
+            return actual_change
+    elif direction == "any":
+        # Check if price changed by threshold in either direction
+        if abs(actual_change) >= float(alert['percent']):
+            return actual_change
+    
+    return None
+
+
+class _TokenTriggers:
+    """Trigger heaps for the alerts of one token."""
+    
+    __slots__ = ('up', 'down', 'live')
+    
+    def __init__(self):
+        # up: min-heap of (trigger price, seq, alert_id) - fires when price >= trigger
+        # down: max-heap of (-trigger price, seq, alert_id) - fires when price <= trigger
+        self.up: List[Tuple[float, int, str]] = []
+        self.down: List[Tuple[float, int, str]] = []
+        self.live = 0  # Heap entries that belong to indexed alerts
+    
+    @property
+    def stale(self) -> int:
+        """Heap entries left behind by removed alerts."""
+        return len(self.up) + len(self.down) - self.live
+
+
+class AlertEngine:
+    """Per-token trigger index for active alerts.
+    
+    "up" alerts sit in a min-heap keyed by target price and "down" alerts in
+    a max-heap, so a price update only touches the alerts it actually
+    crosses: O(k log n) for k triggered alerts instead of evaluating every
+    alert of the token. "any" alerts are turned into a pair of price bounds
+    (one in each heap). Alerts are kept as ``AlertRecord``s, so prices are
+    parsed once, when an alert is added, and records handed over by the
+    database are shared rather than copied.
+    
+    Removed alerts are dropped lazily when they reach the top of a heap;
+    a token's heaps are rebuilt once stale entries outnumber live ones.
+    
+    A price range ``(low, high, since)`` can be passed along with a price:
+    the lowest and highest prices seen since the token was last evaluated.
+    "up" triggers are then checked against the high and "down" triggers
+    against the low, so a wick between two polls still fires. Alerts
+    created after ``since`` only see the current price.
+    """
+    
+    def __init__(self):
+        self.lock = Lock()
+        self._alerts: Dict[str, AlertRecord] = {}
+        self._alert_token: Dict[str, str] = {}
+        self._tokens: Dict[str, _TokenTriggers] = {}
+        self._seq = itertools.count()
+    
+    def __len__(self) -> int:
+        return len(self._alerts)
+    
+    def addresses(self) -> List[str]:
+        """Lowercased addresses of tokens that have active alerts."""
+        with self.lock:
+            return list(self._tokens)
+    
+    def load(self, alerts_by_address: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Replace the index contents with the given active alerts."""
+        with self.lock:
+            self._alerts.clear()
+            self._alert_token.clear()
+            self._tokens.clear()
+            for alerts in alerts_by_address.values():
+                for alert in alerts:
+                    self._add_locked(alert)
+    
+    def add(self, alert: Dict[str, Any]) -> None:
+        """Index an active alert."""
+        with self.lock:
+            self._add_locked(alert)
+    
+    def remove(self, alert_id: str) -> None:
+        """Drop an alert from the index."""
+        with self.lock:
+            self._remove_locked(alert_id)
+    
+    def on_db_event(self, event: str, payload: Any) -> None:
+        """Database listener keeping the index in sync (see ``Database.subscribe``)."""
+        if event == 'alert_added':
+            self.add(payload)
+        elif event == 'alert_removed':
+            self.remove(payload)
+    
+    @staticmethod
+    def _entry_count(alert: AlertRecord) -> int:
+        return 2 if alert.direction is Direction.ANY else 1
+    
+    def _add_locked(self, alert: Any) -> None:
+        alert = AlertRecord.coerce(alert)
+        alert_id = alert.id
+        if alert_id in self._alerts:
+            self._remove_locked(alert_id)
+        
+        initial_price = alert.initial_price
+        target_price = alert.target_price
+        percent = alert.percent or 0.0
+        if initial_price is None or target_price is None:
+            logger.warning(f"Not indexing alert {alert_id}: unparseable prices")
+            return
+        
+        direction = alert.direction
+        if initial_price == 0 or direction is None:
+            # Can never trigger
+            return
+        
+        address = alert.address_key
+        triggers = self._tokens.get(address)
+        if triggers is None:
+            triggers = self._tokens[address] = _TokenTriggers()
+        
+        seq = next(self._seq)
+        if direction is Direction.UP:
+            heapq.heappush(triggers.up, (target_price, seq, alert_id))
+        elif direction is Direction.DOWN:
+            heapq.heappush(triggers.down, (-target_price, seq, alert_id))
+        else:
+            # |change| >= percent  <=>  price >= upper or price <= lower
+            margin = abs(initial_price) * percent / 100
+            upper = initial_price + margin
+            lower = initial_price - margin
+            heapq.heappush(triggers.up, (upper - abs(upper) * _ANY_BOUND_SLACK, seq, alert_id))
+            heapq.heappush(triggers.down, (-(lower + abs(lower) * _ANY_BOUND_SLACK), seq, alert_id))
+        
+        triggers.live += self._entry_count(alert)
+        self._alerts[alert_id] = alert
+        self._alert_token[alert_id] = address
+    
+    def _remove_locked(self, alert_id: str) -> None:
+        alert = self._alerts.pop(alert_id, None)
+        if alert is None:
+            return
+        
+        address = self._alert_token.pop(alert_id)
+        triggers = self._tokens[address]
+        triggers.live -= self._entry_count(alert)
+        
+        if triggers.live == 0:
+            del self._tokens[address]
+        elif triggers.stale > triggers.live:
+            # Drop stale heap entries
+            alerts = self._alerts
+            triggers.up = [entry for entry in triggers.up if entry[2] in alerts]
+            triggers.down = [entry for entry in triggers.down if entry[2] in alerts]
+            heapq.heapify(triggers.up)
+            heapq.heapify(triggers.down)
+    
+    def evaluate(
+        self,
+        address: str,
+        current_price: float,
+        price_range: Optional[Tuple[float, float, float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Pop every alert of a token that the given price (or range) triggers.
+        
+        Triggered alerts are removed from the index and returned as copies
+        with ``current_price``, ``trigger_price`` (the price that crossed the
+        target) and ``actual_change`` (at the trigger price) filled in.
+        
+        Args:
+            address: Token contract address
+            current_price: Current token price in USD
+            price_range: ``(low, high, since)`` seen since the last evaluation
+                (``since`` in epoch seconds)
+                
+        Returns:
+            Triggered alert dictionaries
+        """
+        if not current_price:
+            return []
+        
+        low = high = current_price
+        since = None
+        if price_range is not None:
+            low = min(low, price_range[0])
+            high = max(high, price_range[1])
+            since = price_range[2]
+        
+        with self.lock:
+            triggers = self._tokens.get(address.lower())
+            if triggers is None:
+                return []
+            
+            popped: List[Tuple[str, Tuple[float, int, str]]] = []
+            while triggers.up and triggers.up[0][0] <= high:
+                popped.append(('up', heapq.heappop(triggers.up)))
+            while triggers.down and -triggers.down[0][0] >= low:
+                popped.append(('down', heapq.heappop(triggers.down)))
+            
+            triggered = []
+            for side, entry in popped:
+                alert_id = entry[2]
+                alert = self._alerts.get(alert_id)
+                if alert is None:
+                    # Stale entry of a removed alert
+                    continue
+                
+                # Prices from before the alert existed don't count
+                if since is None or alert.created_at is None or alert.created_at > since:
+                    trigger_price = current_price
+                else:
+                    trigger_price = high if side == 'up' else low
+                
+                actual_change = evaluate_alert(alert, trigger_price)
+                if actual_change is None:
+                    # An "any" bound within the slack margin, or a range
+                    # hit by an alert that only sees the current price
+                    heapq.heappush(getattr(triggers, side), entry)
+                    continue
+                
+                triggered_alert = alert.to_dict()
+                triggered_alert['current_price'] = current_price
+                triggered_alert['trigger_price'] = trigger_price
+                triggered_alert['actual_change'] = actual_change
+                triggered.append(triggered_alert)
+                self._remove_locked(alert_id)
+            
+            return triggered
+    
+    def trigger_distances(self, prices: Dict[str, Optional[float]]) -> Dict[str, float]:
+        """
+        Relative distance from each price to the token's nearest trigger.
+        
+        Read off the heap tops, so a stale entry of a removed alert can make
+        a distance smaller than it really is (never larger).
+        
+        Args:
+            prices: Dict mapping token address to current price
+            
+        Returns:
+            Dict mapping lowercased address to distance as a fraction of the
+            price (0 if a trigger is already crossed), for tokens with alerts
+        """
+        distances = {}
+        with self.lock:
+            for address, current_price in prices.items():
+                triggers = self._tokens.get(address.lower())
+                if triggers is None or not current_price:
+                    continue
+                
+                distance = float('inf')
+                if triggers.up:
+                    distance = min(distance, (triggers.up[0][0] - current_price) / current_price)
+                if triggers.down:
+                    distance = min(distance, (current_price + triggers.down[0][0]) / current_price)
+                distances[address.lower()] = max(0.0, distance)
+        return distances
+    
+    def evaluate_many(
+        self,
+        prices: Dict[str, Optional[float]],
+        ranges: Optional[Dict[str, Tuple[float, float, float]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Evaluate a tick's worth of token prices.
+        
+        Args:
+            prices: Dict mapping token address to current price (None/0 skipped)
+            ranges: Optional dict mapping token address to the
+                ``(low, high, since)`` seen since its last evaluation
+                
+        Returns:
+            Triggered alert dictionaries
+        """
+        ranges = ranges or {}
+        triggered = []
+        for address, current_price in prices.items():
+            if current_price:
+                triggered.extend(self.evaluate(address, current_price, ranges.get(address)))
+        return triggered
+
+
+def create_alert_engine(kind: str = 'heap'):
+    """
+    Create an alert engine by name.
+    
+    Args:
+        kind: ``heap`` (default) or ``numpy`` for the vectorized engine
+        
+    Returns:
+        An engine exposing load/add/remove/addresses/evaluate/evaluate_many
+    """
+    if kind == 'numpy':
+        from vector_engine import VectorAlertEngine
+        return VectorAlertEngine()
+    if kind != 'heap':
+        raise ValueError(f"Unknown alert engine: {kind}")
+    return AlertEngine()
@@ -0,0 +1,182 @@
+import sys
+from datetime import datetime
+from enum import IntEnum
+from typing import Dict, NamedTuple, Optional, Any
+
+
+class Direction(IntEnum):
+    """Alert direction (values match ``vector_engine``'s direction codes)."""
+    
+    UP = 0
+    DOWN = 1
+    ANY = 2
+
+
+_DIRECTIONS = {d.name.lower(): d for d in Direction}
+
+
+class TokenLabel(NamedTuple):
+    """Display fields shared by every alert on the same token."""
+    
+    name: Optional[str]
+    symbol: Optional[str]
+    chain: Optional[str]
+    pair_address: Optional[str]
+
+
+# One TokenLabel per distinct token, shared by all of its alerts
+# (dict.setdefault is atomic, so no lock is needed)
+_labels: Dict[tuple, TokenLabel] = {}
+
+
+def intern_label(name: Optional[str], symbol: Optional[str], chain: Optional[str], pair_address: Optional[str]) -> TokenLabel:
+    """Return the shared ``TokenLabel`` for these fields."""
+    key = (name, symbol, chain, pair_address)
+    label = _labels.get(key)
+    if label is None:
+        label = _labels.setdefault(key, TokenLabel(*key))
+    return label
+
+
+# Alert dict keys stored on the shared TokenLabel
+_LABEL_FIELDS = {'token_name': 'name', 'token_symbol': 'symbol', 'chain': 'chain', 'pair_address': 'pair_address'}
+
+
+def _float(value: Any) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _epoch(value: Any) -> Optional[int]:
+    """ISO timestamp (or epoch number) -> epoch seconds."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    try:
+        return int(datetime.fromisoformat(value).timestamp())
+    except (TypeError, ValueError):
+        return None
+
+
+def _iso(epoch: Optional[int]) -> Optional[str]:
+    return datetime.fromtimestamp(epoch).isoformat() if epoch is not None else None
+
+
+class AlertRecord:
+    """Compact resident form of an alert.
+    
+    Prices are floats, the direction a ``Direction`` and timestamps epoch
+    seconds; token name, symbol, chain and pair address live in a
+    ``TokenLabel`` shared by all alerts of the token, and the contract
+    address string is interned. Keys the record doesn't model are kept in
+    ``extra``.
+    
+    ``to_dict()`` gives the alert dict handed out by the database (and
+    stored in its JSON files). Item access (``record['percent']``) reads the
+    same values, so code written against alert dicts keeps working.
+    """
+    
+    __slots__ = (
+        'id', 'user_id', 'contract_address', 'label', 'direction', 'percent',
+        'initial_price', 'target_price', 'created_at', 'active', 'triggered',
+        'triggered_at', 'extra',
+    )
+    
+    _FIELDS = frozenset((
+        'id', 'user_id', 'contract_address', 'token_name', 'token_symbol', 'chain',
+        'pair_address', 'direction', 'percent', 'initial_price', 'target_price',
+        'created_at', 'active', 'triggered', 'triggered_at',
+    ))
+    
+    @classmethod
+    def from_dict(cls, alert: Dict[str, Any]) -> 'AlertRecord':
+        """Build a record from an alert dict."""
+        record = cls.__new__(cls)
+        record.id = alert.get('id')
+        user_id = alert.get('user_id')
+        record.user_id = int(user_id) if user_id is not None else None
+        record.contract_address = sys.intern(alert.get('contract_address') or '')
+        record.label = intern_label(
+            alert.get('token_name'), alert.get('token_symbol'), alert.get('chain'), alert.get('pair_address'),
+        )
+        record.direction = _DIRECTIONS.get(alert.get('direction'))
+        record.percent = _float(alert.get('percent'))
+        record.initial_price = _float(alert.get('initial_price'))
+        record.target_price = _float(alert.get('target_price'))
+        record.created_at = _epoch(alert.get('created_at'))
+        record.active = bool(alert.get('active', True))
+        record.triggered = bool(alert.get('triggered', False))
+        record.triggered_at = _epoch(alert.get('triggered_at'))
+        
+        unknown = alert.keys() - cls._FIELDS
+        extra = {k: alert[k] for k in unknown} if unknown else None
+        if record.direction is None and alert.get('direction') is not None:
+            extra = dict(extra or {}, direction=alert['direction'])
+        record.extra = extra
+        return record
+    
+    @classmethod
+    def coerce(cls, alert: Any) -> 'AlertRecord':
+        """Return ``alert`` as a record (records pass through unchanged)."""
+        return alert if isinstance(alert, cls) else cls.from_dict(alert)
+    
+    @property
+    def address_key(self) -> str:
+        """Lowercased contract address (index key)."""
+        return self.contract_address.lower()
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """The alert as a plain dict (ISO timestamps, direction as a string)."""
+        alert = {
+            'user_id': self.user_id,
+            'contract_address': self.contract_address,
+            'token_name': self.label.name,
+            'token_symbol': self.label.symbol,
+            'chain': self.label.chain,
+            'pair_address': self.label.pair_address,
+            'initial_price': self.initial_price,
+            'target_price': self.target_price,
+            'direction': self.direction.name.lower() if self.direction is not None else None,
+            'percent': self.percent,
+            'created_at': _iso(self.created_at),
+            'active': self.active,
+            'id': self.id,
+            'triggered': self.triggered,
+        }
+        if self.triggered_at is not None:
+            alert['triggered_at'] = _iso(self.triggered_at)
+        if self.extra:
+            alert.update(self.extra)
+        return alert
+    
+    def __getitem__(self, key: str) -> Any:
+        if key in _LABEL_FIELDS:
+            return getattr(self.label, _LABEL_FIELDS[key])
+        if key == 'direction':
+            return self.direction.name.lower() if self.direction is not None else (self.extra or {}).get('direction')
+        if key in ('created_at', 'triggered_at'):
+            return _iso(getattr(self, key))
+        if key in self._FIELDS:
+            return getattr(self, key)
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+    
+    def get(self, key: str, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def __repr__(self) -> str:
+        return f"AlertRecord({self.id!r}, {self.contract_address!r}, {self.direction!r}, target={self.target_price!r})"
+
+
+def alert_json_default(value: Any) -> Any:
+    """``json.dumps`` default that serializes records as alert dicts."""
+    if isinstance(value, AlertRecord):
+        return value.to_dict()
+    return str(value)
@@ -0,0 +1,99 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional, Any
+
+from alert_record import AlertRecord
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDatabase:
+    """Async facade over a synchronous database backend.
+    
+    Every call runs on a dedicated executor, so lock waits, journal fsyncs
+    and SQLite queries never block the event loop. The executor has a
+    single worker by default: the backends serialize on their own lock
+    anyway, and one thread keeps calls in submission order.
+    
+    ``database`` is still available for synchronous startup work (loading
+    the alert engine, subscribing listeners).
+    """
+    
+    def __init__(self, database, max_workers: int = 1):
+        self.database = database
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='db-io')
+    
+    async def _run(self, func: Callable, *args, **kwargs) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+    
+    async def close(self) -> None:
+        """Close the backend and shut the executor down."""
+        await self._run(self.database.close)
+        self._executor.shutdown(wait=True)
+    
+    def subscribe(self, callback: Callable[[str, Any], None]) -> None:
+        """Register a mutation listener (see ``Database.subscribe``; called on the executor thread)."""
+        self.database.subscribe(callback)
+    
+    # ==================== ALERTS ====================
+    
+    async def add_alert(self, alert_data: Dict[str, Any]) -> str:
+        return await self._run(self.database.add_alert, alert_data)
+    
+    async def get_user_alerts(self, user_id: int, active_only: bool = True) -> List[Dict]:
+        return await self._run(self.database.get_user_alerts, user_id, active_only)
+    
+    async def get_all_active_alerts(self) -> List[Dict]:
+        return await self._run(self.database.get_all_active_alerts)
+    
+    async def get_active_alerts_by_address(self) -> Dict[str, List[AlertRecord]]:
+        return await self._run(self.database.get_active_alerts_by_address)
+    
+    async def get_alert_by_id(self, user_id: int, alert_id: str) -> Optional[Dict]:
+        return await self._run(self.database.get_alert_by_id, user_id, alert_id)
+    
+    async def delete_alert(self, user_id: int, alert_id: str) -> bool:
+        return await self._run(self.database.delete_alert, user_id, alert_id)
+    
+    async def mark_alert_triggered(self, alert_id: str) -> bool:
+        return await self._run(self.database.mark_alert_triggered, alert_id)
+    
+    async def mark_alerts_triggered(self, alert_ids: List[str]) -> int:
+        return await self._run(self.database.mark_alerts_triggered, alert_ids)
+    
+    async def clear_user_alerts(self, user_id: int) -> int:
+        return await self._run(self.database.clear_user_alerts, user_id)
+    
+    # ==================== WATCHLIST ====================
+    
+    async def add_to_watchlist(self, user_id: int, token_info: Dict) -> bool:
+        return await self._run(self.database.add_to_watchlist, user_id, token_info)
+    
+    async def get_watchlist(self, user_id: int) -> List[Dict]:
+        return await self._run(self.database.get_watchlist, user_id)
+    
+    async def remove_from_watchlist(self, user_id: int, contract_address: str) -> bool:
+        return await self._run(self.database.remove_from_watchlist, user_id, contract_address)
+    
+    async def get_watchers(self, contract_address: str) -> List[int]:
+        return await self._run(self.database.get_watchers, contract_address)
+    
+    async def get_watched_addresses(self) -> List[str]:
+        return await self._run(self.database.get_watched_addresses)
+    
+    # ==================== USERS ====================
+    
+    async def get_user(self, user_id: int) -> Optional[Dict]:
+        return await self._run(self.database.get_user, user_id)
+    
+    async def update_user(self, user_id: int, data: Dict) -> None:
+        return await self._run(self.database.update_user, user_id, data)
+    
+    async def get_user_stats(self, user_id: int) -> Dict:
+        return await self._run(self.database.get_user_stats, user_id)
+    
+    async def get_all_users(self) -> List[int]:
+        return await self._run(self.database.get_all_users)
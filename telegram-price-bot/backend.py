@@ -0,0 +1,338 @@
+import os
+import json
+import asyncio
+import inspect
+import logging
+from typing import Dict, Optional, Tuple, Any
+
+from dotenv import load_dotenv
+from telegram import Bot
+
+from alert_engine import create_alert_engine
+from async_database import AsyncDatabase
+from database import create_database, DATA_DIR
+from formatting import build_alert_message
+from metrics import MetricsServer, REGISTRY
+from monitor_workers import ShardedMonitor, LookupOnlyView
+from notifier import NotificationDispatcher
+from price_history import PriceHistory
+from price_monitor import PriceMonitor
+from token_index import TokenIndex
+from request_scheduler import (
+    RequestScheduler, request_priority, PRIORITY_BACKGROUND, DEFAULT_MAX_CONCURRENCY, DEXSCREENER_RATE_LIMIT_PER_MINUTE,
+)
+from tick_scheduler import TickScheduler, DEFAULT_TICK_INTERVAL, DEFAULT_TICK_BUDGET
+
+logger = logging.getLogger(__name__)
+
+load_dotenv()
+
+# Default price poll interval in seconds
+PRICE_POLL_INTERVAL = float(os.getenv('PRICE_CHECK_INTERVAL', 30))
+
+# Monitor tick period (seconds) and the fraction of it a tick may spend waiting on lookups
+MONITOR_TICK_INTERVAL = float(os.getenv('MONITOR_TICK_INTERVAL', DEFAULT_TICK_INTERVAL))
+MONITOR_TICK_BUDGET = float(os.getenv('MONITOR_TICK_BUDGET', DEFAULT_TICK_BUDGET))
+
+# Recently viewed watched tokens' cached prices are refreshed this often
+# (seconds; below the 30s price cache TTL so /portfolio is served from
+# memory), 0 to disable
+WATCHLIST_REFRESH_INTERVAL = float(os.getenv('WATCHLIST_REFRESH_INTERVAL', 20))
+
+# Fetched prices are kept per token on disk (raw samples plus 1m/5m/1h OHLC)
+PRICE_HISTORY = os.getenv('PRICE_HISTORY', 'true').lower() != 'false'
+PRICE_HISTORY_DIR = os.getenv('PRICE_HISTORY_DIR', os.path.join(DATA_DIR, 'history'))
+PRICE_HISTORY_RETENTION = float(os.getenv('PRICE_HISTORY_RETENTION', 7 * 86400))
+
+# Metadata of looked-up tokens is kept for local search and symbol lookups
+TOKEN_INDEX = os.getenv('TOKEN_INDEX', 'true').lower() != 'false'
+TOKEN_INDEX_PATH = os.path.join(DATA_DIR, 'tokens.json')
+
+# Number of monitor worker processes (0 = monitor inside this process)
+MONITOR_WORKERS = int(os.getenv('MONITOR_WORKERS', 0))
+
+# DexScreener requests per minute for the whole deployment. With monitor
+# workers, this process (user lookups, watchlist refreshes) keeps
+# FRONTEND_RATE_SHARE of it and the workers split the rest.
+DEXSCREENER_RATE_LIMIT = float(os.getenv('DEXSCREENER_RATE_LIMIT', DEXSCREENER_RATE_LIMIT_PER_MINUTE))
+FRONTEND_RATE_SHARE = float(os.getenv('FRONTEND_RATE_SHARE', 0.2))
+
+# Unix socket the backend service listens on
+DEFAULT_BACKEND_SOCKET = os.path.join(DATA_DIR, 'backend.sock')
+
+# Port for the Prometheus /metrics endpoint (disabled when unset)
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+# Methods the RPC interface exposes, by object
+RPC_METHODS = {
+    'db': {
+        'add_alert', 'get_user_alerts', 'get_alert_by_id', 'delete_alert', 'clear_user_alerts',
+        'add_to_watchlist', 'get_watchlist', 'remove_from_watchlist', 'get_watchers', 'get_watched_addresses',
+        'get_user', 'update_user', 'get_user_stats', 'get_all_users',
+    },
+    'monitor': {
+        'get_token_info', 'get_tokens_info', 'get_cached_tokens_info', 'get_current_price', 'get_multiple_prices',
+        'search_tokens', 'resolve_symbol', 'get_trending_tokens',
+    },
+    'metrics': {'summary'},
+}
+
+
+def create_services() -> Tuple[AsyncDatabase, PriceMonitor]:
+    """Create the database and price monitor configured by the environment."""
+    db = AsyncDatabase(create_database())
+    if MONITOR_WORKERS > 0 and not hasattr(db.database, 'db_path'):
+        raise ValueError("MONITOR_WORKERS requires DB_BACKEND=sqlite (the store shared with the workers)")
+    
+    # With workers the bot's monitor only serves lookups: the workers check the alerts
+    sharded = MONITOR_WORKERS > 0
+    rate_share = FRONTEND_RATE_SHARE if sharded else 1.0
+    price_monitor = PriceMonitor(
+        LookupOnlyView() if sharded else db.database,
+        RequestScheduler(
+            max_concurrency=int(os.getenv('DEXSCREENER_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY)),
+            rate_per_minute=DEXSCREENER_RATE_LIMIT * rate_share,
+        ),
+        engine=None if sharded else create_alert_engine(os.getenv('ALERT_ENGINE', 'heap')),
+        adaptive_polling=os.getenv('ADAPTIVE_POLLING', 'true').lower() != 'false',
+        poll_interval=PRICE_POLL_INTERVAL,
+        history=PriceHistory(PRICE_HISTORY_DIR, retention=PRICE_HISTORY_RETENTION) if PRICE_HISTORY else None,
+        token_index=TokenIndex(TOKEN_INDEX_PATH) if TOKEN_INDEX else None,
+    )
+    return db, price_monitor
+
+
+# ==================== PRICE MONITOR ====================
+
+async def run_price_monitor(bot, db: AsyncDatabase, price_monitor: PriceMonitor) -> None:
+    """Background task to monitor prices and send alerts."""
+    # Undeliverable alerts are re-armed so the next check retries them
+    dispatcher = NotificationDispatcher(
+        bot,
+        build_alert_message,
+        on_undelivered=price_monitor.restore_alert,
+    )
+    dispatcher.start()
+    ticks = TickScheduler(MONITOR_TICK_INTERVAL, MONITOR_TICK_BUDGET)
+    
+    try:
+        while True:
+            deadline = ticks.begin()
+            try:
+                triggered_alerts = await price_monitor.check_alerts(deadline)
+                dispatcher.submit(triggered_alerts)
+                
+                # Commit everything delivered since the last tick in one write
+                completed = dispatcher.drain_completed()
+                if completed:
+                    await db.mark_alerts_triggered(completed)
+                
+            except Exception as e:
+                logger.error(f"Error in price monitor: {e}")
+            
+            # Tokens have their own intervals; each tick polls the ones that are due
+            await ticks.wait()
+    finally:
+        await dispatcher.stop()
+        completed = dispatcher.drain_completed()
+        if completed:
+            await db.mark_alerts_triggered(completed)
+
+
+async def run_sharded_monitor(bot, db: AsyncDatabase) -> None:
+    """Deliver alerts triggered by the monitor worker processes."""
+    monitor = ShardedMonitor(
+        MONITOR_WORKERS,
+        db.database.db_path,
+        engine=os.getenv('ALERT_ENGINE', 'heap'),
+        poll_interval=PRICE_POLL_INTERVAL,
+        adaptive_polling=os.getenv('ADAPTIVE_POLLING', 'true').lower() != 'false',
+        tick_interval=MONITOR_TICK_INTERVAL,
+        tick_budget=MONITOR_TICK_BUDGET,
+        rate_per_minute=DEXSCREENER_RATE_LIMIT * (1 - FRONTEND_RATE_SHARE),
+        max_concurrency=int(os.getenv('DEXSCREENER_MAX_CONCURRENCY', DEFAULT_MAX_CONCURRENCY)),
+        history_dir=PRICE_HISTORY_DIR if PRICE_HISTORY else None,
+        history_retention=PRICE_HISTORY_RETENTION,
+    )
+    # Workers re-arm alerts that are never marked as triggered
+    dispatcher = NotificationDispatcher(bot, build_alert_message)
+    
+    monitor.start()
+    dispatcher.start()
+    logger.info(f"Started {MONITOR_WORKERS} monitor worker processes")
+    
+    try:
+        while True:
+            try:
+                dispatcher.submit(await monitor.get_triggered(timeout=1.0))
+                
+                completed = dispatcher.drain_completed()
+                if completed:
+                    await db.mark_alerts_triggered(completed)
+                
+            except Exception as e:
+                logger.error(f"Error in sharded price monitor: {e}")
+                await asyncio.sleep(1)
+    finally:
+        await dispatcher.stop()
+        completed = dispatcher.drain_completed()
+        if completed:
+            await db.mark_alerts_triggered(completed)
+        monitor.stop()
+
+
+async def run_watchlist_refresher(db: AsyncDatabase, price_monitor: PriceMonitor) -> None:
+    """
+    Keep the prices of recently viewed watched tokens warm in the price cache.
+    
+    Only tokens a user viewed with /portfolio in the last ``KEEP_WARM_TTL``
+    seconds are refreshed, and at background priority, so the sweeps only
+    use request quota that alert polling and user lookups leave unused.
+    """
+    cache = price_monitor.price_cache
+    while True:
+        try:
+            # Skip tokens that stay fresh until the next sweep (e.g. ones the feed polls)
+            stale = [
+                address for address in await db.get_watched_addresses()
+                if price_monitor.is_kept_warm(address)
+                and (cache.ttl_remaining(address) or 0) < WATCHLIST_REFRESH_INTERVAL
+            ]
+            if stale:
+                with request_priority(PRIORITY_BACKGROUND):
+                    await price_monitor.get_tokens_info(stale, refresh=True)
+                logger.debug(f"Refreshed {len(stale)} watched tokens")
+        except Exception as e:
+            logger.error(f"Error refreshing watched tokens: {e}")
+        
+        await asyncio.sleep(WATCHLIST_REFRESH_INTERVAL)
+
+
+async def run_monitor(bot, db: AsyncDatabase, price_monitor: PriceMonitor) -> None:
+    """Run the configured price monitor (in-process or sharded) and the watchlist refresher."""
+    tasks = [run_sharded_monitor(bot, db) if MONITOR_WORKERS > 0 else run_price_monitor(bot, db, price_monitor)]
+    if WATCHLIST_REFRESH_INTERVAL > 0:
+        tasks.append(run_watchlist_refresher(db, price_monitor))
+    await asyncio.gather(*tasks)
+
+
+def start_monitor(bot, db: AsyncDatabase, price_monitor: PriceMonitor) -> asyncio.Task:
+    """Start the price monitor and the watchlist refresher as a task."""
+    return asyncio.create_task(run_monitor(bot, db, price_monitor))
+
+
+# ==================== RPC SERVER ====================
+
+class BackendServer:
+    """Newline-delimited JSON RPC over a Unix socket.
+    
+    Requests are ``{"id": n, "method": "db.add_alert", "args": [...],
+    "kwargs": {...}}``; responses are ``{"id": n, "result": ...}`` or
+    ``{"id": n, "error": "..."}``. Each request runs as its own task, so a
+    slow price lookup doesn't hold up other requests on the connection.
+    """
+    
+    def __init__(self, db: AsyncDatabase, price_monitor: PriceMonitor, socket_path: str = DEFAULT_BACKEND_SOCKET):
+        self.socket_path = socket_path
+        self.targets = {'db': db, 'monitor': price_monitor, 'metrics': REGISTRY}
+        self._server: Optional[asyncio.AbstractServer] = None
+    
+    async def start(self) -> None:
+        """Start listening (replacing a stale socket file)."""
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.socket_path)), exist_ok=True)
+        self._server = await asyncio.start_unix_server(self._handle_connection, path=self.socket_path, limit=2 ** 24)
+        logger.info(f"Backend listening on {self.socket_path}")
+    
+    async def stop(self) -> None:
+        """Stop listening."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+    
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        write_lock = asyncio.Lock()
+        tasks = set()
+        
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                task = asyncio.create_task(self._handle_request(line, writer, write_lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+    
+    async def _handle_request(self, line: bytes, writer: asyncio.StreamWriter, write_lock: asyncio.Lock) -> None:
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            response = {'id': request_id, 'result': await self.call(
+                request['method'], request.get('args', []), request.get('kwargs', {}),
+            )}
+        except Exception as e:
+            logger.error(f"RPC request failed: {e}")
+            response = {'id': request_id, 'error': f"{type(e).__name__}: {e}"}
+        
+        data = json.dumps(response, separators=(',', ':'), default=str).encode('utf-8') + b'\n'
+        async with write_lock:
+            writer.write(data)
+            await writer.drain()
+    
+    async def call(self, method: str, args: list, kwargs: Dict[str, Any]) -> Any:
+        """Dispatch one RPC call to the database, the price monitor or the metrics registry."""
+        target, _, name = method.partition('.')
+        if name not in RPC_METHODS.get(target, ()):
+            raise ValueError(f"Unknown method {method}")
+        result = getattr(self.targets[target], name)(*args, **kwargs)
+        return await result if inspect.isawaitable(result) else result
+
+
+async def serve(socket_path: str) -> None:
+    """Run the backend service: RPC server plus the price monitor."""
+    token = os.getenv('BOT_TOKEN')
+    if not token:
+        raise ValueError("BOT_TOKEN is required to send notifications")
+    
+    db, price_monitor = create_services()
+    server = BackendServer(db, price_monitor, socket_path)
+    metrics_server = MetricsServer(METRICS_PORT, METRICS_HOST) if METRICS_PORT else None
+    
+    async with Bot(token) as bot:
+        await server.start()
+        if metrics_server:
+            await metrics_server.start()
+        monitor_task = start_monitor(bot, db, price_monitor)
+        try:
+            await monitor_task
+        finally:
+            monitor_task.cancel()
+            await asyncio.gather(monitor_task, return_exceptions=True)
+            await server.stop()
+            if metrics_server:
+                await metrics_server.stop()
+            await price_monitor.close()
+            await db.close()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        level=logging.INFO
+    )
+    try:
+        asyncio.run(serve(os.getenv('BACKEND_SOCKET', DEFAULT_BACKEND_SOCKET)))
+    except KeyboardInterrupt:
+        pass
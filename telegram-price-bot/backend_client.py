@@ -0,0 +1,196 @@
+import json
+import asyncio
+import itertools
+import logging
+from typing import Dict, List, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+RPC_TIMEOUT = 30.0
+
+
+class BackendError(Exception):
+    """The backend service failed a call or couldn't be reached."""
+
+
+class BackendClient:
+    """Client for the backend service's Unix-socket JSON RPC (see ``backend.BackendServer``).
+    
+    One connection is shared by all callers; responses are matched to
+    requests by ID, so concurrent calls don't wait for each other. The
+    connection is (re)opened lazily, so the backend can be restarted
+    underneath a running bot.
+    """
+    
+    def __init__(self, socket_path: str, timeout: float = RPC_TIMEOUT):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+        
+        self.db = RemoteDatabase(self)
+        self.price_monitor = RemotePriceMonitor(self)
+    
+    async def _ensure_connected(self) -> asyncio.StreamWriter:
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        
+        async with self._connect_lock:
+            if self._writer is None or self._writer.is_closing():
+                try:
+                    self._reader, self._writer = await asyncio.open_unix_connection(self.socket_path, limit=2 ** 24)
+                except OSError as e:
+                    raise BackendError(f"Backend unavailable at {self.socket_path}: {e}") from e
+                self._reader_task = asyncio.create_task(self._read_responses(self._reader, self._writer))
+            return self._writer
+    
+    async def _read_responses(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                response = json.loads(line)
+                future = self._pending.pop(response.get('id'), None)
+                if future is None or future.done():
+                    continue
+                if 'error' in response:
+                    future.set_exception(BackendError(response['error']))
+                else:
+                    future.set_result(response.get('result'))
+        except (ConnectionError, asyncio.IncompleteReadError, json.JSONDecodeError) as e:
+            logger.warning(f"Backend connection lost: {e}")
+        finally:
+            # Fail everything still waiting on this connection
+            writer.close()
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(BackendError("Backend connection closed"))
+            self._pending.clear()
+    
+    async def call(self, method: str, *args, **kwargs) -> Any:
+        """
+        Call a backend method.
+        
+        Args:
+            method: ``db.<name>`` or ``monitor.<name>``
+            
+        Returns:
+            The method's (JSON-decoded) result
+        """
+        writer = await self._ensure_connected()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        
+        request = {'id': request_id, 'method': method, 'args': list(args), 'kwargs': kwargs}
+        try:
+            writer.write(json.dumps(request, separators=(',', ':'), default=str).encode('utf-8') + b'\n')
+            await writer.drain()
+            return await asyncio.wait_for(future, self.timeout)
+        except (ConnectionError, asyncio.TimeoutError) as e:
+            raise BackendError(f"{method} failed: {e!r}") from e
+        finally:
+            self._pending.pop(request_id, None)
+    
+    async def metrics_summary(self) -> str:
+        """The backend's metrics summary (see ``metrics.Registry.summary``)."""
+        return await self.call('metrics.summary')
+    
+    async def close(self) -> None:
+        """Close the connection."""
+        if self._writer is not None:
+            self._writer.close()
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+
+
+class RemoteDatabase:
+    """``AsyncDatabase`` interface served by the backend."""
+    
+    def __init__(self, client: BackendClient):
+        self.client = client
+    
+    async def close(self) -> None:
+        await self.client.close()
+    
+    async def add_alert(self, alert_data: Dict[str, Any]) -> str:
+        return await self.client.call('db.add_alert', alert_data)
+    
+    async def get_user_alerts(self, user_id: int, active_only: bool = True) -> List[Dict]:
+        return await self.client.call('db.get_user_alerts', user_id, active_only)
+    
+    async def get_alert_by_id(self, user_id: int, alert_id: str) -> Optional[Dict]:
+        return await self.client.call('db.get_alert_by_id', user_id, alert_id)
+    
+    async def delete_alert(self, user_id: int, alert_id: str) -> bool:
+        return await self.client.call('db.delete_alert', user_id, alert_id)
+    
+    async def clear_user_alerts(self, user_id: int) -> int:
+        return await self.client.call('db.clear_user_alerts', user_id)
+    
+    async def add_to_watchlist(self, user_id: int, token_info: Dict) -> bool:
+        return await self.client.call('db.add_to_watchlist', user_id, token_info)
+    
+    async def get_watchlist(self, user_id: int) -> List[Dict]:
+        return await self.client.call('db.get_watchlist', user_id)
+    
+    async def remove_from_watchlist(self, user_id: int, contract_address: str) -> bool:
+        return await self.client.call('db.remove_from_watchlist', user_id, contract_address)
+    
+    async def get_watchers(self, contract_address: str) -> List[int]:
+        return await self.client.call('db.get_watchers', contract_address)
+    
+    async def get_watched_addresses(self) -> List[str]:
+        return await self.client.call('db.get_watched_addresses')
+    
+    async def get_user(self, user_id: int) -> Optional[Dict]:
+        return await self.client.call('db.get_user', user_id)
+    
+    async def update_user(self, user_id: int, data: Dict) -> None:
+        return await self.client.call('db.update_user', user_id, data)
+    
+    async def get_user_stats(self, user_id: int) -> Dict:
+        return await self.client.call('db.get_user_stats', user_id)
+    
+    async def get_all_users(self) -> List[int]:
+        return await self.client.call('db.get_all_users')
+
+
+class RemotePriceMonitor:
+    """The lookup half of ``PriceMonitor``, served by the backend."""
+    
+    def __init__(self, client: BackendClient):
+        self.client = client
+    
+    async def close(self) -> None:
+        await self.client.close()
+    
+    async def get_token_info(self, contract_address: str) -> Optional[Dict[str, Any]]:
+        return await self.client.call('monitor.get_token_info', contract_address)
+    
+    async def get_tokens_info(self, contract_addresses: List[str], keep_warm: bool = False) -> Dict[str, Optional[Dict[str, Any]]]:
+        return await self.client.call('monitor.get_tokens_info', contract_addresses, keep_warm=keep_warm)
+    
+    async def get_cached_tokens_info(self, contract_addresses: List[str]) -> Dict[str, Dict[str, Any]]:
+        return await self.client.call('monitor.get_cached_tokens_info', contract_addresses)
+    
+    async def get_current_price(self, contract_address: str) -> Optional[float]:
+        return await self.client.call('monitor.get_current_price', contract_address)
+    
+    async def get_multiple_prices(self, addresses: List[str]) -> Dict[str, Optional[float]]:
+        return await self.client.call('monitor.get_multiple_prices', addresses)
+    
+    async def search_tokens(self, query: str) -> List[Dict]:
+        return await self.client.call('monitor.search_tokens', query)
+    
+    async def resolve_symbol(self, symbol: str) -> Optional[str]:
+        return await self.client.call('monitor.resolve_symbol', symbol)
+    
+    async def get_trending_tokens(self, chain: str = None) -> List[Dict]:
+        return await self.client.call('monitor.get_trending_tokens', chain)
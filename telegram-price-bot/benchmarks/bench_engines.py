@@ -0,0 +1,129 @@
+"""
+Compare alert evaluation engines at 10k, 100k and 1M alerts.
+
+Engines:
+    loop   - the original per-dict loop (alert_engine.evaluate_alert per alert)
+    heap   - AlertEngine, per-token trigger heaps
+    numpy  - VectorAlertEngine, column arrays + boolean masks
+    
+For every size two ticks are timed: a quiet tick where prices haven't moved
+(nothing triggers, the common case) and a moving tick where every token
+jumps by up to +/-30%. All engines must trigger the same alerts.
+
+Usage:
+    python benchmarks/bench_engines.py [--sizes 10000 100000 1000000] [--tokens 2000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from alert_engine import AlertEngine, evaluate_alert  # noqa: E402
+
+try:
+    from vector_engine import VectorAlertEngine, np  # noqa: E402
+except ImportError:
+    VectorAlertEngine, np = None, None
+
+
+def make_alerts(count: int, tokens: int, seed: int = 42):
+    """Synthetic active alerts grouped by token address."""
+    rng = random.Random(seed)
+    base_prices = {f"0x{t:040x}": 10 ** rng.uniform(-8, 3) for t in range(tokens)}
+    addresses = list(base_prices)
+    alerts_by_address = {addr: [] for addr in addresses}
+    
+    for i in range(count):
+        addr = rng.choice(addresses)
+        initial = base_prices[addr] * rng.uniform(0.9, 1.1)
+        direction = rng.choice(['up', 'down', 'any'])
+        percent = rng.choice([5, 10, 20, 50, 100])
+        if direction == 'up':
+            target = initial * (1 + percent / 100)
+        elif direction == 'down':
+            target = initial * (1 - percent / 100)
+        else:
+            target = percent
+        alerts_by_address[addr].append({
+            'id': f"{i:08x}",
+            'user_id': i % 5000,
+            'contract_address': addr,
+            'initial_price': initial,
+            'target_price': target,
+            'direction': direction,
+            'percent': percent,
+        })
+    
+    return alerts_by_address, base_prices
+
+
+def loop_evaluate(alerts_by_address, prices):
+    """The pre-engine check_alerts inner loop."""
+    triggered = []
+    for addr, alerts in alerts_by_address.items():
+        current_price = prices.get(addr)
+        if not current_price:
+            continue
+        for alert in alerts:
+            if evaluate_alert(alert, current_price) is not None:
+                triggered.append(alert['id'])
+    return triggered
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def run(size: int, tokens: int):
+    alerts_by_address, base_prices = make_alerts(size, tokens)
+    rng = random.Random(size)
+    moved = {addr: p * rng.uniform(0.7, 1.3) for addr, p in base_prices.items()}
+    
+    # Alerts that would already fire at the base prices are dropped first, so
+    # the quiet tick really triggers nothing
+    already = set(loop_evaluate(alerts_by_address, base_prices))
+    alerts_by_address = {
+        addr: [a for a in alerts if a['id'] not in already]
+        for addr, alerts in alerts_by_address.items()
+    }
+    
+    print(f"\n{size:,} alerts over {tokens:,} tokens")
+    print(f"{'engine':<8}{'build':>12}{'quiet tick':>14}{'moving tick':>14}{'triggered':>12}")
+    
+    quiet, _ = timed(loop_evaluate, alerts_by_address, base_prices)
+    moving, expected = timed(loop_evaluate, alerts_by_address, moved)
+    print(f"{'loop':<8}{'-':>12}{quiet * 1000:>12.2f}ms{moving * 1000:>12.2f}ms{len(expected):>12,}")
+    
+    engines = [('heap', AlertEngine)]
+    if VectorAlertEngine is not None and np is not None:
+        engines.append(('numpy', VectorAlertEngine))
+    else:
+        print("(numpy not installed, skipping vectorized engine)")
+    
+    for name, cls in engines:
+        engine = cls()
+        build, _ = timed(engine.load, alerts_by_address)
+        quiet, quiet_hits = timed(engine.evaluate_many, base_prices)
+        moving, hits = timed(engine.evaluate_many, moved)
+        assert not quiet_hits, f"{name} triggered alerts on an unchanged price"
+        assert sorted(a['id'] for a in hits) == sorted(expected), f"{name} disagrees with the loop"
+        print(f"{name:<8}{build * 1000:>10.1f}ms{quiet * 1000:>12.2f}ms{moving * 1000:>12.2f}ms{len(hits):>12,}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--tokens', type=int, default=2000)
+    args = parser.parse_args()
+    
+    for size in args.sizes:
+        run(size, args.tokens)
+
+
+if __name__ == '__main__':
+    main()
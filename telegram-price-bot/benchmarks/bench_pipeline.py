@@ -0,0 +1,354 @@
+"""
+Benchmark the alert pipeline against a local DexScreener stand-in.
+
+For each population size (alerts; tokens and users scale with it):
+    db      - Database op latency (p50/p99 ms) and reopen time
+    tick    - check_alerts duration with every token polled (cold, then
+              warm ticks after prices move) and HTTP requests per tick
+    prices  - get_multiple_prices throughput with an empty cache
+    memory  - Python heap held by a freshly loaded store + price monitor
+              (tracemalloc) and the process's max RSS
+              
+The fake server (benchmarks/fake_dexscreener.py) runs in its own thread so
+its work isn't counted against the bot's event loop. Results are written
+as JSON; pass --compare with an older file to print the changes.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--sizes 1000 10000 100000] [--backend json|sqlite]
+        [--latency 20] [--error-rate 0] [--output FILE] [--compare OLD.json]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+import price_monitor as price_monitor_module  # noqa: E402
+from database import Database  # noqa: E402
+from price_monitor import PriceMonitor  # noqa: E402
+from request_scheduler import RequestScheduler  # noqa: E402
+from fake_dexscreener import FakeDexScreener  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+# Operations sampled per database op benchmark
+DB_SAMPLES = 1000
+
+
+# ==================== HELPERS ====================
+
+class ServerThread:
+    """Runs a FakeDexScreener on its own event loop in a background thread."""
+    
+    def __init__(self, server: FakeDexScreener, port: int):
+        self.server = server
+        self.port = port
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+    
+    def __enter__(self) -> 'ServerThread':
+        self.thread.start()
+        self.base_url = asyncio.run_coroutine_threadsafe(self.server.start(port=self.port), self.loop).result()
+        return self
+    
+    def __exit__(self, *exc) -> None:
+        asyncio.run_coroutine_threadsafe(self.server.stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+    
+    def call(self, fn, *args) -> None:
+        """Run a function on the server's loop (e.g. to move prices)."""
+        self.loop.call_soon_threadsafe(fn, *args)
+
+
+def percentiles(samples):
+    """p50/p99/max of latency samples, in milliseconds."""
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000  # noqa: E731
+    return {'p50_ms': round(pick(0.50), 4), 'p99_ms': round(pick(0.99), 4), 'max_ms': round(ordered[-1] * 1000, 4)}
+
+
+def timed_each(fn, args_list):
+    samples = []
+    for args in args_list:
+        start = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - start)
+    return percentiles(samples)
+
+
+def open_database(backend: str, data_dir: str):
+    if backend == 'sqlite':
+        from sqlite_database import SQLiteDatabase
+        return SQLiteDatabase(os.path.join(data_dir, 'bot.db'))
+    return Database(data_dir)
+
+
+def make_alert(rng: random.Random, user_id: int, address: str, price: float) -> dict:
+    direction = rng.choice(['up', 'down', 'any'])
+    percent = rng.choice([5, 10, 20, 50, 100])
+    if direction == 'up':
+        target = price * (1 + percent / 100)
+    elif direction == 'down':
+        target = price * (1 - percent / 100)
+    else:
+        target = price
+    return {
+        'user_id': user_id,
+        'contract_address': address,
+        'token_name': f"Token {address[-6:]}",
+        'token_symbol': f"T{address[-4:].upper()}",
+        'chain': 'ethereum',
+        'initial_price': price,
+        'target_price': target,
+        'percent': percent,
+        'direction': direction,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+# ==================== BENCHMARKS ====================
+
+def bench_database(db, backend: str, data_dir: str, population: dict, rng: random.Random) -> dict:
+    users = population['users']
+    alert_ids = population['alert_ids']
+    addresses = population['addresses']
+    sample_users = [rng.choice(users) for _ in range(DB_SAMPLES)]
+    
+    results = {'add_alert': population['add_alert']}
+    results['get_user_alerts'] = timed_each(db.get_user_alerts, [(u,) for u in sample_users])
+    results['get_user_stats'] = timed_each(db.get_user_stats, [(u,) for u in sample_users])
+    results['get_watchlist'] = timed_each(db.get_watchlist, [(u,) for u in sample_users])
+    results['add_to_watchlist'] = timed_each(db.add_to_watchlist, [
+        (u, {'address': rng.choice(addresses), 'name': 'x', 'symbol': 'X', 'chain': 'ethereum', 'priceUsd': '1'})
+        for u in sample_users
+    ])
+    
+    victims = rng.sample(alert_ids, min(DB_SAMPLES, len(alert_ids) // 10))
+    results['delete_alert'] = timed_each(db.delete_alert, [(owner, alert_id) for owner, alert_id in victims])
+    
+    # Trigger at most 10% of the alerts so the tick benchmark still has work
+    deleted = set(victims)
+    remaining = [alert_id for entry in alert_ids if entry not in deleted for alert_id in entry[1:]]
+    remaining = remaining[:min(2000, len(alert_ids) // 10)]
+    batches = [remaining[i:i + 100] for i in range(0, len(remaining), 100)]
+    results['mark_alerts_triggered_x100'] = timed_each(db.mark_alerts_triggered, [(batch,) for batch in batches])
+    
+    if backend == 'json':
+        start = time.perf_counter()
+        db.compact()
+        results['compact_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    
+    db.close()
+    start = time.perf_counter()
+    reopened = open_database(backend, data_dir)
+    results['reopen_ms'] = round((time.perf_counter() - start) * 1000, 2)
+    return results, reopened
+
+
+async def bench_monitor(db, server: ServerThread, fake: FakeDexScreener, args) -> dict:
+    scheduler = RequestScheduler(max_concurrency=args.concurrency, rate_per_minute=args.rate, base_backoff=0.05)
+    # Poll interval 0: every tick fetches every alerted token
+    monitor = PriceMonitor(db, scheduler, adaptive_polling=False, poll_interval=0)
+    results = {'alerted_tokens': len(monitor.engine.addresses())}
+    
+    try:
+        ticks = []
+        for i in range(1 + args.ticks):
+            if i:
+                server.call(fake.move_prices, 0.08)
+                await asyncio.sleep(0.05)
+            requests_before = fake.requests
+            start = time.perf_counter()
+            triggered = await monitor.check_alerts()
+            ticks.append({
+                'ms': round((time.perf_counter() - start) * 1000, 2),
+                'requests': fake.requests - requests_before,
+                'triggered': len(triggered),
+            })
+        results['cold_tick'] = ticks[0]
+        results['warm_ticks'] = ticks[1:]
+        if ticks[1:]:
+            results['warm_tick_mean_ms'] = round(sum(t['ms'] for t in ticks[1:]) / len(ticks[1:]), 2)
+        
+        addresses = list(fake.prices)
+        rounds = []
+        for _ in range(3):
+            monitor.price_cache.clear()
+            start = time.perf_counter()
+            prices = await monitor.get_multiple_prices(addresses)
+            elapsed = time.perf_counter() - start
+            rounds.append(len(addresses) / elapsed)
+        results['get_multiple_prices'] = {
+            'tokens': len(addresses),
+            'found': sum(1 for p in prices.values() if p),
+            'tokens_per_s': round(max(rounds), 1),
+        }
+    finally:
+        await monitor.close()
+    return results
+
+
+def bench_memory(backend: str, data_dir: str) -> dict:
+    tracemalloc.start()
+    db = open_database(backend, data_dir)
+    monitor = PriceMonitor(db, adaptive_polling=False)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    alerts = len(monitor.engine)
+    db.close()
+    return {
+        'heap_mb': round(current / 2 ** 20, 2),
+        'peak_heap_mb': round(peak / 2 ** 20, 2),
+        'indexed_alerts': alerts,
+        'max_rss_mb': round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+def populate(db, size: int, fake: FakeDexScreener, rng: random.Random, args) -> dict:
+    addresses = list(fake.prices)
+    users = list(range(1, max(2, size // args.alerts_per_user) + 1))
+    
+    alert_ids = []
+    add_samples = []
+    for i in range(size):
+        user_id = users[i % len(users)]
+        address = rng.choice(addresses)
+        alert = make_alert(rng, user_id, address, fake.prices[address])
+        start = time.perf_counter()
+        alert_ids.append((user_id, db.add_alert(alert)))
+        add_samples.append(time.perf_counter() - start)
+    
+    for user_id in users:
+        for address in rng.sample(addresses, min(3, len(addresses))):
+            db.add_to_watchlist(user_id, {'address': address, 'name': 'x', 'symbol': 'X', 'chain': 'ethereum', 'priceUsd': '1'})
+    
+    return {'users': users, 'addresses': addresses, 'alert_ids': alert_ids, 'add_alert': percentiles(add_samples)}
+
+
+def run_size(size: int, args) -> dict:
+    tokens = max(10, size // args.alerts_per_token)
+    fake = FakeDexScreener.with_tokens(tokens, latency=args.latency / 1000, error_rate=args.error_rate,
+                                       pairs_per_token=args.pairs, seed=size)
+    rng = random.Random(size)
+    data_dir = tempfile.mkdtemp(prefix='bench-pipeline-')
+    print(f"\n{size:,} alerts over {tokens:,} tokens ({args.backend})")
+    
+    try:
+        with ServerThread(fake, args.port) as server:
+            price_monitor_module.DEXSCREENER_API_BASE = server.base_url
+            
+            db = open_database(args.backend, data_dir)
+            population = populate(db, size, fake, rng, args)
+            db_results, db = bench_database(db, args.backend, data_dir, population, rng)
+            print(f"  db: add p99 {db_results['add_alert']['p99_ms']}ms, "
+                  f"get_user_alerts p99 {db_results['get_user_alerts']['p99_ms']}ms, reopen {db_results['reopen_ms']}ms")
+            
+            monitor_results = asyncio.run(bench_monitor(db, server, fake, args))
+            db.close()
+            print(f"  tick: cold {monitor_results['cold_tick']['ms']}ms "
+                  f"({monitor_results['cold_tick']['requests']} requests), "
+                  f"warm {monitor_results.get('warm_tick_mean_ms')}ms; "
+                  f"prices {monitor_results['get_multiple_prices']['tokens_per_s']:,} tokens/s")
+        
+        memory = bench_memory(args.backend, data_dir)
+        print(f"  memory: {memory['heap_mb']}MB heap, {memory['max_rss_mb']}MB max RSS")
+    finally:
+        shutil.rmtree(data_dir, ignore_errors=True)
+    
+    return {
+        'tokens': tokens,
+        'users': len(population['users']),
+        'db': db_results,
+        'monitor': monitor_results,
+        'memory': memory,
+        'server': {'requests': fake.requests, 'errors': fake.errors},
+    }
+
+
+# ==================== REPORTING ====================
+
+def flatten(results: dict, prefix: str = '') -> dict:
+    """Numeric leaves of a result tree, keyed by dotted path."""
+    flat = {}
+    for key, value in results.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[path] = value
+    return flat
+
+
+def compare(old: dict, new: dict) -> None:
+    """Print metrics that changed by more than 5% between two result files."""
+    print(f"\nChanges vs {old.get('commit')} ({old.get('timestamp')}):")
+    old_flat = flatten(old.get('results', {}))
+    for path, value in flatten(new['results']).items():
+        before = old_flat.get(path)
+        if not before:
+            continue
+        change = (value - before) / before * 100
+        if abs(change) >= 5:
+            print(f"  {path:<60}{before:>14,.2f} -> {value:>14,.2f}  ({change:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1_000, 10_000, 100_000])
+    parser.add_argument('--backend', choices=['json', 'sqlite'], default='json')
+    parser.add_argument('--alerts-per-token', type=int, default=20)
+    parser.add_argument('--alerts-per-user', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=20, help="fake server latency per request (ms)")
+    parser.add_argument('--error-rate', type=float, default=0, help="fraction of requests answered with 429/500")
+    parser.add_argument('--pairs', type=int, default=2, help="pairs per token")
+    parser.add_argument('--ticks', type=int, default=3, help="warm ticks to time")
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--rate', type=float, default=1e9, help="scheduler requests/min (default: unthrottled)")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--output', help="result file (default: benchmarks/results/pipeline-<commit>.json)")
+    parser.add_argument('--compare', help="earlier result file to compare against")
+    args = parser.parse_args()
+    
+    commit = git_commit()
+    report = {
+        'commit': commit,
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'params': {k: v for k, v in vars(args).items() if k not in ('output', 'compare')},
+        'results': {str(size): run_size(size, args) for size in args.sizes},
+    }
+    
+    output = args.output or os.path.join(RESULTS_DIR, f"pipeline-{commit}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    
+    if args.compare:
+        with open(args.compare, 'r', encoding='utf-8') as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+Local stand-in for the DexScreener API, for benchmarks and manual testing.
+
+Serves /latest/dex/tokens/{a,b,...}, /latest/dex/search and
+/latest/dex/pairs/search from an in-memory token table with configurable
+latency, pairs per token and error rate (HTTP 500/429). Prices can be
+moved between requests to simulate a market.
+
+Usage:
+    python benchmarks/fake_dexscreener.py [--port 8765] [--tokens 1000] [--latency 50] [--error-rate 0.01]
+    DEXSCREENER_API_BASE=http://127.0.0.1:8765/latest python bot.py
+"""
+import argparse
+import asyncio
+import random
+from typing import Dict, List, Optional
+
+from aiohttp import web
+
+
+def token_address(index: int) -> str:
+    """Deterministic EVM-style address of synthetic token ``index``."""
+    return f"0x{index:040x}"
+
+
+class FakeDexScreener:
+    """In-memory DexScreener stand-in served with aiohttp."""
+    
+    def __init__(
+        self,
+        prices: Optional[Dict[str, float]] = None,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        pairs_per_token: int = 2,
+        seed: int = 0,
+    ):
+        self.prices: Dict[str, float] = {addr.lower(): p for addr, p in (prices or {}).items()}
+        self.latency = latency  # Seconds added to every response
+        self.error_rate = error_rate  # Fraction of requests answered with 500/429
+        self.pairs_per_token = pairs_per_token
+        self.rng = random.Random(seed)
+        self.requests = 0
+        self.errors = 0
+        self._runner: Optional[web.AppRunner] = None
+    
+    @classmethod
+    def with_tokens(cls, count: int, seed: int = 0, **kwargs) -> 'FakeDexScreener':
+        """Create a server with ``count`` synthetic tokens at random prices."""
+        rng = random.Random(seed)
+        prices = {token_address(i): 10 ** rng.uniform(-8, 3) for i in range(count)}
+        return cls(prices, seed=seed, **kwargs)
+    
+    def move_prices(self, max_change: float = 0.05) -> None:
+        """Move every price by up to +/- ``max_change``."""
+        for addr in self.prices:
+            self.prices[addr] *= 1 + self.rng.uniform(-max_change, max_change)
+    
+    # ==================== RESPONSES ====================
+    
+    def _pairs(self, address: str) -> List[Dict]:
+        price = self.prices[address]
+        pairs = []
+        for i in range(self.pairs_per_token):
+            # Pair 0 carries the most liquidity and the reference price
+            pairs.append({
+                'chainId': 'ethereum',
+                'dexId': 'fakeswap',
+                'pairAddress': f"{address}{i:02x}",
+                'url': f"https://dexscreener.com/ethereum/{address}",
+                'baseToken': {'address': address, 'name': f"Token {address[-6:]}", 'symbol': f"T{address[-4:].upper()}"},
+                'quoteToken': {'address': token_address(10 ** 9 + i), 'name': 'Wrapped Ether', 'symbol': 'WETH'},
+                'priceUsd': f"{price * (1 + i * 0.001):.12g}",
+                'priceNative': f"{price / 3000:.12g}",
+                'priceChange': {'m5': round(self.rng.uniform(-2, 2), 2), 'h1': round(self.rng.uniform(-5, 5), 2),
+                                'h6': 0, 'h24': 0},
+                'liquidity': {'usd': 1_000_000 / (i + 1), 'base': 0, 'quote': 0},
+                'volume': {'h24': 500_000, 'h6': 100_000, 'h1': 20_000},
+                'txns': {'h24': {'buys': 100, 'sells': 90}},
+                'fdv': price * 1e9,
+                'marketCap': price * 1e9,
+            })
+        return pairs
+    
+    async def _respond(self, request: web.Request, pairs_for) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        if self.error_rate and self.rng.random() < self.error_rate:
+            self.errors += 1
+            return web.Response(status=self.rng.choice([429, 500]))
+        pairs = pairs_for(request)
+        return web.json_response({'schemaVersion': '1.0.0', 'pairs': pairs or None})
+    
+    async def tokens(self, request: web.Request) -> web.Response:
+        def pairs_for(request):
+            pairs = []
+            for address in request.match_info['addresses'].lower().split(','):
+                if address in self.prices:
+                    pairs.extend(self._pairs(address))
+            return pairs
+        return await self._respond(request, pairs_for)
+    
+    async def search(self, request: web.Request) -> web.Response:
+        def pairs_for(request):
+            query = request.query.get('q', '').lower()
+            if query in self.prices:
+                return self._pairs(query)
+            matches = [addr for addr in self.prices if query and query in addr][:30]
+            return [self._pairs(addr)[0] for addr in matches]
+        return await self._respond(request, pairs_for)
+    
+    # ==================== SERVER ====================
+    
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/latest/dex/tokens/{addresses}', self.tokens)
+        app.router.add_get('/latest/dex/search', self.search)
+        app.router.add_get('/latest/dex/pairs/search', self.search)
+        return app
+    
+    async def start(self, host: str = '127.0.0.1', port: int = 8765) -> str:
+        """Start serving; returns the API base URL to use as ``DEXSCREENER_API_BASE``."""
+        self._runner = web.AppRunner(self.app())
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        return f"http://{host}:{port}/latest"
+    
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def _serve(args) -> None:
+    server = FakeDexScreener.with_tokens(args.tokens, latency=args.latency / 1000, error_rate=args.error_rate,
+                                         pairs_per_token=args.pairs)
+    base = await server.start(port=args.port)
+    print(f"Serving {args.tokens} tokens at {base} (e.g. {token_address(0)})")
+    while True:
+        await asyncio.sleep(args.move_every)
+        server.move_prices()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--tokens', type=int, default=1000)
+    parser.add_argument('--latency', type=float, default=0, help="added latency per request (ms)")
+    parser.add_argument('--error-rate', type=float, default=0)
+    parser.add_argument('--pairs', type=int, default=2, help="pairs per token")
+    parser.add_argument('--move-every', type=float, default=10, help="seconds between price moves")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
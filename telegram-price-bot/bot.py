@@ -1,4 +1,5 @@
 import os
+import re
 import asyncio
 import logging
 from datetime import datetime
@@ -13,8 +14,11 @@ from telegram.ext import (
     ContextTypes,
 )
 from dotenv import load_dotenv
-from price_monitor import PriceMonitor
-from database import Database
+from backend import create_services, start_monitor, METRICS_PORT, METRICS_HOST
+from backend_client import BackendClient
+from formatting import format_number, build_portfolio_message
+from metrics import MetricsServer, REGISTRY
+from price_cache import PriceCache, MISS
 
 # Load environment variables
 load_dotenv()
@@ -29,12 +33,46 @@ logger = logging.getLogger(__name__)
 # Bot token
 BOT_TOKEN = os.getenv('BOT_TOKEN', '8472876966:AAFxO8QjCbv2oc_rCKp_qcTUXyYUXmw5Rw8')
 
+# Backend service socket; when set, the bot is a thin client of backend.py
+BACKEND_SOCKET = os.getenv('BACKEND_SOCKET')
+
+# Webhook mode (long polling when WEBHOOK_URL is unset)
+WEBHOOK_URL = os.getenv('WEBHOOK_URL')
+WEBHOOK_LISTEN = os.getenv('WEBHOOK_LISTEN', '0.0.0.0')
+WEBHOOK_PORT = int(os.getenv('WEBHOOK_PORT', 8443))
+WEBHOOK_PATH = os.getenv('WEBHOOK_PATH', 'telegram')
+WEBHOOK_SECRET = os.getenv('WEBHOOK_SECRET')
+
+# Inbound update queue bound (backpressure)
+UPDATE_QUEUE_SIZE = int(os.getenv('UPDATE_QUEUE_SIZE', 1000))
+
+# Telegram user IDs allowed to use admin commands (/metrics)
+ADMIN_USER_IDS = {int(uid) for uid in os.getenv('ADMIN_USER_IDS', '').split(',') if uid.strip()}
+
+# The only update types the handlers use
+ALLOWED_UPDATES = [Update.MESSAGE, Update.CALLBACK_QUERY]
+
+# Rendered /portfolio messages are reused for this long (seconds)
+PORTFOLIO_CACHE_TTL = float(os.getenv('PORTFOLIO_CACHE_TTL', 15))
+
+# Show last known prices if the portfolio lookup takes longer than this (seconds)
+PORTFOLIO_PROGRESS_DELAY = 0.5
+
+# Text that could be a token symbol (e.g. PEPE or $PEPE)
+SYMBOL_PATTERN = re.compile(r'^\$?[A-Za-z0-9._-]{1,20}$')
+
 # Conversation states
 WAITING_FOR_CA, WAITING_FOR_CUSTOM_PERCENT = range(2)
 
-# Initialize database and price monitor
-db = Database()
-price_monitor = PriceMonitor(db)
+# Database and price monitor (local, or proxies to the backend service), set
+# up by init_services(). Not at import time: monitor worker processes are
+# spawned and re-import this module, and must not open the stores again.
+backend = None
+db = None
+price_monitor = None
+
+# User ID -> rendered portfolio message
+portfolio_cache = PriceCache(max_entries=10_000, ttl=PORTFOLIO_CACHE_TTL, name='portfolio')
 
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
@@ -70,7 +108,7 @@ async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
 
 *Basic Commands:*
 • /start - Start the bot
-• /track `<CA>` - Track a token by contract address
+• /track `<CA>` - Track a token by contract address (or the symbol of a token tracked before)
 • /alerts - View all your active alerts
 • /delete - Delete a specific alert
 • /portfolio - View your tracked tokens
@@ -105,13 +143,16 @@ async def handle_contract_address(update: Update, context: ContextTypes.DEFAULT_
     text = update.message.text.strip()
     user_id = update.effective_user.id
     
-    # Check if it looks like a contract address
+    # Check if it looks like a contract address, or the symbol of a token looked up before
     if not is_valid_contract_address(text):
-        await update.message.reply_text(
-            "❌ That doesn't look like a valid contract address.\n"
-            "Please send a valid CA (e.g., 0x... for EVM or a Solana address)"
-        )
-        return ConversationHandler.END
+        address = await price_monitor.resolve_symbol(text) if SYMBOL_PATTERN.match(text) else None
+        if not address:
+            await update.message.reply_text(
+                "❌ That doesn't look like a valid contract address.\n"
+                "Please send a valid CA (e.g., 0x... for EVM or a Solana address)"
+            )
+            return ConversationHandler.END
+        text = address
     
     # Show loading message
     loading_msg = await update.message.reply_text("🔍 Fetching token info from DexScreener...")
@@ -212,7 +253,8 @@ async def button_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     if callback_data == "add_watchlist":
         token_info = context.user_data.get('current_token')
         if token_info:
-            db.add_to_watchlist(user_id, token_info)
+            await db.add_to_watchlist(user_id, token_info)
+            portfolio_cache.delete(user_id)
             await query.edit_message_text(
                 f"✅ *{token_info.get('name')}* added to your watchlist!\n"
                 "Use /portfolio to view your tracked tokens.",
@@ -299,7 +341,7 @@ async def create_alert(query, context, user_id: int, percent: float, direction:
         'active': True
     }
     
-    alert_id = db.add_alert(alert_data)
+    alert_id = await db.add_alert(alert_data)
     
     await query.edit_message_text(
         f"✅ *Alert Created Successfully!*\n\n"
@@ -350,7 +392,7 @@ async def handle_custom_percent(update: Update, context: ContextTypes.DEFAULT_TY
                 'active': True
             }
             
-            alert_id = db.add_alert(alert_data)
+            alert_id = await db.add_alert(alert_data)
             
             direction_emoji = "📈" if direction == "up" else "📉"
             
@@ -408,7 +450,7 @@ async def handle_custom_percent(update: Update, context: ContextTypes.DEFAULT_TY
                 'active': True
             }
             
-            alert_id = db.add_alert(alert_data)
+            alert_id = await db.add_alert(alert_data)
             
             direction_emoji = "📈" if direction == "up" else "📉"
             direction_text = f"UP {percent}%" if direction == "up" else f"DOWN {percent}%"
@@ -438,7 +480,7 @@ async def handle_custom_percent(update: Update, context: ContextTypes.DEFAULT_TY
 async def view_alerts(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """View all active alerts for the user."""
     user_id = update.effective_user.id
-    alerts = db.get_user_alerts(user_id)
+    alerts = await db.get_user_alerts(user_id)
     
     if not alerts:
         await update.message.reply_text(
@@ -471,7 +513,7 @@ async def delete_alert(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     
     if not context.args:
         # Show alerts with delete buttons
-        alerts = db.get_user_alerts(user_id)
+        alerts = await db.get_user_alerts(user_id)
         
         if not alerts:
             await update.message.reply_text("📭 You don't have any alerts to delete.")
@@ -496,7 +538,7 @@ async def delete_alert(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     else:
         # Delete specific alert by ID
         alert_id = context.args[0]
-        success = db.delete_alert(user_id, alert_id)
+        success = await db.delete_alert(user_id, alert_id)
         
         if success:
             await update.message.reply_text(f"✅ Alert `{alert_id}` deleted successfully!", parse_mode='Markdown')
@@ -516,7 +558,7 @@ async def delete_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     if query.data.startswith("delete_"):
         alert_id = query.data.replace("delete_", "")
         user_id = update.effective_user.id
-        success = db.delete_alert(user_id, alert_id)
+        success = await db.delete_alert(user_id, alert_id)
         
         if success:
             await query.edit_message_text(f"✅ Alert deleted successfully!")
@@ -527,7 +569,14 @@ async def delete_callback(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
 async def portfolio(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """View user's watchlist/portfolio."""
     user_id = update.effective_user.id
-    watchlist = db.get_watchlist(user_id)
+    
+    # Repeated taps within the TTL reuse the last rendered message
+    cached = portfolio_cache.get(user_id)
+    if cached is not MISS:
+        await update.message.reply_text(cached, parse_mode='Markdown')
+        return
+    
+    watchlist = await db.get_watchlist(user_id)
     
     if not watchlist:
         await update.message.reply_text(
@@ -536,42 +585,31 @@ async def portfolio(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
         )
         return
     
-    message = "📊 *Your Watchlist:*\n\n"
-    
-    for i, token in enumerate(watchlist, 1):
-        # Fetch current price
-        current_info = await price_monitor.get_token_info(token['contract_address'])
-        
-        if current_info:
-            current_price = float(current_info.get('priceUsd', 0))
-            initial_price = float(token.get('initial_price', current_price))
-            
-            if initial_price > 0:
-                change = ((current_price - initial_price) / initial_price) * 100
-                change_emoji = "📈" if change >= 0 else "📉"
-            else:
-                change = 0
-                change_emoji = "➖"
-            
-            message += (
-                f"*{i}. {token['name']}* (${token['symbol']})\n"
-                f"   💰 Price: ${format_number(current_price)}\n"
-                f"   {change_emoji} Change: {change:+.2f}%\n"
-                f"   🔗 Chain: {token.get('chain', 'Unknown').upper()}\n\n"
-            )
-        else:
-            message += (
-                f"*{i}. {token['name']}* (${token['symbol']})\n"
-                f"   ⚠️ Unable to fetch current price\n\n"
-            )
+    # One batched lookup for the whole watchlist, kept fresh for the next view
+    addresses = [token['contract_address'] for token in watchlist]
+    fetch = asyncio.ensure_future(price_monitor.get_tokens_info(addresses, keep_warm=True))
+    
+    # If it isn't back quickly, show the last known prices while it runs
+    done, _ = await asyncio.wait({fetch}, timeout=PORTFOLIO_PROGRESS_DELAY)
+    reply = None
+    if not done:
+        known = await price_monitor.get_cached_tokens_info(addresses)
+        reply = await update.message.reply_text(
+            build_portfolio_message(watchlist, known, updating=True), parse_mode='Markdown'
+        )
     
-    await update.message.reply_text(message, parse_mode='Markdown')
+    message = build_portfolio_message(watchlist, await fetch)
+    if reply is None:
+        await update.message.reply_text(message, parse_mode='Markdown')
+    else:
+        await reply.edit_text(message, parse_mode='Markdown')
+    portfolio_cache.set(user_id, message)
 
 
 async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """View user's alert statistics."""
     user_id = update.effective_user.id
-    user_stats = db.get_user_stats(user_id)
+    user_stats = await db.get_user_stats(user_id)
     
     message = f"""
 📊 *Your Statistics:*
@@ -587,6 +625,20 @@ Keep tracking! 🚀
     await update.message.reply_text(message, parse_mode='Markdown')
 
 
+async def metrics_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
+    """Show hot-path metrics (admins only)."""
+    if update.effective_user.id not in ADMIN_USER_IDS:
+        return
+    
+    # The monitor runs in the backend service in client mode, so its metrics live there
+    summary = await backend.metrics_summary() if BACKEND_SOCKET else REGISTRY.summary()
+    if not summary:
+        summary = "No metrics recorded yet"
+    
+    # Telegram caps messages at 4096 characters
+    await update.message.reply_text(f"```\n{summary[:4000]}\n```", parse_mode='Markdown')
+
+
 def is_valid_contract_address(address: str) -> bool:
     """Check if string looks like a valid contract address."""
     # EVM addresses (Ethereum, BSC, Polygon, etc.)
@@ -601,26 +653,6 @@ def is_valid_contract_address(address: str) -> bool:
     return False
 
 
-def format_number(num) -> str:
-    """Format number for display."""
-    try:
-        num = float(num)
-        if num >= 1_000_000_000:
-            return f"{num/1_000_000_000:.2f}B"
-        elif num >= 1_000_000:
-            return f"{num/1_000_000:.2f}M"
-        elif num >= 1_000:
-            return f"{num/1_000:.2f}K"
-        elif num >= 1:
-            return f"{num:.4f}"
-        elif num >= 0.0001:
-            return f"{num:.6f}"
-        else:
-            return f"{num:.10f}"
-    except (ValueError, TypeError):
-        return str(num)
-
-
 async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Handle errors."""
     logger.error(f"Exception while handling an update: {context.error}")
@@ -631,49 +663,31 @@ async def error_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
         )
 
 
-async def run_price_monitor(application: Application) -> None:
-    """Background task to monitor prices and send alerts."""
-    while True:
-        try:
-            triggered_alerts = await price_monitor.check_alerts()
-            
-            for alert in triggered_alerts:
-                try:
-                    direction_emoji = "📈" if alert['direction'] == "up" else "📉"
-                    
-                    message = (
-                        f"🚨 *PRICE ALERT TRIGGERED!* 🚨\n\n"
-                        f"🪙 *{alert['token_name']}* (${alert['token_symbol']})\n\n"
-                        f"💰 *Current Price:* ${format_number(alert['current_price'])}\n"
-                        f"📍 *Entry Price:* ${format_number(alert['initial_price'])}\n"
-                        f"{direction_emoji} *Change:* {alert['actual_change']:+.2f}%\n"
-                        f"🎯 *Target:* {alert['direction'].upper()} {alert['percent']:.1f}%\n\n"
-                        f"_Alert has been removed. Set a new one if needed!_"
-                    )
-                    
-                    await application.bot.send_message(
-                        chat_id=alert['user_id'],
-                        text=message,
-                        parse_mode='Markdown'
-                    )
-                    
-                    # Mark alert as triggered
-                    db.mark_alert_triggered(alert['id'])
-                    
-                except Exception as e:
-                    logger.error(f"Error sending alert to user {alert['user_id']}: {e}")
-            
-        except Exception as e:
-            logger.error(f"Error in price monitor: {e}")
-        
-        # Check every 30 seconds
-        await asyncio.sleep(30)
+def init_services() -> None:
+    """Create the database and price monitor the handlers use."""
+    global backend, db, price_monitor
+    if BACKEND_SOCKET:
+        backend = BackendClient(BACKEND_SOCKET)
+        db = backend.db
+        price_monitor = backend.price_monitor
+    else:
+        db, price_monitor = create_services()
 
 
 def main() -> None:
     """Start the bot."""
+    init_services()
+    
     # Create application
-    application = Application.builder().token(BOT_TOKEN).build()
+    # A full update queue makes the webhook server wait, so Telegram backs off.
+    # Updates are processed one at a time: the ConversationHandler's per-chat
+    # state isn't safe with concurrent updates.
+    application = (
+        Application.builder()
+        .token(BOT_TOKEN)
+        .update_queue(asyncio.Queue(maxsize=UPDATE_QUEUE_SIZE))
+        .build()
+    )
     
     # Conversation handler for tracking tokens
     conv_handler = ConversationHandler(
@@ -700,21 +714,46 @@ def main() -> None:
     application.add_handler(CommandHandler("delete", delete_alert))
     application.add_handler(CommandHandler("portfolio", portfolio))
     application.add_handler(CommandHandler("stats", stats))
+    application.add_handler(CommandHandler("metrics", metrics_command))
     application.add_handler(conv_handler)
     application.add_handler(CallbackQueryHandler(delete_callback, pattern="^delete_|^cancel_delete$"))
     
     # Add error handler
     application.add_error_handler(error_handler)
     
-    # Start the price monitor as a background task
+    metrics_server = MetricsServer(METRICS_PORT, METRICS_HOST) if METRICS_PORT else None
+    
+    # Start the price monitor as a background task (the backend service runs its own)
     async def post_init(application: Application) -> None:
-        asyncio.create_task(run_price_monitor(application))
+        if metrics_server:
+            await metrics_server.start()
+        if not BACKEND_SOCKET:
+            start_monitor(application.bot, db, price_monitor)
+    
+    # Flush the database journal (or close the backend connection) on shutdown
+    async def post_shutdown(application: Application) -> None:
+        if metrics_server:
+            await metrics_server.stop()
+        if not BACKEND_SOCKET:
+            await price_monitor.close()
+        await db.close()
     
     application.post_init = post_init
+    application.post_shutdown = post_shutdown
     
     # Start the bot
     logger.info("🚀 Bot starting...")
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    if WEBHOOK_URL:
+        application.run_webhook(
+            listen=WEBHOOK_LISTEN,
+            port=WEBHOOK_PORT,
+            url_path=WEBHOOK_PATH,
+            webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{WEBHOOK_PATH}",
+            secret_token=WEBHOOK_SECRET,
+            allowed_updates=ALLOWED_UPDATES,
+        )
+    else:
+        application.run_polling(allowed_updates=ALLOWED_UPDATES)
 
 
 if __name__ == '__main__':
@@ -1,34 +1,120 @@
 import json
 import os
+import time
 import uuid
 import logging
+from contextlib import contextmanager
 from datetime import datetime
-from typing import Dict, List, Optional, Any
-from threading import Lock
+from typing import Callable, Dict, Iterator, List, Optional, Set, Any
+from threading import RLock, Lock, Event, Thread
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows; only needed when a migration reads the live store
+    fcntl = None
+
+from alert_record import AlertRecord, alert_json_default
+from journal import Journal, atomic_write_json
+import metrics
 
 logger = logging.getLogger(__name__)
 
+FILE_SECONDS = metrics.histogram('db_file_seconds', 'JSON snapshot load/save duration', ('op',))
+FILE_BYTES = metrics.counter('db_file_bytes_total', 'JSON snapshot bytes loaded/saved', ('op',))
+JOURNAL_RECORDS = metrics.counter('db_journal_records_total', 'Mutation records journaled')
+
 # Data directory
 DATA_DIR = os.path.join(os.path.dirname(__file__), 'data')
 
+# Journal tuning
+JOURNAL_FSYNC_BATCH = 64          # fsync after this many pending records
+JOURNAL_FSYNC_INTERVAL = 1.0      # ...or after this many seconds
+COMPACT_INTERVAL = 300            # Snapshot + truncate the journal this often (seconds)
+COMPACT_MAX_BYTES = 8 * 1024 * 1024  # ...or as soon as the journal grows past this
+
 
 class Database:
-    """Simple JSON-based database for storing alerts and user data."""
+    """Simple JSON-based database for storing alerts and user data.
+    
+    The JSON files are read once at startup and kept resident in memory.
+    Alerts are held as compact ``AlertRecord``s and indexed by ID and by
+    contract address so lookups don't need to scan every user's list.
+    
+    Every mutation is appended to a journal (``data/journal.log``) as a
+    small record instead of rewriting the JSON documents. A background
+    thread batches fsyncs and periodically compacts the journal into atomic
+    snapshots of ``alerts.json``, ``users.json`` and ``watchlist.json``.
+    On startup the snapshots are loaded and the journal replayed on top.
+    
+    Compaction and loading both hold ``data/store.lock`` (exclusive and
+    shared), so a read-only copy opened by another process never sees
+    the journal rotated away between reading the snapshots and the journal.
+    """
     
-    def __init__(self):
-        self.data_dir = DATA_DIR
+    def __init__(self, data_dir: Optional[str] = None, read_only: bool = False):
+        """
+        Args:
+            data_dir: Directory holding the JSON files (defaults to ``DATA_DIR``)
+            read_only: Load and replay the store without writing to it, e.g.
+                to migrate it while the bot keeps running
+        """
+        self.data_dir = data_dir or DATA_DIR
+        self.read_only = read_only
         self.alerts_file = os.path.join(self.data_dir, 'alerts.json')
         self.users_file = os.path.join(self.data_dir, 'users.json')
         self.watchlist_file = os.path.join(self.data_dir, 'watchlist.json')
+        self.journal_file = os.path.join(self.data_dir, 'journal.log')
+        self.rotated_journal_file = f"{self.journal_file}.1"
+        self.lock_file = os.path.join(self.data_dir, 'store.lock')
         
-        # Thread safety
-        self.lock = Lock()
+        # Thread safety (re-entrant so public methods can call each other)
+        self.lock = RLock()
+        self._compact_lock = Lock()
         
-        # Ensure data directory exists
-        os.makedirs(self.data_dir, exist_ok=True)
+        # Alert change listeners (see subscribe())
+        self._listeners: List[Callable[[str, Any], None]] = []
         
-        # Initialize data files
-        self._init_files()
+        if not read_only:
+            # Ensure data directory exists
+            os.makedirs(self.data_dir, exist_ok=True)
+            
+            # Initialize data files
+            self._init_files()
+        
+        # Snapshots and journal are read as one consistent state (see compact())
+        with self._store_lock(exclusive=False):
+            # Resident documents, loaded once
+            self.alerts: Dict[str, List[AlertRecord]] = {
+                user_id: [AlertRecord.from_dict(alert) for alert in user_alerts]
+                for user_id, user_alerts in self._load_json(self.alerts_file).items()
+            }
+            self.users: Dict[str, Dict] = self._load_json(self.users_file)
+            self.watchlist: Dict[str, List[Dict]] = self._load_json(self.watchlist_file)
+            
+            # Indexes: alert ID -> alert, contract address -> {alert ID: alert} (active only)
+            self._alerts_by_id: Dict[str, AlertRecord] = {}
+            self._active_by_address: Dict[str, Dict[str, AlertRecord]] = {}
+            self._build_indexes()
+            
+            # Reverse watchlist index: contract address -> watching user IDs
+            self._watchers_by_address: Dict[str, Set[int]] = {}
+            self._build_watch_index()
+            
+            # Replay mutations that hadn't been compacted yet
+            replayed = self._replay_journal()
+        if read_only:
+            return
+        
+        self.journal = Journal(self.journal_file, fsync_batch=JOURNAL_FSYNC_BATCH)
+        self._last_compaction = time.monotonic()
+        if replayed:
+            logger.info(f"Replayed {replayed} journal records")
+            self.compact()
+        
+        # Background fsync batching and compaction
+        self._stop = Event()
+        self._maintenance_thread = Thread(target=self._maintenance_loop, name='db-maintenance', daemon=True)
+        self._maintenance_thread.start()
     
     def _init_files(self):
         """Initialize data files if they don't exist."""
@@ -39,15 +125,248 @@ class Database:
     def _load_json(self, file_path: str) -> Dict:
         """Load JSON data from file."""
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
+            with FILE_SECONDS.time(op='load'):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    text = f.read()
+                FILE_BYTES.inc(len(text), op='load')
+                return json.loads(text)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError as e:
+            if self.read_only:
+                raise
+            # Keep the damaged file for manual recovery instead of overwriting it
+            corrupt_path = f"{file_path}.corrupt-{int(time.time())}"
+            os.replace(file_path, corrupt_path)
+            logger.error(f"Could not parse {file_path} ({e}); moved it to {corrupt_path}")
             return {}
     
-    def _save_json(self, file_path: str, data: Dict) -> None:
-        """Save data to JSON file."""
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, default=str)
+    @contextmanager
+    def _store_lock(self, exclusive: bool) -> Iterator[None]:
+        """Hold the store's lock file: another process may be loading a read-only copy."""
+        if fcntl is None:
+            yield
+            return
+        try:
+            lock_file = open(self.lock_file, 'a+b')
+        except OSError as e:
+            # A read-only copy of a store that doesn't exist (yet)
+            logger.debug(f"Not locking {self.lock_file}: {e}")
+            yield
+            return
+        
+        try:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            yield
+        finally:
+            lock_file.close()
+    
+    def _save_json(self, file_path: str, data: Optional[Dict], serialized: Optional[str] = None) -> None:
+        """Atomically save data (or pre-serialized JSON text) to a JSON file."""
+        with FILE_SECONDS.time(op='save'):
+            if serialized is None:
+                serialized = json.dumps(data, separators=(',', ':'), default=str)
+            atomic_write_json(file_path, None, serialized=serialized)
+        FILE_BYTES.inc(len(serialized), op='save')
+    
+    # ==================== JOURNAL ====================
+    
+    def _commit(self, record: Dict[str, Any]) -> None:
+        """Apply a mutation record to the resident state and journal it."""
+        self._apply(record)
+        self.journal.append(record)
+        JOURNAL_RECORDS.inc()
+        if self.journal.size >= COMPACT_MAX_BYTES:
+            self._wake_compaction()
+    
+    def _apply(self, record: Dict[str, Any]) -> None:
+        """
+        Apply a mutation record to the resident state.
+        
+        Every operation is idempotent so a record replayed on top of a
+        snapshot that already contains it is harmless.
+        """
+        op = record['op']
+        
+        if op == 'add_alert':
+            if record['alert']['id'] not in self._alerts_by_id:
+                alert = AlertRecord.from_dict(record['alert'])
+                self.alerts.setdefault(str(alert.user_id), []).append(alert)
+                self._index_alert(alert)
+            
+        elif op == 'delete_alert':
+            alert = self._alerts_by_id.pop(record['id'], None)
+            if alert is not None:
+                user_alerts = self.alerts.get(str(alert.user_id), [])
+                for i, candidate in enumerate(user_alerts):
+                    if candidate is alert:
+                        user_alerts.pop(i)
+                        break
+                self._unindex_active(alert)
+            
+        elif op == 'trigger_alert':
+            alert = self._alerts_by_id.get(record['id'])
+            if alert is not None:
+                self._set_triggered(alert, record['at'])
+            
+        elif op == 'trigger_alerts':
+            for alert_id in record['ids']:
+                alert = self._alerts_by_id.get(alert_id)
+                if alert is not None:
+                    self._set_triggered(alert, record['at'])
+            
+        elif op == 'clear_alerts':
+            for alert in self.alerts.get(str(record['user_id']), []):
+                self._alerts_by_id.pop(alert.id, None)
+                self._unindex_active(alert)
+            if str(record['user_id']) in self.alerts:
+                self.alerts[str(record['user_id'])] = []
+            
+        elif op == 'add_watch':
+            entry = record['entry']
+            user_watchlist = self.watchlist.setdefault(str(record['user_id']), [])
+            if not any(t.get('contract_address', '').lower() == entry['contract_address'] for t in user_watchlist):
+                user_watchlist.append(entry)
+                self._watchers_by_address.setdefault(entry['contract_address'], set()).add(int(record['user_id']))
+            
+        elif op == 'remove_watch':
+            user_id_str = str(record['user_id'])
+            if user_id_str in self.watchlist:
+                contract_address = record['contract_address'].lower()
+                self.watchlist[user_id_str] = [
+                    t for t in self.watchlist[user_id_str]
+                    if t.get('contract_address', '').lower() != contract_address
+                ]
+                watchers = self._watchers_by_address.get(contract_address)
+                if watchers is not None:
+                    watchers.discard(int(record['user_id']))
+                    if not watchers:
+                        del self._watchers_by_address[contract_address]
+            
+        elif op == 'ensure_user':
+            self.users.setdefault(str(record['user']['user_id']), record['user'])
+            
+        elif op == 'update_user':
+            self.users.setdefault(str(record['user_id']), {}).update(record['data'])
+            
+        else:
+            logger.warning(f"Ignoring unknown journal op {op!r}")
+    
+    def _replay_journal(self) -> int:
+        """Replay the rotated and current journals. Returns the record count."""
+        count = 0
+        for path in [self.rotated_journal_file, self.journal_file]:
+            for record in Journal.replay(path):
+                self._apply(record)
+                count += 1
+        return count
+    
+    def compact(self) -> None:
+        """Write atomic snapshots of the resident state and truncate the journal."""
+        with self._compact_lock, self._store_lock(exclusive=True):
+            with self.lock:
+                snapshots = [
+                    (self.alerts_file, json.dumps(self.alerts, separators=(',', ':'), default=alert_json_default)),
+                    (self.users_file, json.dumps(self.users, separators=(',', ':'), default=str)),
+                    (self.watchlist_file, json.dumps(self.watchlist, separators=(',', ':'), default=str)),
+                ]
+                self.journal.rotate(self.rotated_journal_file)
+            
+            # Snapshot writes happen outside the state lock; the rotated journal
+            # is only dropped once every snapshot is safely on disk
+            for file_path, serialized in snapshots:
+                self._save_json(file_path, None, serialized=serialized)
+            os.remove(self.rotated_journal_file)
+            self._last_compaction = time.monotonic()
+            logger.debug("Database journal compacted")
+    
+    def _wake_compaction(self) -> None:
+        self._last_compaction = float('-inf')
+    
+    def _maintenance_loop(self) -> None:
+        """Batch fsyncs and compact the journal in the background."""
+        while not self._stop.wait(JOURNAL_FSYNC_INTERVAL / 2):
+            try:
+                if self.journal.seconds_since_sync() >= JOURNAL_FSYNC_INTERVAL:
+                    self.journal.sync()
+                
+                due = time.monotonic() - self._last_compaction >= COMPACT_INTERVAL
+                if due and self.journal.size > 0:
+                    self.compact()
+            except Exception as e:
+                logger.error(f"Database maintenance error: {e}")
+    
+    def close(self) -> None:
+        """Stop background maintenance, compact and close the journal."""
+        if self.read_only:
+            return
+        self._stop.set()
+        self._maintenance_thread.join(timeout=5)
+        if self.journal.size > 0:
+            self.compact()
+        self.journal.close()
+    
+    # ==================== LISTENERS ====================
+    
+    def subscribe(self, callback: Callable[[str, Any], None]) -> None:
+        """
+        Register a callback for alert changes.
+        
+        The callback receives ``('alert_added', record)`` with the new
+        alert as an ``AlertRecord`` (shared, so don't modify it), or
+        ``('alert_removed', alert_id)``; it runs on the thread that made the
+        change, so it should be quick and thread-safe.
+        """
+        self._listeners.append(callback)
+    
+    def _notify(self, event: str, payload: Any) -> None:
+        for callback in self._listeners:
+            try:
+                callback(event, payload)
+            except Exception as e:
+                logger.error(f"Alert listener failed on {event}: {e}")
+    
+    # ==================== INDEXES ====================
+    
+    def _build_indexes(self) -> None:
+        """Build the alert indexes from the resident alerts document."""
+        self._alerts_by_id.clear()
+        self._active_by_address.clear()
+        for user_alerts in self.alerts.values():
+            for alert in user_alerts:
+                self._index_alert(alert)
+    
+    def _index_alert(self, alert: AlertRecord) -> None:
+        """Add an alert to the indexes."""
+        if alert.id is None:
+            return
+        self._alerts_by_id[alert.id] = alert
+        if alert.active:
+            self._active_by_address.setdefault(alert.address_key, {})[alert.id] = alert
+    
+    def _unindex_active(self, alert: AlertRecord) -> None:
+        """Remove an alert from the active-by-address index."""
+        addr = alert.address_key
+        by_id = self._active_by_address.get(addr)
+        if by_id is not None:
+            by_id.pop(alert.id, None)
+            if not by_id:
+                del self._active_by_address[addr]
+    
+    def _build_watch_index(self) -> None:
+        """Build the token -> watchers index from the resident watchlist document."""
+        self._watchers_by_address.clear()
+        for user_id, entries in self.watchlist.items():
+            for entry in entries:
+                address = entry.get('contract_address', '').lower()
+                self._watchers_by_address.setdefault(address, set()).add(int(user_id))
+    
+    def _set_triggered(self, alert: AlertRecord, at: str) -> None:
+        """Deactivate a triggered alert."""
+        alert.active = False
+        alert.triggered = True
+        alert.triggered_at = int(datetime.fromisoformat(at).timestamp())
+        self._unindex_active(alert)
     
     # ==================== ALERTS ====================
     
@@ -62,25 +381,23 @@ class Database:
             Alert ID
         """
         with self.lock:
-            alerts = self._load_json(self.alerts_file)
-            
             # Generate unique ID
             alert_id = str(uuid.uuid4())[:8]
-            alert_data['id'] = alert_id
-            alert_data['active'] = True
-            alert_data['triggered'] = False
-            
-            user_id = str(alert_data['user_id'])
+            while alert_id in self._alerts_by_id:
+                alert_id = str(uuid.uuid4())[:8]
             
-            if user_id not in alerts:
-                alerts[user_id] = []
+            alert = dict(alert_data)
+            alert['id'] = alert_id
+            alert['active'] = True
+            alert['triggered'] = False
             
-            alerts[user_id].append(alert_data)
+            user_id = str(alert['user_id'])
             
-            self._save_json(self.alerts_file, alerts)
+            self._commit({'op': 'add_alert', 'alert': alert})
+            self._notify('alert_added', self._alerts_by_id[alert_id])
             
             # Update user record
-            self._ensure_user(alert_data['user_id'])
+            self._ensure_user(alert['user_id'])
             
             logger.info(f"Alert {alert_id} created for user {user_id}")
             return alert_id
@@ -97,35 +414,44 @@ class Database:
             List of alert dictionaries
         """
         with self.lock:
-            alerts = self._load_json(self.alerts_file)
-            user_alerts = alerts.get(str(user_id), [])
+            user_alerts = self.alerts.get(str(user_id), [])
             
             if active_only:
-                return [a for a in user_alerts if a.get('active', True)]
-            return user_alerts
+                return [a.to_dict() for a in user_alerts if a.active]
+            return [a.to_dict() for a in user_alerts]
     
     def get_all_active_alerts(self) -> List[Dict]:
         """Get all active alerts from all users."""
         with self.lock:
-            alerts = self._load_json(self.alerts_file)
-            active = []
-            
-            for user_id, user_alerts in alerts.items():
-                for alert in user_alerts:
-                    if alert.get('active', True):
-                        active.append(alert)
-            
-            return active
+            return [
+                alert.to_dict()
+                for by_id in self._active_by_address.values()
+                for alert in by_id.values()
+            ]
+    
+    def get_active_alerts_by_address(self, address_filter: Optional[Callable[[str], bool]] = None) -> Dict[str, List[AlertRecord]]:
+        """
+        Get all active alerts grouped by lowercased contract address.
+        
+        Returns the resident records themselves rather than copies (this is
+        what the alert engines load), so callers must not modify them.
+        
+        Args:
+            address_filter: Only include addresses for which this returns True
+        """
+        with self.lock:
+            return {
+                addr: list(by_id.values())
+                for addr, by_id in self._active_by_address.items()
+                if address_filter is None or address_filter(addr)
+            }
     
     def get_alert_by_id(self, user_id: int, alert_id: str) -> Optional[Dict]:
         """Get a specific alert by ID."""
         with self.lock:
-            alerts = self._load_json(self.alerts_file)
-            user_alerts = alerts.get(str(user_id), [])
-            
-            for alert in user_alerts:
-                if alert.get('id') == alert_id:
-                    return alert
+            alert = self._alerts_by_id.get(alert_id)
+            if alert is not None and str(alert.user_id) == str(user_id):
+                return alert.to_dict()
             return None
     
     def delete_alert(self, user_id: int, alert_id: str) -> bool:
@@ -140,23 +466,15 @@ class Database:
             True if deleted, False if not found
         """
         with self.lock:
-            alerts = self._load_json(self.alerts_file)
-            user_id_str = str(user_id)
+            alert = self._alerts_by_id.get(alert_id)
             
-            if user_id_str not in alerts:
+            if alert is None or str(alert.user_id) != str(user_id):
                 return False
             
-            user_alerts = alerts[user_id_str]
-            
-            for i, alert in enumerate(user_alerts):
-                if alert.get('id') == alert_id:
-                    user_alerts.pop(i)
-                    alerts[user_id_str] = user_alerts
-                    self._save_json(self.alerts_file, alerts)
-                    logger.info(f"Alert {alert_id} deleted for user {user_id}")
-                    return True
-            
-            return False
+            self._commit({'op': 'delete_alert', 'id': alert_id})
+            self._notify('alert_removed', alert_id)
+            logger.info(f"Alert {alert_id} deleted for user {user_id}")
+            return True
     
     def mark_alert_triggered(self, alert_id: str) -> bool:
         """
@@ -169,19 +487,39 @@ class Database:
             True if updated, False if not found
         """
         with self.lock:
-            alerts = self._load_json(self.alerts_file)
+            if alert_id not in self._alerts_by_id:
+                return False
             
-            for user_id, user_alerts in alerts.items():
-                for alert in user_alerts:
-                    if alert.get('id') == alert_id:
-                        alert['active'] = False
-                        alert['triggered'] = True
-                        alert['triggered_at'] = datetime.now().isoformat()
-                        self._save_json(self.alerts_file, alerts)
-                        logger.info(f"Alert {alert_id} marked as triggered")
-                        return True
+            self._commit({'op': 'trigger_alert', 'id': alert_id, 'at': datetime.now().isoformat()})
+            self._notify('alert_removed', alert_id)
+            logger.info(f"Alert {alert_id} marked as triggered")
+            return True
+    
+    def mark_alerts_triggered(self, alert_ids: List[str]) -> int:
+        """
+        Mark many alerts as triggered in one journal record.
+        
+        Alerts that are unknown or no longer active are left alone.
+        
+        Args:
+            alert_ids: Alert IDs
             
-            return False
+        Returns:
+            Number of alerts updated
+        """
+        with self.lock:
+            active = [
+                alert_id for alert_id in dict.fromkeys(alert_ids)
+                if alert_id in self._alerts_by_id and self._alerts_by_id[alert_id].active
+            ]
+            if not active:
+                return 0
+            
+            self._commit({'op': 'trigger_alerts', 'ids': active, 'at': datetime.now().isoformat()})
+            for alert_id in active:
+                self._notify('alert_removed', alert_id)
+            logger.info(f"{len(active)} alerts marked as triggered")
+            return len(active)
     
     def clear_user_alerts(self, user_id: int) -> int:
         """
@@ -194,14 +532,14 @@ class Database:
             Number of alerts cleared
         """
         with self.lock:
-            alerts = self._load_json(self.alerts_file)
             user_id_str = str(user_id)
             
-            if user_id_str in alerts:
-                count = len(alerts[user_id_str])
-                alerts[user_id_str] = []
-                self._save_json(self.alerts_file, alerts)
-                return count
+            if user_id_str in self.alerts:
+                alert_ids = [a.id for a in self.alerts[user_id_str]]
+                self._commit({'op': 'clear_alerts', 'user_id': user_id})
+                for alert_id in alert_ids:
+                    self._notify('alert_removed', alert_id)
+                return len(alert_ids)
             return 0
     
     # ==================== WATCHLIST ====================
@@ -218,15 +556,11 @@ class Database:
             True if added, False if already exists
         """
         with self.lock:
-            watchlist = self._load_json(self.watchlist_file)
-            user_id_str = str(user_id)
-            
-            if user_id_str not in watchlist:
-                watchlist[user_id_str] = []
+            user_watchlist = self.watchlist.get(str(user_id), [])
             
             # Check if already in watchlist
             contract_address = token_info.get('address', '').lower()
-            for token in watchlist[user_id_str]:
+            for token in user_watchlist:
                 if token.get('contract_address', '').lower() == contract_address:
                     return False
             
@@ -240,80 +574,68 @@ class Database:
                 'added_at': datetime.now().isoformat()
             }
             
-            watchlist[user_id_str].append(watchlist_entry)
-            self._save_json(self.watchlist_file, watchlist)
+            self._commit({'op': 'add_watch', 'user_id': user_id, 'entry': watchlist_entry})
             
             return True
     
     def get_watchlist(self, user_id: int) -> List[Dict]:
         """Get user's watchlist."""
         with self.lock:
-            watchlist = self._load_json(self.watchlist_file)
-            return watchlist.get(str(user_id), [])
+            return [dict(t) for t in self.watchlist.get(str(user_id), [])]
     
     def remove_from_watchlist(self, user_id: int, contract_address: str) -> bool:
         """Remove a token from watchlist."""
         with self.lock:
-            watchlist = self._load_json(self.watchlist_file)
-            user_id_str = str(user_id)
+            user_watchlist = self.watchlist.get(str(user_id), [])
             
-            if user_id_str not in watchlist:
+            if not any(t.get('contract_address', '').lower() == contract_address.lower() for t in user_watchlist):
                 return False
             
-            initial_count = len(watchlist[user_id_str])
-            watchlist[user_id_str] = [
-                t for t in watchlist[user_id_str]
-                if t.get('contract_address', '').lower() != contract_address.lower()
-            ]
-            
-            if len(watchlist[user_id_str]) < initial_count:
-                self._save_json(self.watchlist_file, watchlist)
-                return True
-            return False
+            self._commit({'op': 'remove_watch', 'user_id': user_id, 'contract_address': contract_address})
+            return True
+    
+    def get_watchers(self, contract_address: str) -> List[int]:
+        """IDs of the users watching a token."""
+        with self.lock:
+            return list(self._watchers_by_address.get(contract_address.lower(), ()))
+    
+    def get_watched_addresses(self) -> List[str]:
+        """Lowercased addresses of every token on some user's watchlist."""
+        with self.lock:
+            return list(self._watchers_by_address)
     
     # ==================== USERS ====================
     
     def _ensure_user(self, user_id: int) -> None:
         """Ensure user exists in database."""
-        users = self._load_json(self.users_file)
-        user_id_str = str(user_id)
-        
-        if user_id_str not in users:
-            users[user_id_str] = {
+        if str(user_id) not in self.users:
+            self._commit({'op': 'ensure_user', 'user': {
                 'user_id': user_id,
                 'created_at': datetime.now().isoformat(),
                 'alerts_created': 0,
                 'alerts_triggered': 0
-            }
-            self._save_json(self.users_file, users)
+            }})
     
     def get_user(self, user_id: int) -> Optional[Dict]:
         """Get user data."""
         with self.lock:
-            users = self._load_json(self.users_file)
-            return users.get(str(user_id))
+            user = self.users.get(str(user_id))
+            return dict(user) if user is not None else None
     
     def update_user(self, user_id: int, data: Dict) -> None:
         """Update user data."""
         with self.lock:
-            users = self._load_json(self.users_file)
-            user_id_str = str(user_id)
-            
-            if user_id_str not in users:
-                users[user_id_str] = {}
-            
-            users[user_id_str].update(data)
-            self._save_json(self.users_file, users)
+            self._commit({'op': 'update_user', 'user_id': user_id, 'data': data})
     
     def get_user_stats(self, user_id: int) -> Dict:
         """Get user statistics."""
         with self.lock:
-            user = self.get_user(user_id)
-            alerts = self.get_user_alerts(user_id, active_only=False)
-            watchlist = self.get_watchlist(user_id)
+            user = self.users.get(str(user_id))
+            alerts = self.alerts.get(str(user_id), [])
+            watchlist = self.watchlist.get(str(user_id), [])
             
-            active_alerts = len([a for a in alerts if a.get('active', True)])
-            triggered_alerts = len([a for a in alerts if a.get('triggered', False)])
+            active_alerts = sum(1 for a in alerts if a.active)
+            triggered_alerts = sum(1 for a in alerts if a.triggered)
             
             created_at = user.get('created_at', datetime.now().isoformat()) if user else datetime.now().isoformat()
             
@@ -333,5 +655,21 @@ class Database:
     def get_all_users(self) -> List[int]:
         """Get all user IDs."""
         with self.lock:
-            users = self._load_json(self.users_file)
-            return [int(uid) for uid in users.keys()]
+            return [int(uid) for uid in self.users.keys()]
+
+
+def create_database():
+    """
+    Create the database backend selected by the ``DB_BACKEND`` env var.
+    
+    ``json`` (default) uses the journaled JSON store in ``DATA_DIR``;
+    ``sqlite`` uses ``SQLiteDatabase`` at ``SQLITE_PATH``.
+    """
+    backend = os.getenv('DB_BACKEND', 'json').lower()
+    
+    if backend == 'sqlite':
+        from sqlite_database import SQLiteDatabase, DEFAULT_DB_PATH
+        return SQLiteDatabase(os.getenv('SQLITE_PATH', DEFAULT_DB_PATH))
+    if backend != 'json':
+        raise ValueError(f"Unknown DB_BACKEND: {backend}")
+    return Database()
@@ -0,0 +1,85 @@
+def format_number(num) -> str:
+    """Format number for display."""
+    try:
+        num = float(num)
+        if num >= 1_000_000_000:
+            return f"{num/1_000_000_000:.2f}B"
+        elif num >= 1_000_000:
+            return f"{num/1_000_000:.2f}M"
+        elif num >= 1_000:
+            return f"{num/1_000:.2f}K"
+        elif num >= 1:
+            return f"{num:.4f}"
+        elif num >= 0.0001:
+            return f"{num:.6f}"
+        else:
+            return f"{num:.10f}"
+    except (ValueError, TypeError):
+        return str(num)
+
+
+def build_portfolio_message(watchlist: list, token_infos: dict, updating: bool = False) -> str:
+    """
+    Render a user's watchlist with current prices.
+    
+    Args:
+        watchlist: Watchlist entries
+        token_infos: Token info by lowercased contract address
+        updating: Prices are still being fetched (tokens without info show
+            as pending instead of unavailable)
+    """
+    message = "📊 *Your Watchlist:*" + (" _updating..._" if updating else "") + "\n\n"
+    
+    for i, token in enumerate(watchlist, 1):
+        current_info = token_infos.get(token['contract_address'].lower())
+        if current_info:
+            current_price = float(current_info.get('priceUsd', 0))
+            initial_price = float(token.get('initial_price') or current_price)
+            
+            if initial_price > 0:
+                change = ((current_price - initial_price) / initial_price) * 100
+                change_emoji = "📈" if change >= 0 else "📉"
+            else:
+                change = 0
+                change_emoji = "➖"
+            
+            message += (
+                f"*{i}. {token['name']}* (${token['symbol']})\n"
+                f"   💰 Price: ${format_number(current_price)}\n"
+                f"   {change_emoji} Change: {change:+.2f}%\n"
+                f"   🔗 Chain: {(token.get('chain') or 'Unknown').upper()}\n\n"
+            )
+        elif updating:
+            message += (
+                f"*{i}. {token['name']}* (${token['symbol']})\n"
+                f"   ⏳ Fetching price...\n\n"
+            )
+        else:
+            message += (
+                f"*{i}. {token['name']}* (${token['symbol']})\n"
+                f"   ⚠️ Unable to fetch current price\n\n"
+            )
+    
+    return message
+
+
+def build_alert_message(alert: dict) -> str:
+    """Render the notification text for a triggered alert."""
+    direction_emoji = "📈" if alert['direction'] == "up" else "📉"
+    
+    # Set when the target was crossed between polls and the price has moved back since
+    trigger_price = alert.get('trigger_price')
+    reached = ""
+    if trigger_price is not None and trigger_price != alert['current_price']:
+        reached = f"⚡ *Reached:* ${format_number(trigger_price)}\n"
+    
+    return (
+        f"🚨 *PRICE ALERT TRIGGERED!* 🚨\n\n"
+        f"🪙 *{alert['token_name']}* (${alert['token_symbol']})\n\n"
+        f"💰 *Current Price:* ${format_number(alert['current_price'])}\n"
+        f"{reached}"
+        f"📍 *Entry Price:* ${format_number(alert['initial_price'])}\n"
+        f"{direction_emoji} *Change:* {alert['actual_change']:+.2f}%\n"
+        f"🎯 *Target:* {alert['direction'].upper()} {alert['percent']:.1f}%\n\n"
+        f"_Alert has been removed. Set a new one if needed!_"
+    )
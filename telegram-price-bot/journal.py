@@ -0,0 +1,156 @@
+import json
+import os
+import time
+import logging
+from typing import Dict, Iterator, Optional, Any
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+
+class Journal:
+    """Append-only log of JSON mutation records, one record per line.
+    
+    Records are written and flushed to the OS on every append, but only
+    fsync'd once ``fsync_batch`` records are pending or ``sync()`` is called,
+    so many small mutations share the cost of one disk flush.
+    """
+    
+    def __init__(self, path: str, fsync_batch: int = 64):
+        self.path = path
+        self.fsync_batch = fsync_batch
+        self.lock = Lock()
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._file = open(self.path, 'a', encoding='utf-8')
+    
+    @property
+    def size(self) -> int:
+        """Current journal size in bytes."""
+        with self.lock:
+            return self._file.tell()
+    
+    def append(self, record: Dict[str, Any]) -> None:
+        """
+        Append a mutation record to the journal.
+        
+        Args:
+            record: JSON-serializable mutation record
+        """
+        line = json.dumps(record, separators=(',', ':'), default=str) + '\n'
+        with self.lock:
+            self._file.write(line)
+            self._file.flush()
+            self._pending += 1
+            if self._pending >= self.fsync_batch:
+                self._sync_locked()
+    
+    def sync(self) -> None:
+        """Flush pending records to stable storage."""
+        with self.lock:
+            if self._pending:
+                self._sync_locked()
+    
+    def seconds_since_sync(self) -> float:
+        """Seconds since pending records were last fsync'd."""
+        return time.monotonic() - self._last_sync
+    
+    def _sync_locked(self) -> None:
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._last_sync = time.monotonic()
+    
+    def rotate(self, rotated_path: str) -> None:
+        """
+        Move the current journal aside and start an empty one.
+        
+        If a previously rotated journal is still there (its compaction never
+        finished), the current records are appended to it instead.
+        
+        Args:
+            rotated_path: Path the current journal is renamed to
+        """
+        with self.lock:
+            self._sync_locked()
+            self._file.close()
+            if os.path.exists(rotated_path):
+                with open(self.path, 'r', encoding='utf-8') as src, \
+                        open(rotated_path, 'a', encoding='utf-8') as dst:
+                    dst.write(src.read())
+                    dst.flush()
+                    os.fsync(dst.fileno())
+                self._file = open(self.path, 'w', encoding='utf-8')
+            else:
+                os.replace(self.path, rotated_path)
+                self._file = open(self.path, 'a', encoding='utf-8')
+    
+    def close(self) -> None:
+        """Sync and close the journal file."""
+        with self.lock:
+            if not self._file.closed:
+                self._sync_locked()
+                self._file.close()
+    
+    @staticmethod
+    def replay(path: str) -> Iterator[Dict[str, Any]]:
+        """
+        Read back the records of a journal file.
+        
+        A torn final line (crash mid-append) is skipped; a corrupt record
+        anywhere else stops the replay, since later records may depend on it.
+        
+        Args:
+            path: Journal file path
+            
+        Yields:
+            Mutation records in write order
+        """
+        if not os.path.exists(path):
+            return
+        
+        with open(path, 'r', encoding='utf-8') as f:
+            lines = f.readlines()
+        
+        for i, line in enumerate(lines):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                if i == len(lines) - 1:
+                    logger.warning(f"Skipping torn record at end of {path}")
+                else:
+                    logger.error(f"Corrupt record at line {i + 1} of {path}, stopping replay")
+                return
+
+
+def atomic_write_json(file_path: str, data: Any, serialized: Optional[str] = None) -> None:
+    """
+    Atomically replace a JSON file (temp file + fsync + rename).
+    
+    Args:
+        file_path: Destination path
+        data: JSON-serializable data (ignored if ``serialized`` is given)
+        serialized: Pre-serialized JSON text
+    """
+    if serialized is None:
+        serialized = json.dumps(data, separators=(',', ':'), default=str)
+    
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(serialized)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, file_path)
+    
+    # Persist the rename itself
+    try:
+        dir_fd = os.open(os.path.dirname(file_path) or '.', os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(dir_fd)
+    except OSError:
+        pass
+    finally:
+        os.close(dir_fd)
@@ -0,0 +1,240 @@
+import time
+import logging
+from contextlib import contextmanager
+from threading import Lock
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class _Metric:
+    """Base for a metric family with optional labels.
+    
+    Values are kept per label-value tuple; updates take a lock since the
+    database thread records metrics too.
+    """
+    
+    kind = 'untyped'
+    
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        self.name = name
+        self.help = help_text
+        self.label_names = labels
+        self.lock = Lock()
+    
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.label_names)
+    
+    def _label_text(self, key: Tuple[str, ...], extra: str = '') -> str:
+        pairs = [f'{name}="{value}"' for name, value in zip(self.label_names, key)]
+        if extra:
+            pairs.append(extra)
+        return '{' + ','.join(pairs) + '}' if pairs else ''
+    
+    def render(self) -> List[str]:
+        raise NotImplementedError
+    
+    def summarize(self) -> List[str]:
+        """Short human-readable lines (for the admin /metrics command)."""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing count."""
+    
+    kind = 'counter'
+    
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = ()):
+        super().__init__(name, help_text, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+    
+    def inc(self, amount: float = 1, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self._values[key] = self._values.get(key, 0) + amount
+    
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+    
+    def total(self) -> float:
+        return sum(self._values.values())
+    
+    def render(self) -> List[str]:
+        with self.lock:
+            return [f"{self.name}{self._label_text(key)} {value:g}" for key, value in self._values.items()]
+    
+    def summarize(self) -> List[str]:
+        return self.render()
+
+
+class Gauge(Counter):
+    """Value that can go up and down."""
+    
+    kind = 'gauge'
+    
+    def set(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        with self.lock:
+            self._values[key] = value
+
+
+class Histogram(_Metric):
+    """Distribution of observed values in cumulative buckets, plus max."""
+    
+    kind = 'histogram'
+    
+    def __init__(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> [bucket counts..., count, sum, max]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+    
+    def observe(self, value: float, **labels) -> None:
+        key = self._key(labels)
+        n = len(self.buckets)
+        with self.lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * n + [0, 0.0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+            series[n] += 1
+            series[n + 1] += value
+            series[n + 2] = max(series[n + 2], value)
+    
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        """Observe the duration of a ``with`` block in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+    
+    def stats(self, **labels) -> Optional[Dict[str, float]]:
+        """Count, mean and max of one label combination (None if unobserved)."""
+        series = self._values.get(self._key(labels))
+        if not series:
+            return None
+        n = len(self.buckets)
+        count, total, maximum = series[n], series[n + 1], series[n + 2]
+        return {'count': count, 'mean': total / count if count else 0.0, 'max': maximum}
+    
+    def summarize(self) -> List[str]:
+        n = len(self.buckets)
+        with self.lock:
+            return [
+                f"{self.name}{self._label_text(key)} n={series[n]:g} "
+                f"mean={series[n + 1] / series[n] if series[n] else 0:.4f} max={series[n + 2]:.4f}"
+                for key, series in self._values.items()
+            ]
+    
+    def render(self) -> List[str]:
+        lines = []
+        n = len(self.buckets)
+        with self.lock:
+            for key, series in self._values.items():
+                for bound, count in zip(self.buckets, series):
+                    le = 'le="%g"' % bound
+                    lines.append(f"{self.name}_bucket{self._label_text(key, le)} {count:g}")
+                le = 'le="+Inf"'
+                lines.append(f"{self.name}_bucket{self._label_text(key, le)} {series[n]:g}")
+                lines.append(f"{self.name}_count{self._label_text(key)} {series[n]:g}")
+                lines.append(f"{self.name}_sum{self._label_text(key)} {series[n + 1]:g}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in Prometheus text format."""
+    
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], None]] = []
+    
+    def _register(self, metric: _Metric) -> _Metric:
+        existing = self._metrics.get(metric.name)
+        if existing is not None:
+            return existing
+        self._metrics[metric.name] = metric
+        return metric
+    
+    def counter(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Counter:
+        return self._register(Counter(name, help_text, labels))
+    
+    def gauge(self, name: str, help_text: str, labels: Tuple[str, ...] = ()) -> Gauge:
+        return self._register(Gauge(name, help_text, labels))
+    
+    def histogram(self, name: str, help_text: str, labels: Tuple[str, ...] = (), buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, labels, buckets))
+    
+    def get(self, name: str) -> Optional[_Metric]:
+        return self._metrics.get(name)
+    
+    def add_collector(self, collect: Callable[[], None]) -> None:
+        """Run ``collect`` before every render or summary, e.g. to set gauges from counters a component keeps itself."""
+        self._collectors.append(collect)
+    
+    def _collect(self) -> None:
+        for collect in self._collectors:
+            try:
+                collect()
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {e}")
+    
+    def render(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        self._collect()
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+    
+    def summary(self) -> str:
+        """Compact summary: counter values and histogram count/mean/max."""
+        self._collect()
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.summarize())
+        return '\n'.join(lines)
+
+
+# Process-wide registry; modules register their metrics at import time
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+add_collector = REGISTRY.add_collector
+
+
+class MetricsServer:
+    """Serves ``REGISTRY`` at ``/metrics`` for Prometheus to scrape."""
+    
+    def __init__(self, port: int, host: str = '127.0.0.1', registry: Registry = REGISTRY):
+        self.port = port
+        self.host = host
+        self.registry = registry
+        self._runner: Optional[web.AppRunner] = None
+    
+    async def _handle(self, request: web.Request) -> web.Response:
+        return web.Response(text=self.registry.render(), content_type='text/plain', charset='utf-8',
+                            headers={'X-Content-Type-Options': 'nosniff'})
+    
+    async def start(self) -> None:
+        app = web.Application()
+        app.router.add_get('/metrics', self._handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        logger.info(f"Metrics available at http://{self.host}:{self.port}/metrics")
+    
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
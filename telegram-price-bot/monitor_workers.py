@@ -0,0 +1,274 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import queue
+import time
+from typing import Dict, List, Optional, Set, Any
+
+logger = logging.getLogger(__name__)
+
+# Workers re-read their shard from the shared store this often (seconds)
+RELOAD_INTERVAL = 15.0
+
+# A triggered alert the bot hasn't marked as triggered within this time
+# (e.g. its notification failed) is re-armed by its worker
+PENDING_TTL = 300.0
+
+
+class HashRing:
+    """Consistent-hash ring mapping contract addresses to shard numbers.
+    
+    Each shard owns ``replicas`` points on the ring, so changing the number
+    of shards only moves about 1/n of the addresses.
+    """
+    
+    def __init__(self, shard_count: int, replicas: int = 64):
+        self.shard_count = shard_count
+        points = sorted(
+            (self._hash(f"shard-{shard}-{replica}"), shard)
+            for shard in range(shard_count)
+            for replica in range(replicas)
+        )
+        self._keys = [point for point, _ in points]
+        self._shards = [shard for _, shard in points]
+    
+    @staticmethod
+    def _hash(key: str) -> int:
+        return int.from_bytes(hashlib.md5(key.encode('utf-8')).digest()[:8], 'big')
+    
+    def shard_for(self, address: str) -> int:
+        """Shard that owns a contract address."""
+        index = bisect.bisect(self._keys, self._hash(address.lower()))
+        return self._shards[index % len(self._shards)]
+
+
+class ShardView:
+    """The part of the shared store a worker's ``PriceMonitor`` sees.
+    
+    Only alerts of addresses owned by the shard are returned. Changes made
+    by the bot process can't be pushed across processes, so ``subscribe``
+    is a no-op and workers pick changes up by reloading.
+    """
+    
+    def __init__(self, database, ring: HashRing, shard: int):
+        self.database = database
+        self.ring = ring
+        self.shard = shard
+    
+    def owns(self, address: str) -> bool:
+        return self.ring.shard_for(address) == self.shard
+    
+    def get_active_alerts_by_address(self) -> Dict[str, List[Any]]:
+        return self.database.get_active_alerts_by_address(address_filter=self.owns)
+    
+    def subscribe(self, callback) -> None:
+        pass
+
+
+class LookupOnlyView:
+    """The store as the bot's ``PriceMonitor`` sees it when workers own every alert.
+    
+    The bot's monitor then only serves lookups (it's never ticked), so it
+    gets no alerts to index and no change notifications to keep up with.
+    """
+    
+    def get_active_alerts_by_address(self) -> Dict[str, List[Any]]:
+        return {}
+    
+    def subscribe(self, callback) -> None:
+        pass
+
+
+# ==================== WORKER PROCESS ====================
+
+def _reload(monitor, view: ShardView, pending: Dict[str, float], known: Set[str]) -> Set[str]:
+    """Reload the shard's alerts into the engine, skipping ones waiting on the bot."""
+    alerts_by_address = view.get_active_alerts_by_address()
+    active = {alert.id for alerts in alerts_by_address.values() for alert in alerts}
+    
+    # Forget pending alerts the bot has committed, and re-arm stale ones
+    now = time.monotonic()
+    for alert_id in list(pending):
+        if alert_id not in active or now - pending[alert_id] > PENDING_TTL:
+            del pending[alert_id]
+    
+    monitor.engine.load({
+        address: [alert for alert in alerts if alert.id not in pending]
+        for address, alerts in alerts_by_address.items()
+    })
+    
+    # Check new alerts against the current price right away
+    for address, alerts in alerts_by_address.items():
+        if any(alert.id not in known for alert in alerts):
+            monitor.feed.invalidate(address)
+    
+    return active
+
+
+async def _run_shard(shard: int, shard_count: int, db_path: str, results, stop, options: Dict[str, Any]) -> None:
+    from alert_engine import create_alert_engine
+    from price_history import PriceHistory
+    from price_monitor import PriceMonitor
+    from request_scheduler import RequestScheduler
+    from sqlite_database import SQLiteDatabase
+    from tick_scheduler import TickScheduler
+    
+    db = SQLiteDatabase(db_path)
+    view = ShardView(db, HashRing(shard_count), shard)
+    monitor = PriceMonitor(
+        view,
+        RequestScheduler(
+            max_concurrency=options['max_concurrency'],
+            rate_per_minute=options['rate_per_minute'],
+        ),
+        engine=create_alert_engine(options['engine']),
+        adaptive_polling=options['adaptive_polling'],
+        poll_interval=options['poll_interval'],
+        history=PriceHistory(options['history_dir'], retention=options['history_retention']) if options['history_dir'] else None,
+    )
+    ticks = TickScheduler(options['tick_interval'], options['tick_budget'])
+    
+    pending: Dict[str, float] = {}  # Triggered alert ID -> when it was sent to the bot
+    known = _reload(monitor, view, pending, set())
+    next_reload = time.monotonic() + RELOAD_INTERVAL
+    logger.info(f"Monitor shard {shard}/{shard_count} started with {len(monitor.engine)} alerts")
+    
+    try:
+        while not stop.is_set():
+            deadline = ticks.begin()
+            try:
+                if time.monotonic() >= next_reload:
+                    known = _reload(monitor, view, pending, known)
+                    next_reload = time.monotonic() + RELOAD_INTERVAL
+                
+                triggered = await monitor.check_alerts(deadline)
+                if triggered:
+                    sent_at = time.monotonic()
+                    for alert in triggered:
+                        pending[alert['id']] = sent_at
+                    results.put((shard, triggered))
+                
+            except Exception as e:
+                logger.error(f"Error in monitor shard {shard}: {e}")
+            
+            await ticks.wait(stop.is_set)
+    finally:
+        await monitor.close()
+        db.close()
+
+
+def worker_main(shard: int, shard_count: int, db_path: str, results, stop, options: Dict[str, Any]) -> None:
+    """Entry point of a monitor worker process."""
+    logging.basicConfig(
+        format=f'%(asctime)s - shard {shard} - %(name)s - %(levelname)s - %(message)s',
+        level=options.get('log_level', logging.INFO),
+    )
+    try:
+        asyncio.run(_run_shard(shard, shard_count, db_path, results, stop, options))
+    except KeyboardInterrupt:
+        pass
+
+
+# ==================== BOT SIDE ====================
+
+class ShardedMonitor:
+    """Runs the price monitor as a pool of worker processes.
+    
+    Each worker owns a consistent-hash shard of contract addresses. It reads
+    its alerts from the shared SQLite store, fetches prices, evaluates
+    alerts and puts triggered ones on a multiprocessing queue. The bot
+    process only delivers notifications and commits them. The DexScreener
+    rate limit is split evenly between workers. A worker that dies is
+    restarted.
+    """
+    
+    def __init__(
+        self,
+        shard_count: int,
+        db_path: str,
+        engine: str = 'heap',
+        poll_interval: float = 30.0,
+        adaptive_polling: bool = True,
+        tick_interval: float = 5.0,
+        tick_budget: float = 0.8,
+        rate_per_minute: float = 300,
+        max_concurrency: int = 10,
+        history_dir: Optional[str] = None,
+        history_retention: Optional[float] = None,
+    ):
+        self.shard_count = shard_count
+        self.db_path = db_path
+        self.options = {
+            'engine': engine,
+            'poll_interval': poll_interval,
+            'adaptive_polling': adaptive_polling,
+            'tick_interval': tick_interval,
+            'tick_budget': tick_budget,
+            'rate_per_minute': rate_per_minute / shard_count,
+            'max_concurrency': max(1, max_concurrency // shard_count),
+            'history_dir': history_dir,
+            'history_retention': history_retention,
+            'log_level': logging.getLogger().getEffectiveLevel(),
+        }
+        
+        self._ctx = multiprocessing.get_context('spawn')
+        self.results = self._ctx.Queue()
+        self._stop = self._ctx.Event()
+        self._processes: List[Optional[multiprocessing.Process]] = [None] * shard_count
+    
+    def start(self) -> None:
+        """Start every worker."""
+        for shard in range(self.shard_count):
+            self._start_worker(shard)
+    
+    def _start_worker(self, shard: int) -> None:
+        process = self._ctx.Process(
+            target=worker_main,
+            args=(shard, self.shard_count, self.db_path, self.results, self._stop, self.options),
+            name=f"monitor-shard-{shard}",
+            daemon=True,
+        )
+        process.start()
+        self._processes[shard] = process
+    
+    def _restart_dead_workers(self) -> None:
+        for shard, process in enumerate(self._processes):
+            if process is not None and not process.is_alive() and not self._stop.is_set():
+                logger.warning(f"Monitor shard {shard} exited with code {process.exitcode}, restarting")
+                self._start_worker(shard)
+    
+    def _drain(self, timeout: float) -> List[Dict]:
+        triggered = []
+        try:
+            _, alerts = self.results.get(timeout=timeout)
+            triggered.extend(alerts)
+            while True:
+                _, alerts = self.results.get_nowait()
+                triggered.extend(alerts)
+        except queue.Empty:
+            pass
+        return triggered
+    
+    async def get_triggered(self, timeout: float = 1.0) -> List[Dict]:
+        """
+        Wait up to ``timeout`` seconds for triggered alerts from the workers.
+        
+        Returns:
+            Triggered alert dictionaries (possibly empty)
+        """
+        self._restart_dead_workers()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self._drain, timeout)
+    
+    def stop(self, timeout: float = 10.0) -> None:
+        """Ask the workers to exit and wait for them."""
+        self._stop.set()
+        for process in self._processes:
+            if process is None:
+                continue
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+                process.join(1.0)
@@ -0,0 +1,188 @@
+import asyncio
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Any
+
+from telegram.error import RetryAfter, TimedOut, NetworkError, Forbidden, BadRequest
+
+from request_scheduler import TokenBucket
+import metrics
+
+logger = logging.getLogger(__name__)
+
+SEND_SECONDS = metrics.histogram('notification_send_seconds', 'Telegram send_message latency')
+NOTIFICATIONS = metrics.counter('notifications_total', 'Notification outcomes', ('result',))
+QUEUE_DEPTH = metrics.gauge('notification_queue_depth', 'Alerts waiting to be delivered')
+
+# Telegram's documented bot limits: ~30 messages/s overall, ~1 message/s per chat
+GLOBAL_MESSAGES_PER_SECOND = 25
+PER_CHAT_INTERVAL = 1.0
+
+
+def _seconds(retry_after) -> float:
+    """RetryAfter.retry_after is an int or a timedelta depending on the PTB version."""
+    return retry_after.total_seconds() if hasattr(retry_after, 'total_seconds') else float(retry_after)
+
+
+class NotificationDispatcher:
+    """Concurrent, rate-limited delivery of triggered alerts.
+    
+    Triggered alerts are queued and sent by a pool of worker tasks. A shared
+    token bucket keeps the bot under Telegram's global limit and per-chat
+    reservations space messages to the same chat. ``RetryAfter`` pauses
+    every worker for the requested time before retrying; timeouts and
+    network errors are retried with backoff. A message Telegram rejects
+    (usually Markdown it can't parse) is resent once as plain text.
+    
+    Alerts that were delivered, or can never be (bot blocked, chat gone,
+    a message rejected even as plain text), are collected and handed back
+    by ``drain_completed()`` so the caller can commit their triggered state
+    in one batch per tick. Alerts still hitting flood control or network
+    errors after all retries go to ``on_undelivered`` to be re-armed.
+    """
+    
+    def __init__(
+        self,
+        bot,
+        render: Callable[[Dict[str, Any]], str],
+        on_undelivered: Optional[Callable[[Dict[str, Any]], None]] = None,
+        workers: int = 8,
+        messages_per_second: float = GLOBAL_MESSAGES_PER_SECOND,
+        per_chat_interval: float = PER_CHAT_INTERVAL,
+        max_retries: int = 3,
+    ):
+        self.bot = bot
+        self.render = render
+        self.on_undelivered = on_undelivered
+        self.worker_count = workers
+        self.per_chat_interval = per_chat_interval
+        self.max_retries = max_retries
+        
+        self.bucket = TokenBucket(messages_per_second, capacity=messages_per_second)
+        self.queue: asyncio.Queue = asyncio.Queue()
+        self._workers: List[asyncio.Task] = []
+        self._chat_next_slot: Dict[int, float] = {}
+        self._paused_until = 0.0
+        self._completed: List[str] = []
+        
+        # Counters
+        self.sent = 0
+        self.failed = 0
+        self.retried = 0
+    
+    def start(self) -> None:
+        """Start the worker pool."""
+        if not self._workers:
+            self._workers = [
+                asyncio.create_task(self._worker(), name=f"notifier-{i}")
+                for i in range(self.worker_count)
+            ]
+    
+    async def stop(self) -> None:
+        """Cancel the worker pool."""
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+    
+    def submit(self, alerts: List[Dict[str, Any]]) -> None:
+        """Queue triggered alerts for delivery."""
+        for alert in alerts:
+            self.queue.put_nowait(alert)
+        QUEUE_DEPTH.set(self.queue.qsize())
+    
+    def drain_completed(self) -> List[str]:
+        """Return (and forget) the IDs of alerts that are done since the last call."""
+        completed, self._completed = self._completed, []
+        return completed
+    
+    async def join(self) -> None:
+        """Wait until every queued alert has been handled."""
+        await self.queue.join()
+    
+    async def _worker(self) -> None:
+        while True:
+            alert = await self.queue.get()
+            try:
+                await self._deliver(alert)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Unexpected error delivering alert {alert.get('id')}: {e}")
+            finally:
+                self.queue.task_done()
+                QUEUE_DEPTH.set(self.queue.qsize())
+    
+    async def _deliver(self, alert: Dict[str, Any]) -> None:
+        chat_id = alert['user_id']
+        text = self.render(alert)
+        parse_mode = 'Markdown'
+        
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.retried += 1
+                NOTIFICATIONS.inc(result='retried')
+            
+            await self._wait_for_slot(chat_id)
+            
+            try:
+                with SEND_SECONDS.time():
+                    await self.bot.send_message(chat_id=chat_id, text=text, parse_mode=parse_mode)
+                self.sent += 1
+                NOTIFICATIONS.inc(result='sent')
+                self._completed.append(alert['id'])
+                return
+                
+            except RetryAfter as e:
+                # Flood control applies to the whole bot: pause every worker
+                delay = _seconds(e.retry_after)
+                self._paused_until = max(self._paused_until, time.monotonic() + delay)
+                logger.warning(f"Telegram flood control: pausing notifications for {delay:.0f}s")
+                
+            except Forbidden as e:
+                # Blocked bot, kicked from the chat: retrying won't help
+                logger.warning(f"Dropping alert {alert['id']} for user {chat_id}: {e}")
+                self.failed += 1
+                NOTIFICATIONS.inc(result='dropped')
+                self._completed.append(alert['id'])
+                return
+                
+            except BadRequest as e:
+                if parse_mode is None:
+                    # Chat not found, message too long, ...: retrying won't help
+                    logger.warning(f"Dropping alert {alert['id']} for user {chat_id}: {e}")
+                    self.failed += 1
+                    NOTIFICATIONS.inc(result='dropped')
+                    self._completed.append(alert['id'])
+                    return
+                # Usually Markdown Telegram can't parse (e.g. a '_' in a symbol)
+                logger.warning(f"Resending alert {alert['id']} as plain text: {e}")
+                parse_mode = None
+                
+            except (TimedOut, NetworkError) as e:
+                logger.warning(f"Error sending alert to user {chat_id} (attempt {attempt + 1}): {e}")
+                await asyncio.sleep(min(30, 2 ** attempt))
+        
+        logger.error(f"Giving up on alert {alert['id']} for user {chat_id} after {self.max_retries + 1} attempts")
+        self.failed += 1
+        NOTIFICATIONS.inc(result='undelivered')
+        if self.on_undelivered:
+            self.on_undelivered(alert)
+    
+    async def _wait_for_slot(self, chat_id: int) -> None:
+        """Wait for flood-control pauses, the per-chat spacing and the global bucket."""
+        pause = self._paused_until - time.monotonic()
+        if pause > 0:
+            await asyncio.sleep(pause)
+        
+        # Reserve the chat's next slot before sleeping so concurrent workers queue up behind it
+        now = time.monotonic()
+        slot = max(now, self._chat_next_slot.get(chat_id, 0.0))
+        self._chat_next_slot[chat_id] = slot + self.per_chat_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+        
+        if len(self._chat_next_slot) > 10_000:
+            self._chat_next_slot = {c: t for c, t in self._chat_next_slot.items() if t > now}
+        
+        await self.bucket.acquire()
@@ -0,0 +1,137 @@
+import time
+import weakref
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+import metrics
+
+# Returned by PriceCache.get() when there is no fresh entry
+MISS = object()
+
+CACHE_ENTRIES = metrics.gauge('price_cache_entries', 'Entries held by each named cache', ('cache',))
+CACHE_EVENTS = metrics.gauge(
+    'price_cache_events', 'Hits, negative hits, misses, evictions and expirations of each named cache', ('cache', 'event'),
+)
+
+
+class PriceCache:
+    """Bounded LRU cache with monotonic-clock TTLs and negative caching.
+    
+    Entries expire ``ttl`` seconds after they are stored. "Not found"
+    results can be stored with ``set_missing()``; they are returned as
+    ``None`` for the shorter ``negative_ttl`` so invalid addresses don't hit
+    the API on every request. When full, the least recently used entry is
+    evicted.
+    
+    A cache given a ``name`` has its ``stats()`` exported as gauges
+    whenever metrics are rendered; the lookups themselves stay plain
+    attribute increments.
+    """
+    
+    def __init__(self, max_entries: int = 10_000, ttl: float = 30, negative_ttl: float = 10, name: Optional[str] = None):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        
+        # Counters
+        self.hits = 0
+        self.negative_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        
+        if name is not None:
+            _named_caches.add(self)
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+    
+    def get(self, key: Hashable) -> Any:
+        """
+        Look up a fresh entry.
+        
+        Args:
+            key: Cache key
+            
+        Returns:
+            The cached value, None for a cached "not found", or ``MISS``
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return MISS
+        
+        value, expires_at = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return MISS
+        
+        self._entries.move_to_end(key)
+        if value is None:
+            self.negative_hits += 1
+        else:
+            self.hits += 1
+        return value
+    
+    def peek(self, key: Hashable) -> Optional[Any]:
+        """Return an entry's value even if expired, without touching stats or LRU order."""
+        entry = self._entries.get(key)
+        return entry[0] if entry else None
+    
+    def ttl_remaining(self, key: Hashable) -> Optional[float]:
+        """Seconds until an entry expires (negative if expired), or None if absent."""
+        entry = self._entries.get(key)
+        return entry[1] - time.monotonic() if entry else None
+    
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value for ``ttl`` seconds (defaults to the cache TTL)."""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+        
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def set_missing(self, key: Hashable) -> None:
+        """Remember that a key has no value, for ``negative_ttl`` seconds."""
+        self.set(key, None, ttl=self.negative_ttl)
+    
+    def delete(self, key: Hashable) -> None:
+        """Drop an entry."""
+        self._entries.pop(key, None)
+    
+    def clear(self) -> None:
+        """Drop all entries."""
+        self._entries.clear()
+    
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss/eviction counters and current size."""
+        return {
+            'size': len(self._entries),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'negative_hits': self.negative_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+        }
+
+
+# Caches exported by _export_stats (dropped once garbage collected)
+_named_caches: "weakref.WeakSet[PriceCache]" = weakref.WeakSet()
+
+
+def _export_stats() -> None:
+    for cache in list(_named_caches):
+        stats = cache.stats()
+        CACHE_ENTRIES.set(stats['size'], cache=cache.name)
+        for event in ('hits', 'negative_hits', 'misses', 'evictions', 'expirations'):
+            CACHE_EVENTS.set(stats[event], cache=cache.name, event=event)
+
+
+metrics.add_collector(_export_stats)
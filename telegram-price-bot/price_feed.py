@@ -0,0 +1,401 @@
+import time
+import asyncio
+import logging
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple, Any
+from threading import Lock
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_POLL_INTERVAL = 30.0
+
+# Adaptive polling bounds (seconds)
+MIN_POLL_INTERVAL = 5.0
+MAX_POLL_INTERVAL = 300.0
+
+
+class TokenState:
+    """Last-seen price and polling schedule of one tracked token."""
+    
+    __slots__ = (
+        'address', 'price', 'previous_price', 'updated_at', 'checked_at', 'next_poll', 'volatility',
+        'low', 'high', 'evaluated_at',
+    )
+    
+    def __init__(self, address: str):
+        self.address = address
+        self.price: Optional[float] = None
+        self.previous_price: Optional[float] = None
+        self.updated_at: Optional[float] = None  # Wall clock of the last price change
+        self.checked_at: Optional[float] = None  # Wall clock of the last successful fetch
+        self.next_poll = time.monotonic()  # Due immediately
+        self.volatility = 0.0  # Recent absolute price change, % per minute
+        # Price range observed since alerts were last evaluated against the token
+        self.low: Optional[float] = None
+        self.high: Optional[float] = None
+        self.evaluated_at: Optional[float] = None  # Wall clock
+
+
+def _volatility(token_info: Dict[str, Any], state: TokenState, price: float, now: float) -> float:
+    """Estimate recent volatility in % per minute from DexScreener's changes and our own observations."""
+    rates = []
+    for field, minutes in (('priceChange5m', 5), ('priceChange1h', 60)):
+        try:
+            rates.append(abs(float(token_info.get(field) or 0)) / minutes)
+        except (TypeError, ValueError):
+            pass
+    
+    if state.price and state.checked_at and now > state.checked_at:
+        rates.append(abs(price / state.price - 1) * 100 / ((now - state.checked_at) / 60))
+    
+    return max(rates, default=0.0)
+
+
+class AdaptivePollPolicy:
+    """Per-token poll intervals from volatility and distance to the nearest alert.
+    
+    A token's base interval is a fraction (``safety``) of the time its
+    recent volatility would take to cover the distance to its nearest
+    trigger, clamped to ``[min_interval, max_interval]``. Base intervals are
+    then scaled by a common factor so the whole schedule costs the same
+    number of token lookups per second as polling every token once per
+    ``budget_interval`` - hot tokens get checked every few seconds and
+    dormant ones every few minutes for the same API budget.
+    """
+    
+    def __init__(
+        self,
+        distances: Callable[[Dict[str, float]], Dict[str, float]],
+        min_interval: float = MIN_POLL_INTERVAL,
+        max_interval: float = MAX_POLL_INTERVAL,
+        budget_interval: float = DEFAULT_POLL_INTERVAL,
+        safety: float = 0.5,
+    ):
+        self.distances = distances
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget_interval = budget_interval
+        self.safety = safety
+        self._base: Dict[str, float] = {}
+        self._demand = 0.0  # Sum of 1/base interval: lookups per second
+    
+    def update(self, states: List[TokenState]) -> None:
+        """Recompute the base interval of freshly polled tokens."""
+        distances = self.distances({s.address: s.price for s in states if s.price})
+        
+        for state in states:
+            distance = distances.get(state.address)
+            if distance is None or state.volatility <= 0:
+                base = self.max_interval
+            else:
+                eta = distance * 100 / state.volatility * 60
+                base = min(self.max_interval, max(self.min_interval, self.safety * eta))
+            
+            previous = self._base.get(state.address)
+            self._demand += 1 / base - (1 / previous if previous else 0.0)
+            self._base[state.address] = base
+    
+    def forget(self, address: str) -> None:
+        """Drop a token that is no longer tracked."""
+        base = self._base.pop(address, None)
+        if base is not None:
+            self._demand -= 1 / base
+    
+    def interval(self, address: str) -> Optional[float]:
+        """Scheduled interval of a token, or None if it hasn't been polled yet."""
+        base = self._base.get(address)
+        if base is None:
+            return None
+        
+        # Scale everything so total lookups/s match the fixed-interval budget
+        capacity = len(self._base) / self.budget_interval
+        scale = self._demand / capacity if capacity and self._demand > 0 else 1.0
+        return max(self.min_interval, base * scale)
+
+
+class PriceFeed:
+    """Polls tracked tokens and publishes price changes to subscribers.
+    
+    The set of tracked tokens is the union of the registered sources (e.g.
+    the alert engine's addresses), re-read on every poll. Each token has its
+    own poll interval and only tokens that are due are fetched. Subscribers
+    receive ``{address: price}`` for the tokens whose price actually changed,
+    so a token that hasn't moved causes no downstream work.
+    
+    ``invalidate()`` forces a token to be fetched and published on the next
+    poll even if its price is unchanged, e.g. when a new alert for it has
+    to be evaluated against the current price.
+    
+    With a ``policy`` (see ``AdaptivePollPolicy``) intervals adapt per
+    token. Due tokens are batched, and a batch with room left is topped
+    up with the tokens due soonest so no request goes out half empty.
+    
+    ``poll()`` can be given a deadline. Each batch is published as soon as
+    it arrives; batches still outstanding at the deadline keep running and
+    are carried over, ahead of everything else, into the next poll.
+    """
+    
+    def __init__(
+        self,
+        monitor,
+        default_interval: float = DEFAULT_POLL_INTERVAL,
+        policy: Optional[AdaptivePollPolicy] = None,
+        batch_size: int = 30,
+    ):
+        self.monitor = monitor
+        self.default_interval = default_interval
+        self.policy = policy
+        self.batch_size = batch_size
+        self._tokens: Dict[str, TokenState] = {}
+        self._intervals: Dict[str, float] = {}
+        self._sources: List[Callable[[], Iterable[str]]] = []
+        self._subscribers: List[Callable[[Dict[str, float]], Any]] = []
+        self.last_poll_size = 0  # Tokens fetched by the last poll
+        self.last_carried = 0  # Tokens the last poll left outstanding at its deadline
+        
+        # Batches that missed a poll's deadline: task -> (addresses, dirty addresses)
+        self._outstanding: Dict[asyncio.Future, Tuple[List[str], Set[str]]] = {}
+        
+        # Invalidations can come from the database thread
+        self._dirty_lock = Lock()
+        self._dirty: Set[str] = set()
+    
+    def __len__(self) -> int:
+        return len(self._tokens)
+    
+    # ==================== WIRING ====================
+    
+    def add_source(self, source: Callable[[], Iterable[str]]) -> None:
+        """Register a callable returning addresses that should be tracked."""
+        self._sources.append(source)
+    
+    def subscribe(self, callback: Callable[[Dict[str, float]], Any]) -> None:
+        """
+        Register a change listener.
+        
+        Args:
+            callback: Called (or awaited, if a coroutine function) with a
+                dict mapping lowercased address to its new price
+        """
+        self._subscribers.append(callback)
+    
+    # ==================== SCHEDULE ====================
+    
+    def interval(self, address: str) -> float:
+        """Poll interval of a token in seconds."""
+        key = address.lower()
+        if key in self._intervals:
+            return self._intervals[key]
+        if self.policy is not None:
+            interval = self.policy.interval(key)
+            if interval is not None:
+                return interval
+        return self.default_interval
+    
+    def set_interval(self, address: str, interval: Optional[float]) -> None:
+        """
+        Set a token's poll interval (None restores the default).
+        
+        A shorter interval takes effect immediately rather than after the
+        currently scheduled poll.
+        """
+        key = address.lower()
+        if interval is None:
+            self._intervals.pop(key, None)
+            return
+        
+        self._intervals[key] = interval
+        state = self._tokens.get(key)
+        if state is not None and state.checked_at is not None:
+            state.next_poll = min(state.next_poll, time.monotonic() + interval)
+    
+    def invalidate(self, address: str) -> None:
+        """Fetch and publish a token on the next poll, changed or not."""
+        with self._dirty_lock:
+            self._dirty.add(address.lower())
+    
+    def seconds_until_due(self) -> Optional[float]:
+        """Seconds until the next token is due (0 if overdue), or None if nothing is tracked."""
+        self._sync_tracked()
+        with self._dirty_lock:
+            if self._dirty:
+                return 0.0
+        if self._outstanding and any(task.done() for task in self._outstanding):
+            return 0.0
+        
+        in_flight = self._in_flight()
+        next_polls = [s.next_poll for a, s in self._tokens.items() if a not in in_flight]
+        if not next_polls:
+            return None
+        return max(0.0, min(next_polls) - time.monotonic())
+    
+    # ==================== STATE ====================
+    
+    def get(self, address: str) -> Optional[TokenState]:
+        """Tracking state of a token, if it's tracked."""
+        return self._tokens.get(address.lower())
+    
+    def last_price(self, address: str) -> Optional[float]:
+        """Last price seen for a token."""
+        state = self._tokens.get(address.lower())
+        return state.price if state else None
+    
+    def _sync_tracked(self) -> None:
+        """Start tracking new source addresses and forget dropped ones."""
+        wanted: Set[str] = set()
+        for source in self._sources:
+            wanted.update(address.lower() for address in source())
+        
+        for address in wanted - self._tokens.keys():
+            self._tokens[address] = TokenState(address)
+        for address in self._tokens.keys() - wanted:
+            del self._tokens[address]
+            if self.policy is not None:
+                self.policy.forget(address)
+    
+    # ==================== POLLING ====================
+    
+    def _in_flight(self) -> Set[str]:
+        """Addresses in batches carried over from an earlier poll."""
+        return {a for addresses, _ in self._outstanding.values() for a in addresses}
+    
+    async def poll(self, deadline: Optional[float] = None) -> Dict[str, float]:
+        """
+        Fetch every due token and publish the ones whose price changed.
+        
+        Batches carried over from the last poll are handled first, then
+        the due tokens go out with invalidated ones and the most overdue
+        first. Each batch is published as soon as its response arrives, so
+        a slow lookup only holds back its own batch.
+        
+        Args:
+            deadline: ``time.monotonic()`` time to stop waiting at (None
+                waits for every batch); batches still outstanding then are
+                carried over to the next poll
+                
+        Returns:
+            Dict mapping lowercased address to new price, for changed tokens
+        """
+        self._sync_tracked()
+        
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        
+        in_flight = self._in_flight()
+        now = time.monotonic()
+        due = [
+            a for a, s in self._tokens.items()
+            if (s.next_poll <= now or a in dirty) and a not in in_flight
+        ]
+        # A dirty token that's already in flight is published when its batch lands
+        for addresses, batch_dirty in self._outstanding.values():
+            batch_dirty.update(a for a in addresses if a in dirty)
+        
+        if due:
+            due.sort(key=lambda a: (a not in dirty, self._tokens[a].next_poll))
+            
+            # Fill the last batch with the tokens due soonest
+            room = -len(due) % self.batch_size
+            if room:
+                due_set = set(due)
+                upcoming = sorted(
+                    (s.next_poll, a) for a, s in self._tokens.items()
+                    if a not in due_set and a not in in_flight
+                )
+                due.extend(a for _, a in upcoming[:room])
+        self.last_poll_size = len(due)
+        
+        # Carried-over batches first, then the new ones in priority order
+        batches = dict(self._outstanding)
+        self._outstanding = {}
+        for i in range(0, len(due), self.batch_size):
+            batch = due[i:i + self.batch_size]
+            # Bypass the cache: intervals can be shorter than its TTL
+            task = asyncio.ensure_future(self.monitor.get_tokens_info(batch, refresh=True))
+            batches[task] = (batch, {a for a in batch if a in dirty})
+        
+        changes: Dict[str, float] = {}
+        pending = list(batches)
+        while pending:
+            for task in [t for t in pending if t.done()]:
+                pending.remove(task)
+                changes.update(await self._apply_batch(task, *batches[task]))
+            if not pending:
+                break
+            
+            timeout = None if deadline is None else deadline - time.monotonic()
+            if timeout is not None and timeout <= 0:
+                break
+            await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        
+        self._outstanding = {task: batches[task] for task in pending}
+        self.last_carried = sum(len(addresses) for addresses, _ in self._outstanding.values())
+        if self.last_carried:
+            logger.warning(f"Price poll deadline passed with {self.last_carried} tokens outstanding, carrying them over")
+        
+        return changes
+    
+    async def _apply_batch(self, task: asyncio.Future, addresses: List[str], dirty: Set[str]) -> Dict[str, float]:
+        """Publish one finished batch and schedule its tokens' next polls."""
+        try:
+            infos = task.result()
+        except Exception as e:
+            logger.error(f"Price feed batch of {len(addresses)} failed: {e}")
+            infos = {}
+        
+        wall_now = time.time()
+        changes: Dict[str, float] = {}
+        polled: List[TokenState] = []
+        priced: List[TokenState] = []
+        for address in addresses:
+            state = self._tokens.get(address)
+            if state is None:
+                continue
+            
+            token_info = infos.get(address)
+            try:
+                price = float(token_info.get('priceUsd', 0)) if token_info else None
+            except (ValueError, TypeError):
+                price = None
+            if not price:
+                # Lookup failed or token gone: keep the last known price
+                polled.append(state)
+                continue
+            
+            state.volatility = _volatility(token_info, state, price, wall_now)
+            state.checked_at = wall_now
+            polled.append(state)
+            priced.append(state)
+            if price != state.price or address in dirty:
+                if price != state.price:
+                    state.previous_price = state.price
+                    state.price = price
+                    state.updated_at = wall_now
+                changes[address] = price
+        
+        if changes:
+            await self._publish(changes)
+        
+        # Schedule after publishing so alerts that just fired don't count
+        if self.policy is not None:
+            self.policy.update(priced)
+        
+        now = time.monotonic()
+        for state in polled:
+            state.next_poll = now + self.interval(state.address)
+        
+        return changes
+    
+    def cancel(self) -> None:
+        """Cancel batches carried over from the last poll (on shutdown)."""
+        for task in self._outstanding:
+            task.cancel()
+        self._outstanding = {}
+    
+    async def _publish(self, changes: Dict[str, float]) -> None:
+        for callback in self._subscribers:
+            try:
+                result = callback(changes)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Price feed subscriber {callback!r} failed: {e}")
@@ -0,0 +1,433 @@
+import os
+import re
+import mmap
+import time
+import hashlib
+import logging
+import struct
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from threading import RLock, Thread
+
+try:
+    import fcntl
+except ImportError:  # Not on Windows; only needed when processes share the store
+    fcntl = None
+
+try:
+    import resource
+except ImportError:  # Not on Windows; only needed to raise the open file limit
+    resource = None
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+SAMPLES_RECORDED = metrics.counter('price_history_samples_total', 'Price samples appended to the history store')
+FILES_EXPIRED = metrics.counter('price_history_files_expired_total', 'History files deleted after going unwritten')
+
+# Raw samples kept per token
+DEFAULT_SAMPLE_CAPACITY = 720
+
+# OHLC rollups: bucket width (seconds) -> buckets kept (12 hours, 2 days, 30 days)
+DEFAULT_ROLLUPS = {60: 720, 300: 576, 3600: 720}
+
+# File layout: header, ring table, then one ring buffer per series
+_MAGIC = b'PHST'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHH')      # magic, version, ring count
+_RING = struct.Struct('<IIII')        # bucket width (0 = raw samples), capacity, next slot, count
+_SAMPLE = struct.Struct('<dd')        # time, price
+_BUCKET = struct.Struct('<qdddd')     # bucket start, open, high, low, close
+_DATA_OFFSET = 128
+
+_SAFE_NAME = re.compile(r'^[0-9A-Za-z]{1,64}$')
+
+# Files not written for this long are deleted (seconds)
+DEFAULT_RETENTION = 7 * 86400
+EXPIRE_INTERVAL = 3600
+
+# File descriptors left for sockets, databases and logs when sizing the open file LRU
+_RESERVED_FDS = 256
+
+
+def _fd_budget(wanted: int) -> int:
+    """How many of ``wanted`` files can be kept open, raising the soft descriptor limit if allowed."""
+    if resource is None:
+        return wanted
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    needed = wanted + _RESERVED_FDS
+    if soft != resource.RLIM_INFINITY and soft < needed:
+        target = needed if hard == resource.RLIM_INFINITY else min(needed, hard)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            soft = target
+        except (ValueError, OSError) as e:
+            logger.warning(f"Can't raise the open file limit to {target}: {e}")
+    if soft == resource.RLIM_INFINITY:
+        return wanted
+    return min(wanted, soft - _RESERVED_FDS)
+
+
+class _Series:
+    """One token's history file: a ring of raw samples plus one ring per rollup.
+    
+    Every ring has a fixed capacity, so the file never grows and appending
+    a sample is O(1): it writes one sample record and updates (or starts)
+    the current bucket of each rollup in place.
+    """
+    
+    def __init__(self, path: str, sample_capacity: int, rollups: Dict[int, int]):
+        self.path = path
+        # Never truncate: another process may have the file mapped already
+        self._file = os.fdopen(os.open(path, os.O_RDWR | os.O_CREAT, 0o644), 'r+b')
+        
+        # Whoever takes the lock first lays a new file out; the others find it done
+        with self._locked(exclusive=True):
+            if os.fstat(self._file.fileno()).st_size < _DATA_OFFSET:
+                layout = [(0, sample_capacity)] + sorted(rollups.items())
+                size = _DATA_OFFSET + sum(
+                    capacity * (_SAMPLE.size if width == 0 else _BUCKET.size) for width, capacity in layout
+                )
+                self._file.truncate(size)
+                header = _HEADER.pack(_MAGIC, _VERSION, len(layout))
+                header += b''.join(_RING.pack(width, capacity, 0, 0) for width, capacity in layout)
+                self._file.seek(0)
+                self._file.write(header)
+                self._file.flush()
+        
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        magic, version, ring_count = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC or version != _VERSION:
+            self.close()
+            raise ValueError(f"{path} is not a version {_VERSION} price history file")
+        
+        # Existing files keep the layout they were created with
+        self.rings: List[Tuple[int, int, int]] = []  # (bucket width, capacity, data offset)
+        offset = _DATA_OFFSET
+        for i in range(ring_count):
+            width, capacity, _, _ = _RING.unpack_from(self._map, _HEADER.size + i * _RING.size)
+            self.rings.append((width, capacity, offset))
+            offset += capacity * (_SAMPLE.size if width == 0 else _BUCKET.size)
+    
+    def _state(self, ring: int) -> Tuple[int, int]:
+        _, _, next_slot, count = _RING.unpack_from(self._map, _HEADER.size + ring * _RING.size)
+        return next_slot, count
+    
+    def _set_state(self, ring: int, next_slot: int, count: int) -> None:
+        width, capacity, _ = self.rings[ring]
+        _RING.pack_into(self._map, _HEADER.size + ring * _RING.size, width, capacity, next_slot, count)
+    
+    def _last(self, ring: int, record: struct.Struct) -> Optional[Tuple]:
+        _, capacity, offset = self.rings[ring]
+        next_slot, count = self._state(ring)
+        if not count:
+            return None
+        return record.unpack_from(self._map, offset + ((next_slot - 1) % capacity) * record.size)
+    
+    @contextmanager
+    def _locked(self, exclusive: bool) -> Iterator[None]:
+        """Hold the file lock: shard worker processes may share the file with the bot."""
+        if fcntl is None:
+            yield
+            return
+        fcntl.flock(self._file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+    
+    def _push(self, ring: int, record: struct.Struct, *values) -> None:
+        _, capacity, offset = self.rings[ring]
+        next_slot, count = self._state(ring)
+        record.pack_into(self._map, offset + next_slot * record.size, *values)
+        self._set_state(ring, (next_slot + 1) % capacity, min(count + 1, capacity))
+    
+    def append(self, t: float, price: float) -> bool:
+        """Record a sample; samples not newer than the last one are ignored."""
+        with self._locked(exclusive=True):
+            last = self._last(0, _SAMPLE)
+            if last is not None and t <= last[0]:
+                return False
+            self._push(0, _SAMPLE, t, price)
+            
+            for ring, (width, _, offset) in enumerate(self.rings[1:], 1):
+                start = int(t // width * width)
+                bucket = self._last(ring, _BUCKET)
+                if bucket is not None and bucket[0] == start:
+                    next_slot, _ = self._state(ring)
+                    slot = (next_slot - 1) % self.rings[ring][1]
+                    _, open_, high, low, _ = bucket
+                    _BUCKET.pack_into(
+                        self._map, offset + slot * _BUCKET.size,
+                        start, open_, max(high, price), min(low, price), price,
+                    )
+                elif bucket is None or start > bucket[0]:
+                    self._push(ring, _BUCKET, start, price, price, price, price)
+            return True
+    
+    def read(self, ring: int, since: Optional[float]) -> List[Tuple]:
+        """Records of a ring in time order, starting at ``since``."""
+        width, capacity, offset = self.rings[ring]
+        record = _SAMPLE if width == 0 else _BUCKET
+        
+        records = []
+        with self._locked(exclusive=False):
+            next_slot, count = self._state(ring)
+            for i in range(count):
+                slot = (next_slot - count + i) % capacity
+                values = record.unpack_from(self._map, offset + slot * record.size)
+                # A bucket is included if any part of it is at or after ``since``
+                if since is None or values[0] + width >= since:
+                    records.append(values)
+        return records
+    
+    def price_range(self, since: float) -> Optional[Tuple[float, float]]:
+        """Lowest and highest raw sample newer than ``since`` (scans back from the newest)."""
+        _, capacity, offset = self.rings[0]
+        
+        low = high = None
+        with self._locked(exclusive=False):
+            next_slot, count = self._state(0)
+            for i in range(1, count + 1):
+                t, price = _SAMPLE.unpack_from(self._map, offset + ((next_slot - i) % capacity) * _SAMPLE.size)
+                if t <= since:
+                    break
+                if low is None:
+                    low = high = price
+                else:
+                    low = min(low, price)
+                    high = max(high, price)
+        return None if low is None else (low, high)
+    
+    def flush(self) -> None:
+        self._map.flush()
+    
+    def close(self) -> None:
+        if not self._map.closed:
+            self._map.close()
+        self._file.close()
+
+
+class PriceHistory:
+    """Per-token price history on disk, with OHLC rollups.
+    
+    Each token gets a fixed-size memory-mapped file (``<directory>/<address>.bin``)
+    holding a ring of raw ``(time, price)`` samples and a ring of
+    ``(start, open, high, low, close)`` buckets per rollup width. Recording
+    a sample is O(1) - no file is ever rewritten - and retention is just the
+    ring capacity: the oldest samples and buckets are overwritten.
+    
+    Open files are kept in an LRU. ``resize`` grows it to the number of
+    tracked tokens (as far as the open file limit allows), so a tick doesn't
+    reopen and remap every file. Files no process has written for
+    ``retention`` seconds are deleted in the background.
+    """
+    
+    def __init__(
+        self,
+        directory: str,
+        sample_capacity: int = DEFAULT_SAMPLE_CAPACITY,
+        rollups: Optional[Dict[int, int]] = None,
+        max_open: int = 128,
+        retention: Optional[float] = DEFAULT_RETENTION,
+    ):
+        self.directory = directory
+        self.sample_capacity = sample_capacity
+        self.rollups = dict(DEFAULT_ROLLUPS if rollups is None else rollups)
+        self.min_open = self.max_open = max_open
+        self.retention = retention
+        self.lock = RLock()
+        self._open: "OrderedDict[str, _Series]" = OrderedDict()
+        self._open_paths: Set[str] = set()
+        self._next_expiry = time.monotonic()
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, address: str) -> str:
+        key = address.lower()
+        if not _SAFE_NAME.match(key):
+            key = hashlib.sha1(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{key}.bin")
+    
+    def _series(self, address: str, create: bool) -> Optional[_Series]:
+        key = address.lower()
+        series = self._open.get(key)
+        if series is not None:
+            self._open.move_to_end(key)
+            return series
+        
+        path = self._path(key)
+        if not create and not os.path.exists(path):
+            return None
+        try:
+            series = _Series(path, self.sample_capacity, self.rollups)
+        except (OSError, ValueError) as e:
+            logger.error(f"Can't open price history for {address}: {e}")
+            return None
+        
+        self._open[key] = series
+        self._open_paths.add(series.path)
+        self._evict_locked()
+        return series
+    
+    def _evict_locked(self) -> None:
+        while len(self._open) > self.max_open:
+            _, evicted = self._open.popitem(last=False)
+            self._open_paths.discard(evicted.path)
+            evicted.close()
+    
+    def resize(self, tracked: int) -> None:
+        """
+        Size the open file LRU for the number of tokens being tracked.
+        
+        Grows to ``tracked`` plus some slack (raising the process's open
+        file limit if needed and allowed), and shrinks once the token count
+        halves; never below ``max_open`` given at construction.
+        
+        Args:
+            tracked: Tokens whose prices are recorded every poll
+        """
+        wanted = max(self.min_open, tracked + tracked // 4)
+        if wanted > self.max_open:
+            budget = _fd_budget(wanted)
+            if budget < wanted:
+                logger.warning(f"Open file limit allows {budget} of {wanted} price history files to stay open")
+            wanted = max(self.min_open, budget)
+        elif wanted > self.max_open // 2:
+            return
+        
+        with self.lock:
+            if wanted != self.max_open:
+                self.max_open = wanted
+                self._evict_locked()
+    
+    def expire(self, max_age: float) -> int:
+        """
+        Delete the files of tokens nothing has recorded for a while.
+        
+        Files this instance has open are kept; ones other processes still
+        write are kept by their modification time.
+        
+        Args:
+            max_age: Seconds since a file was last written
+            
+        Returns:
+            Number of files deleted
+        """
+        cutoff = time.time() - max_age
+        removed = 0
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.name.endswith('.bin'):
+                    continue
+                try:
+                    if entry.stat().st_mtime >= cutoff:
+                        continue
+                    with self.lock:
+                        if entry.path in self._open_paths:
+                            continue
+                        os.remove(entry.path)
+                except FileNotFoundError:
+                    # Another process expired it first
+                    continue
+                removed += 1
+        
+        if removed:
+            FILES_EXPIRED.inc(removed)
+            logger.info(f"Deleted {removed} price history files not written for {max_age / 86400:.0f} days")
+        return removed
+    
+    def _expire_in_background(self) -> None:
+        try:
+            self.expire(self.retention)
+        except Exception as e:
+            logger.error(f"Price history expiry failed: {e}")
+    
+    def _ring(self, series: _Series, width: int) -> int:
+        for ring, (ring_width, _, _) in enumerate(series.rings):
+            if ring_width == width:
+                return ring
+        raise ValueError(f"No {width}s rollup (have {sorted(w for w, _, _ in series.rings if w)})")
+    
+    def record(self, address: str, price: float, t: Optional[float] = None) -> bool:
+        """
+        Append a price sample for a token.
+        
+        Args:
+            address: Token contract address
+            price: Price in USD
+            t: Sample time (epoch seconds, defaults to now)
+            
+        Returns:
+            True if recorded (samples older than the last one are dropped)
+        """
+        if not price or price != price:
+            return False
+        with self.lock:
+            series = self._series(address, create=True)
+            if series is None or not series.append(time.time() if t is None else t, float(price)):
+                return False
+            
+            run_expiry = bool(self.retention) and time.monotonic() >= self._next_expiry
+            if run_expiry:
+                self._next_expiry = time.monotonic() + EXPIRE_INTERVAL
+        
+        if run_expiry:
+            Thread(target=self._expire_in_background, name='price-history-expiry', daemon=True).start()
+        SAMPLES_RECORDED.inc()
+        return True
+    
+    def samples(self, address: str, since: Optional[float] = None) -> List[Tuple[float, float]]:
+        """Raw ``(time, price)`` samples of a token, oldest first."""
+        with self.lock:
+            series = self._series(address, create=False)
+            return series.read(0, since) if series else []
+    
+    def ohlc(self, address: str, width: int, since: Optional[float] = None) -> List[Tuple[int, float, float, float, float]]:
+        """
+        OHLC buckets of a token, oldest first.
+        
+        Args:
+            address: Token contract address
+            width: Bucket width in seconds (one of the configured rollups)
+            since: Only buckets that end after this time (epoch seconds)
+            
+        Returns:
+            List of ``(bucket start, open, high, low, close)``
+        """
+        with self.lock:
+            series = self._series(address, create=False)
+            return series.read(self._ring(series, width), since) if series else []
+    
+    def price_range(self, address: str, since: float) -> Optional[Tuple[float, float]]:
+        """
+        Lowest and highest recorded price of a token after a point in time.
+        
+        Only reads back as far as ``since``, so it's cheap for recent windows.
+        
+        Args:
+            address: Token contract address
+            since: Epoch seconds (exclusive)
+            
+        Returns:
+            ``(low, high)``, or None if nothing was recorded since then
+        """
+        with self.lock:
+            series = self._series(address, create=False)
+            return series.price_range(since) if series else None
+    
+    def flush(self) -> None:
+        """Flush open files to disk."""
+        with self.lock:
+            for series in self._open.values():
+                series.flush()
+    
+    def close(self) -> None:
+        """Flush and close every open file."""
+        with self.lock:
+            for series in self._open.values():
+                series.flush()
+                series.close()
+            self._open.clear()
+            self._open_paths.clear()
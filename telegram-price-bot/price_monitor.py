@@ -1,22 +1,92 @@
+import os
+import time
 import aiohttp
 import asyncio
 import logging
-from typing import Optional, Dict, List, Any
-from datetime import datetime
+from typing import Optional, Dict, List, Tuple, Any
+
+from alert_engine import AlertEngine
+from price_cache import PriceCache, MISS
+from price_feed import PriceFeed, AdaptivePollPolicy, DEFAULT_POLL_INTERVAL
+from request_scheduler import RequestScheduler, request_priority, PRIORITY_MONITOR
+import metrics
 
 logger = logging.getLogger(__name__)
 
-DEXSCREENER_API_BASE = "https://api.dexscreener.com/latest"
+TOKEN_LOOKUPS = metrics.counter('token_lookups_total', 'Token info lookups by outcome', ('result',))
+TOKEN_SEARCHES = metrics.counter('token_searches_total', 'Token searches by where they were answered', ('source',))
+FALLBACK_SEARCHES = metrics.counter('dexscreener_fallback_searches_total', 'Pair searches after /dex/tokens found nothing')
+TICK_SECONDS = metrics.histogram('alert_tick_seconds', 'check_alerts duration')
+TICK_TOKENS = metrics.counter('alert_tick_tokens_total', 'Tokens fetched and tokens whose price changed per tick', ('stage',))
+ALERTS_TRIGGERED = metrics.counter('alerts_triggered_total', 'Alerts triggered')
+ALERTS_ACTIVE = metrics.gauge('alerts_active', 'Alerts in the trigger index')
+
+# Overridable to point the bot at a stand-in server (see benchmarks/fake_dexscreener.py)
+DEXSCREENER_API_BASE = os.getenv('DEXSCREENER_API_BASE', "https://api.dexscreener.com/latest")
+
+# Maximum number of addresses DexScreener accepts in one /dex/tokens request
+TOKENS_PER_REQUEST = 30
+
+# Tokens asked for with keep_warm (e.g. by /portfolio) are refreshed in the
+# background for this long afterwards (seconds), up to this many tokens
+KEEP_WARM_TTL = 600
+KEEP_WARM_MAX_TOKENS = 5_000
+
+# DexScreener price change windows (field, seconds); the change gives the price that long ago
+PRICE_CHANGE_WINDOWS = (('priceChange5m', 300), ('priceChange1h', 3600))
+
+# Maximum number of token search results
+SEARCH_LIMIT = 20
+
+
+class DexScreenerUnavailable(Exception):
+    """DexScreener kept answering 429/5xx after the scheduler's retries."""
 
 
 class PriceMonitor:
     """Monitor cryptocurrency prices using DexScreener API."""
     
-    def __init__(self, database):
+    def __init__(
+        self,
+        database,
+        scheduler: Optional[RequestScheduler] = None,
+        engine: Optional[AlertEngine] = None,
+        adaptive_polling: bool = True,
+        poll_interval: float = DEFAULT_POLL_INTERVAL,
+        history=None,
+        token_index=None,
+    ):
         self.db = database
         self.session: Optional[aiohttp.ClientSession] = None
-        self.price_cache: Dict[str, Dict] = {}
-        self.cache_ttl = 30  # Cache TTL in seconds
+        self.scheduler = scheduler or RequestScheduler()
+        # Token info by lowercased address; "not found" is cached briefly too
+        self.price_cache = PriceCache(max_entries=10_000, ttl=30, negative_ttl=10, name='token_info')
+        # Lowercased address -> True while someone has recently asked for it with keep_warm
+        self.keep_warm = PriceCache(max_entries=KEEP_WARM_MAX_TOKENS, ttl=KEEP_WARM_TTL, name='keep_warm')
+        # Every fetched price is also appended to the history store (price_history.PriceHistory)
+        self.history = history
+        # Metadata of every looked-up token, for local search (token_index.TokenIndex)
+        self.token_index = token_index
+        
+        # Lookups in flight, keyed by lowercased address (single-flight)
+        self._inflight: Dict[str, asyncio.Future] = {}
+        
+        # Trigger index over active alerts, kept in sync with the database
+        self.engine = engine or AlertEngine()
+        self.engine.load(self.db.get_active_alerts_by_address())
+        self.db.subscribe(self._on_db_event)
+        
+        # Alerted tokens are polled by the price feed; only changes get evaluated
+        # (adaptive intervals spend the same lookup budget as a fixed poll_interval)
+        policy = AdaptivePollPolicy(self.engine.trigger_distances, budget_interval=poll_interval) if adaptive_polling else None
+        self.feed = PriceFeed(self, default_interval=poll_interval, policy=policy, batch_size=TOKENS_PER_REQUEST)
+        self.feed.add_source(self.engine.addresses)
+        self.feed.subscribe(self._on_price_changes)
+        self._triggered: List[Dict] = []
+        
+        # Alerted tokens seen at a new price outside the feed's published
+        # changes (other lookups, unchanged polls with a wick): address -> price
+        self._observed: Dict[str, float] = {}
     
     async def get_session(self) -> aiohttp.ClientSession:
         """Get or create aiohttp session."""
@@ -25,9 +95,24 @@ class PriceMonitor:
         return self.session
     
     async def close(self):
-        """Close the aiohttp session."""
+        """Close the aiohttp session and the price history."""
+        self.feed.cancel()
         if self.session and not self.session.closed:
             await self.session.close()
+        if self.history is not None:
+            self.history.close()
+        if self.token_index is not None:
+            self.token_index.close()
+    
+    async def _get_json(self, url: str, endpoint: str = 'other') -> Optional[Any]:
+        """GET a DexScreener URL through the shared request scheduler."""
+        session = await self.get_session()
+        status, data = await self.scheduler.get_json(
+            session, url, timeout=aiohttp.ClientTimeout(total=15), endpoint=endpoint,
+        )
+        if status == 429 or status >= 500:
+            raise DexScreenerUnavailable(f"HTTP {status}")
+        return data if status == 200 else None
     
     async def get_token_info(self, contract_address: str) -> Optional[Dict[str, Any]]:
         """
@@ -41,55 +126,50 @@ class PriceMonitor:
         """
         # Check cache first
         cache_key = contract_address.lower()
-        if cache_key in self.price_cache:
-            cached = self.price_cache[cache_key]
-            if (datetime.now() - cached['timestamp']).seconds < self.cache_ttl:
-                return cached['data']
+        cached = self.price_cache.get(cache_key)
+        if cached is not MISS:
+            TOKEN_LOOKUPS.inc(result='cache_hit' if cached is not None else 'negative_hit')
+            return cached
+        
+        # Join a lookup of the same token that's already in flight
+        inflight = self._inflight.get(cache_key)
+        if inflight is None:
+            TOKEN_LOOKUPS.inc(result='fetched')
+            inflight = asyncio.ensure_future(self._fetch_token_info(contract_address))
+            self._track_inflight(cache_key, inflight)
+        else:
+            TOKEN_LOOKUPS.inc(result='joined')
+        
+        # Shielded so a cancelled caller doesn't cancel the shared lookup
+        return await asyncio.shield(inflight)
+    
+    def _track_inflight(self, cache_key: str, future: asyncio.Future) -> None:
+        """Register an in-flight lookup and drop it once it completes."""
+        self._inflight[cache_key] = future
+        
+        def _done(fut: asyncio.Future) -> None:
+            if self._inflight.get(cache_key) is fut:
+                del self._inflight[cache_key]
+        
+        future.add_done_callback(_done)
+    
+    async def _fetch_token_info(self, contract_address: str) -> Optional[Dict[str, Any]]:
+        """Look a token up via /dex/tokens, falling back to the pair search."""
+        cache_key = contract_address.lower()
         
         try:
-            session = await self.get_session()
-            
             # Try token search endpoint
-            url = f"{DEXSCREENER_API_BASE}/dex/tokens/{contract_address}"
+            data = await self._get_json(f"{DEXSCREENER_API_BASE}/dex/tokens/{contract_address}", 'tokens')
             
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    if data and 'pairs' in data and data['pairs']:
-                        # Get the pair with highest liquidity
-                        pairs = data['pairs']
-                        best_pair = max(pairs, key=lambda x: float(x.get('liquidity', {}).get('usd', 0) or 0))
-                        
-                        token_info = self._parse_pair_data(best_pair, contract_address)
-                        
-                        # Cache the result
-                        self.price_cache[cache_key] = {
-                            'data': token_info,
-                            'timestamp': datetime.now()
-                        }
-                        
-                        return token_info
+            if data and 'pairs' in data and data['pairs']:
+                # Get the pair with highest liquidity
+                best_pair = self._best_pair(data['pairs'])
+                token_info = self._parse_pair_data(best_pair, contract_address)
+                self._cache_token_info(cache_key, token_info)
+                return token_info
             
             # If not found by token, try searching by pair address
-            url = f"{DEXSCREENER_API_BASE}/dex/pairs/search?q={contract_address}"
-            
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    if data and 'pairs' in data and data['pairs']:
-                        best_pair = data['pairs'][0]
-                        token_info = self._parse_pair_data(best_pair, contract_address)
-                        
-                        self.price_cache[cache_key] = {
-                            'data': token_info,
-                            'timestamp': datetime.now()
-                        }
-                        
-                        return token_info
-            
-            return None
+            return await self._search_pair(contract_address)
             
         except asyncio.TimeoutError:
             logger.error(f"Timeout fetching token info for {contract_address}")
@@ -98,6 +178,180 @@ class PriceMonitor:
             logger.error(f"Error fetching token info for {contract_address}: {e}")
             return None
     
+    async def get_tokens_info(
+        self,
+        contract_addresses: List[str],
+        refresh: bool = False,
+        keep_warm: bool = False,
+    ) -> Dict[str, Optional[Dict[str, Any]]]:
+        """
+        Fetch token information for many tokens with batched requests.
+        
+        Up to ``TOKENS_PER_REQUEST`` addresses are packed into each
+        ``/dex/tokens/{a,b,c,...}`` request. The returned pairs are split back
+        per address and the highest-liquidity pair is picked for each, exactly
+        as ``get_token_info`` does. Addresses with no pairs fall back to the
+        pair search. Cached tokens are not requested at all, and tokens
+        already being looked up are joined rather than requested again.
+        
+        Args:
+            contract_addresses: Token contract addresses
+            refresh: Ignore cached entries (results are still cached)
+            keep_warm: A user is viewing these tokens; keep them fresh in
+                the cache for a while (see ``is_kept_warm``)
+                
+        Returns:
+            Dict mapping lowercased address to token info (or None if not found)
+        """
+        if keep_warm:
+            for address in contract_addresses:
+                self.keep_warm.set(address.lower(), True)
+        
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        to_fetch: Dict[str, str] = {}
+        joined: Dict[str, asyncio.Future] = {}
+        
+        for address in contract_addresses:
+            cache_key = address.lower()
+            if cache_key in results or cache_key in to_fetch or cache_key in joined:
+                continue
+            cached = MISS if refresh else self.price_cache.get(cache_key)
+            if cached is not MISS:
+                TOKEN_LOOKUPS.inc(result='cache_hit' if cached is not None else 'negative_hit')
+                results[cache_key] = cached
+            elif cache_key in self._inflight and not self._inflight[cache_key].done():
+                # (A finished lookup lingers until its done-callback runs)
+                TOKEN_LOOKUPS.inc(result='joined')
+                joined[cache_key] = self._inflight[cache_key]
+            else:
+                TOKEN_LOOKUPS.inc(result='fetched')
+                to_fetch[cache_key] = address
+        
+        # Publish a future per fetched token so concurrent lookups join the batch
+        loop = asyncio.get_running_loop()
+        futures = {cache_key: loop.create_future() for cache_key in to_fetch}
+        for cache_key, future in futures.items():
+            self._track_inflight(cache_key, future)
+        
+        try:
+            addresses = list(to_fetch.values())
+            batches = [addresses[i:i + TOKENS_PER_REQUEST] for i in range(0, len(addresses), TOKENS_PER_REQUEST)]
+            batch_results = await asyncio.gather(*(self._fetch_tokens_batch(batch) for batch in batches))
+            for batch_result in batch_results:
+                results.update(batch_result)
+        finally:
+            for cache_key, future in futures.items():
+                if not future.done():
+                    future.set_result(results.get(cache_key))
+        
+        for cache_key, future in joined.items():
+            results[cache_key] = await asyncio.shield(future)
+        
+        return results
+    
+    def is_kept_warm(self, address: str) -> bool:
+        """Whether a token was asked for with ``keep_warm`` in the last ``KEEP_WARM_TTL`` seconds."""
+        return (self.keep_warm.ttl_remaining(address.lower()) or 0) > 0
+    
+    async def get_cached_tokens_info(self, contract_addresses: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Last known token info from the cache, without any requests.
+        
+        Entries past their TTL are still returned (they're only stale);
+        tokens never looked up, or last seen as not found, are left out.
+        
+        Args:
+            contract_addresses: Token contract addresses
+            
+        Returns:
+            Dict mapping lowercased address to token info
+        """
+        known = {}
+        for address in contract_addresses:
+            token_info = self.price_cache.peek(address.lower())
+            if token_info is not None:
+                known[address.lower()] = token_info
+        return known
+    
+    async def _fetch_tokens_batch(self, addresses: List[str]) -> Dict[str, Optional[Dict[str, Any]]]:
+        """Look up one batch of addresses in a single /dex/tokens request."""
+        pairs_by_address: Dict[str, List[Dict]] = {address.lower(): [] for address in addresses}
+        batch_failed = False
+        
+        try:
+            data = await self._get_json(f"{DEXSCREENER_API_BASE}/dex/tokens/{','.join(addresses)}", 'tokens')
+            
+            # A pair belongs to every requested token on either side of it
+            for pair in (data or {}).get('pairs') or []:
+                for side in ('baseToken', 'quoteToken'):
+                    token_addr = (pair.get(side) or {}).get('address', '').lower()
+                    if token_addr in pairs_by_address:
+                        pairs_by_address[token_addr].append(pair)
+            
+        except asyncio.TimeoutError:
+            logger.error(f"Timeout fetching token batch of {len(addresses)}")
+            batch_failed = True
+        except Exception as e:
+            logger.error(f"Error fetching token batch of {len(addresses)}: {e}")
+            batch_failed = True
+        
+        results: Dict[str, Optional[Dict[str, Any]]] = {}
+        missing = []
+        for address in addresses:
+            cache_key = address.lower()
+            pairs = pairs_by_address[cache_key]
+            if pairs:
+                token_info = self._parse_pair_data(self._best_pair(pairs), address)
+                self._cache_token_info(cache_key, token_info)
+                results[cache_key] = token_info
+            elif batch_failed:
+                # Unknown rather than not found: don't fall back or cache
+                results[cache_key] = None
+            else:
+                missing.append(address)
+        
+        # Not found by token: fall back to the pair search like get_token_info
+        for address in missing:
+            try:
+                results[address.lower()] = await self._search_pair(address)
+            except Exception as e:
+                logger.error(f"Error searching pair for {address}: {e}")
+                results[address.lower()] = None
+        
+        return results
+    
+    async def _search_pair(self, contract_address: str) -> Optional[Dict[str, Any]]:
+        """Look a token up through the pair search endpoint."""
+        FALLBACK_SEARCHES.inc()
+        data = await self._get_json(f"{DEXSCREENER_API_BASE}/dex/pairs/search?q={contract_address}", 'pairs_search')
+        
+        if data and 'pairs' in data and data['pairs']:
+            best_pair = data['pairs'][0]
+            token_info = self._parse_pair_data(best_pair, contract_address)
+            self._cache_token_info(contract_address.lower(), token_info)
+            return token_info
+        
+        # Not found anywhere; remember that briefly
+        self.price_cache.set_missing(contract_address.lower())
+        return None
+    
+    @staticmethod
+    def _best_pair(pairs: List[Dict]) -> Dict:
+        """Pick the pair with the highest USD liquidity."""
+        return max(pairs, key=lambda x: float(x.get('liquidity', {}).get('usd', 0) or 0))
+    
+    def _cache_token_info(self, cache_key: str, token_info: Dict[str, Any]) -> None:
+        """Store token info in the price cache and record its price."""
+        self.price_cache.set(cache_key, token_info)
+        self._observe(cache_key, token_info)
+        if self.token_index is not None:
+            self.token_index.add(token_info)
+        if self.history is not None:
+            try:
+                self.history.record(cache_key, float(token_info.get('priceUsd', 0) or 0))
+            except Exception as e:
+                logger.error(f"Error recording price history for {cache_key}: {e}")
+    
     def _parse_pair_data(self, pair: Dict, contract_address: str) -> Dict[str, Any]:
         """Parse DexScreener pair data into a standardized format."""
         base_token = pair.get('baseToken', {})
@@ -153,70 +407,158 @@ class PriceMonitor:
                 return None
         return None
     
-    async def check_alerts(self) -> List[Dict]:
+    async def get_current_prices(self, contract_addresses: List[str], refresh: bool = False) -> Dict[str, Optional[float]]:
         """
-        Check all active alerts and return triggered ones.
+        Get current prices for many tokens using batched lookups.
         
+        Args:
+            contract_addresses: Token contract addresses
+            refresh: Ignore cached prices
+            
         Returns:
-            List of triggered alert dictionaries
+            Dict mapping lowercased address to price (or None if not found)
         """
-        triggered = []
-        active_alerts = self.db.get_all_active_alerts()
-        
-        # Group alerts by contract address to minimize API calls
-        alerts_by_address: Dict[str, List[Dict]] = {}
-        for alert in active_alerts:
-            addr = alert['contract_address'].lower()
-            if addr not in alerts_by_address:
-                alerts_by_address[addr] = []
-            alerts_by_address[addr].append(alert)
-        
-        # Check each unique token
-        for contract_address, alerts in alerts_by_address.items():
+        prices: Dict[str, Optional[float]] = {}
+        for address, token_info in (await self.get_tokens_info(contract_addresses, refresh=refresh)).items():
             try:
-                current_price = await self.get_current_price(contract_address)
-                
-                if current_price is None or current_price == 0:
-                    continue
-                
-                for alert in alerts:
-                    initial_price = float(alert['initial_price'])
-                    target_price = float(alert['target_price'])
-                    direction = alert['direction']
-                    
-                    if initial_price == 0:
-                        continue
-                    
-                    # Calculate actual change
-                    actual_change = ((current_price - initial_price) / initial_price) * 100
-                    
-                    is_triggered = False
-                    
-                    if direction == "up":
-                        # Check if price went up by target percentage
-                        if current_price >= target_price:
-                            is_triggered = True
-                    elif direction == "down":
-                        # Check if price went down by target percentage
-                        if current_price <= target_price:
-                            is_triggered = True
-                    elif direction == "any":
-                        # Check if price changed by threshold in either direction
-                        threshold = float(alert['percent'])
-                        if abs(actual_change) >= threshold:
-                            is_triggered = True
-                    
-                    if is_triggered:
-                        alert['current_price'] = current_price
-                        alert['actual_change'] = actual_change
-                        triggered.append(alert)
+                prices[address] = float(token_info.get('priceUsd', 0)) if token_info else None
+            except (ValueError, TypeError):
+                prices[address] = None
+        return prices
+    
+    async def check_alerts(self, deadline: Optional[float] = None) -> List[Dict]:
+        """
+        Check all active alerts and return triggered ones.
+        
+        Polls the tokens that are due through the price feed; only tokens
+        whose price changed are handed to the alert engine (see
+        ``AlertEngine`` and ``VectorAlertEngine``). Triggered alerts leave
+        the index; use ``restore_alert`` to put back one whose notification
+        failed.
+        
+        Args:
+            deadline: ``time.monotonic()`` time to stop waiting for lookups
+                at; tokens still outstanding are checked on the next call
                 
-            except Exception as e:
-                logger.error(f"Error checking alerts for {contract_address}: {e}")
-                continue
+        Returns:
+            List of triggered alert dictionaries
+        """
+        with TICK_SECONDS.time():
+            # User lookups go ahead of the feed's batches (see request_priority)
+            with request_priority(PRIORITY_MONITOR):
+                changes = await self.feed.poll(deadline)
+            if self.history is not None:
+                # Keep every tracked token's history file open
+                self.history.resize(len(self.feed))
+            
+            # Prices seen since the last tick that the feed didn't publish
+            if self._observed:
+                observed, self._observed = self._observed, {}
+                self._evaluate(observed)
         
+        triggered, self._triggered = self._triggered, []
+        TICK_TOKENS.inc(self.feed.last_poll_size, stage='fetched')
+        TICK_TOKENS.inc(len(changes), stage='changed')
+        TICK_TOKENS.inc(self.feed.last_carried, stage='carried')
+        ALERTS_TRIGGERED.inc(len(triggered))
+        ALERTS_ACTIVE.set(len(self.engine))
         return triggered
     
+    def _on_price_changes(self, changes: Dict[str, float]) -> None:
+        """Price feed listener: evaluate alerts of the tokens that moved."""
+        for address in changes:
+            self._observed.pop(address, None)
+        self._evaluate(changes)
+    
+    def _evaluate(self, prices: Dict[str, float]) -> None:
+        """Evaluate alerts against prices and the range each token covered since its last evaluation."""
+        try:
+            now = time.time()
+            ranges = {}
+            for address in prices:
+                price_range = self._take_range(address, now)
+                if price_range is not None:
+                    ranges[address] = price_range
+            self._triggered.extend(self.engine.evaluate_many(prices, ranges))
+        except Exception as e:
+            logger.error(f"Error checking alerts: {e}")
+    
+    def _observe(self, address: str, token_info: Dict[str, Any]) -> None:
+        """
+        Widen an alerted token's price range with a fetched price.
+        
+        Besides the spot price, DexScreener's 5m/1h changes give the price
+        at the start of those windows; it's included when that's after the
+        token's last evaluation. A wick between two polls is then still
+        caught.
+        """
+        state = self.feed.get(address)
+        if state is None:
+            return
+        try:
+            price = float(token_info.get('priceUsd', 0) or 0)
+        except (TypeError, ValueError):
+            return
+        if not price:
+            return
+        
+        points = [price]
+        if state.evaluated_at is not None:
+            now = time.time()
+            for field, seconds in PRICE_CHANGE_WINDOWS:
+                if now - seconds <= state.evaluated_at:
+                    continue
+                try:
+                    change = float(token_info.get(field) or 0)
+                except (TypeError, ValueError):
+                    continue
+                if change > -100:
+                    points.append(price / (1 + change / 100))
+        
+        # Nothing new to evaluate
+        if state.price is not None and all(point == state.price for point in points):
+            return
+        
+        low, high = min(points), max(points)
+        state.low = low if state.low is None else min(state.low, low)
+        state.high = high if state.high is None else max(state.high, high)
+        self._observed[address] = price
+    
+    def _take_range(self, address: str, now: float) -> Optional[Tuple[float, float, float]]:
+        """Take a token's ``(low, high, since)`` since its last evaluation and start a new one."""
+        state = self.feed.get(address)
+        if state is None:
+            return None
+        
+        since, low, high = state.evaluated_at, state.low, state.high
+        state.evaluated_at = now
+        state.low = state.high = None
+        if since is None:
+            return None
+        
+        # Prices other processes recorded in the shared history
+        if self.history is not None:
+            recorded = self.history.price_range(address, since)
+            if recorded is not None:
+                low = recorded[0] if low is None else min(low, recorded[0])
+                high = recorded[1] if high is None else max(high, recorded[1])
+        
+        if low is None:
+            return None
+        return low, high, since
+    
+    def _on_db_event(self, event: str, payload: Any) -> None:
+        """Database listener: keep the engine in sync and check new alerts right away."""
+        self.engine.on_db_event(event, payload)
+        if event == 'alert_added':
+            self.feed.invalidate(payload['contract_address'])
+    
+    def restore_alert(self, alert: Dict) -> None:
+        """Re-arm a triggered alert, e.g. when its notification couldn't be sent."""
+        self.engine.add({k: v for k, v in alert.items() if k not in ('current_price', 'trigger_price', 'actual_change')})
+        # Re-evaluate it on the next poll even if the price doesn't move
+        self.feed.invalidate(alert['contract_address'])
+    
     async def get_multiple_prices(self, addresses: List[str]) -> Dict[str, Optional[float]]:
         """
         Get prices for multiple tokens.
@@ -227,32 +569,20 @@ class PriceMonitor:
         Returns:
             Dict mapping address to price (or None if not found)
         """
-        results = {}
-        
-        # Process in batches to avoid rate limiting
-        batch_size = 5
-        for i in range(0, len(addresses), batch_size):
-            batch = addresses[i:i + batch_size]
-            
-            tasks = [self.get_current_price(addr) for addr in batch]
-            prices = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            for addr, price in zip(batch, prices):
-                if isinstance(price, Exception):
-                    results[addr] = None
-                else:
-                    results[addr] = price
-            
-            # Small delay between batches
-            if i + batch_size < len(addresses):
-                await asyncio.sleep(0.5)
-        
-        return results
+        # Batched lookups; pacing is handled by the request scheduler
+        prices = await self.get_current_prices(addresses)
+        return {addr: prices.get(addr.lower()) for addr in addresses}
     
     async def search_tokens(self, query: str) -> List[Dict]:
         """
         Search for tokens by name or symbol.
         
+        The local index answers on its own only when it has an exact address
+        or symbol match, or a full page of results (only their prices are
+        fetched, in one batch or from the cache). Otherwise DexScreener's
+        search is queried too and merged after the local matches; its
+        results are added to the index.
+        
         Args:
             query: Search query (token name or symbol)
             
@@ -260,33 +590,62 @@ class PriceMonitor:
             List of matching tokens
         """
         try:
-            session = await self.get_session()
-            url = f"{DEXSCREENER_API_BASE}/dex/search?q={query}"
+            matches = []
+            if self.token_index is not None:
+                matches = self.token_index.search(query, limit=SEARCH_LIMIT)
+                q = query.strip().lower().removeprefix('$')
+                exact = bool(matches) and q in (matches[0]['address'].lower(), str(matches[0].get('symbol') or '').lower())
+                if exact or len(matches) >= SEARCH_LIMIT:
+                    TOKEN_SEARCHES.inc(source='local')
+                    infos = await self.get_tokens_info([meta['address'] for meta in matches])
+                    return [infos[meta['address'].lower()] for meta in matches if infos.get(meta['address'].lower())]
             
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    if data and 'pairs' in data:
-                        results = []
-                        seen_tokens = set()
-                        
-                        for pair in data['pairs'][:20]:  # Limit to 20 results
-                            base_token = pair.get('baseToken', {})
-                            token_addr = base_token.get('address', '').lower()
-                            
-                            if token_addr and token_addr not in seen_tokens:
-                                seen_tokens.add(token_addr)
-                                results.append(self._parse_pair_data(pair, token_addr))
-                        
-                        return results
+            TOKEN_SEARCHES.inc(source='dexscreener')
+            data = await self._get_json(f"{DEXSCREENER_API_BASE}/dex/search?q={query}", 'search')
             
-            return []
+            # Lowercased address -> token info, in DexScreener's order
+            found: Dict[str, Dict[str, Any]] = {}
+            for pair in ((data or {}).get('pairs') or [])[:SEARCH_LIMIT]:
+                base_token = pair.get('baseToken', {})
+                token_addr = base_token.get('address', '').lower()
+                
+                if token_addr and token_addr not in found:
+                    found[token_addr] = self._parse_pair_data(pair, token_addr)
+            
+            if self.token_index is not None:
+                self.token_index.add_many(found.values())
+            
+            # Local matches keep their rank; only the ones DexScreener didn't return need a lookup
+            missing = [meta['address'] for meta in matches if meta['address'].lower() not in found]
+            infos = await self.get_tokens_info(missing) if missing else {}
+            
+            results = []
+            seen_tokens = set()
+            for address in [meta['address'].lower() for meta in matches] + list(found):
+                token_info = found.get(address) or infos.get(address)
+                if token_info and address not in seen_tokens:
+                    seen_tokens.add(address)
+                    results.append(token_info)
+            return results[:SEARCH_LIMIT]
             
         except Exception as e:
             logger.error(f"Error searching tokens: {e}")
             return []
     
+    async def resolve_symbol(self, symbol: str) -> Optional[str]:
+        """
+        Contract address of a token symbol, from the local index only.
+        
+        Args:
+            symbol: Token symbol (``$`` prefix optional)
+            
+        Returns:
+            Address of the most liquid known token with that symbol, or None
+        """
+        if self.token_index is None:
+            return None
+        return self.token_index.resolve_symbol(symbol)
+    
     async def get_trending_tokens(self, chain: str = None) -> List[Dict]:
         """
         Get trending tokens (by volume).
@@ -298,27 +657,23 @@ class PriceMonitor:
             List of trending tokens
         """
         try:
-            session = await self.get_session()
-            
             if chain:
                 url = f"{DEXSCREENER_API_BASE}/dex/pairs/{chain}"
             else:
                 # Search for popular tokens
                 url = f"{DEXSCREENER_API_BASE}/dex/search?q=PEPE"  # Example trending search
             
-            async with session.get(url, timeout=aiohttp.ClientTimeout(total=15)) as response:
-                if response.status == 200:
-                    data = await response.json()
-                    
-                    if data and 'pairs' in data:
-                        # Sort by volume
-                        pairs = sorted(
-                            data['pairs'],
-                            key=lambda x: float(x.get('volume', {}).get('h24', 0) or 0),
-                            reverse=True
-                        )[:10]
-                        
-                        return [self._parse_pair_data(p, p.get('baseToken', {}).get('address', '')) for p in pairs]
+            data = await self._get_json(url, 'trending')
+            
+            if data and 'pairs' in data:
+                # Sort by volume
+                pairs = sorted(
+                    data['pairs'],
+                    key=lambda x: float(x.get('volume', {}).get('h24', 0) or 0),
+                    reverse=True
+                )[:10]
+                
+                return [self._parse_pair_data(p, p.get('baseToken', {}).get('address', '')) for p in pairs]
             
             return []
             
@@ -0,0 +1,221 @@
+import asyncio
+import heapq
+import itertools
+import random
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, List, Optional, Any, Tuple
+
+import aiohttp
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+HTTP_SECONDS = metrics.histogram('dexscreener_http_seconds', 'DexScreener HTTP request latency per attempt', ('endpoint',))
+QUEUE_WAIT_SECONDS = metrics.histogram('dexscreener_queue_wait_seconds', 'Time requests wait for backoff, rate limit and concurrency slots')
+RESPONSES = metrics.counter('dexscreener_responses_total', 'DexScreener responses by HTTP status', ('status',))
+
+# DexScreener's published quota for the /latest/dex/* endpoints
+DEXSCREENER_RATE_LIMIT_PER_MINUTE = 300
+DEFAULT_MAX_CONCURRENCY = 10
+
+# Request priorities, most urgent first: user lookups, alert polling, cache warming
+PRIORITY_INTERACTIVE, PRIORITY_MONITOR, PRIORITY_BACKGROUND = range(3)
+
+# Priority of requests made from the current task (inherited by tasks it creates)
+_priority: ContextVar[int] = ContextVar('request_priority', default=PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def request_priority(priority: int) -> Iterator[None]:
+    """
+    Run the requests made inside the block (and tasks started there) at a priority.
+    
+    Args:
+        priority: ``PRIORITY_INTERACTIVE`` (the default), ``PRIORITY_MONITOR``
+            or ``PRIORITY_BACKGROUND``
+    """
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+class TokenBucket:
+    """Async token-bucket rate limiter with priority lanes.
+    
+    Waiters are served by priority, FIFO within a priority, so a user's
+    lookup doesn't queue behind a monitor sweep; ``rate`` can be lowered
+    and raised at runtime for adaptive throttling.
+    """
+    
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate  # Tokens per second
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        # Heap of [priority, seq, wake-up future]; the head waits for the refill
+        self._waiters: List[list] = []
+        self._seq = itertools.count()
+    
+    def __len__(self) -> int:
+        """Number of waiters."""
+        return len(self._waiters)
+    
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    async def acquire(self, priority: int = PRIORITY_INTERACTIVE) -> None:
+        """Wait until a token is available for this priority and take it."""
+        loop = asyncio.get_running_loop()
+        waiter = [priority, next(self._seq), loop.create_future()]
+        heapq.heappush(self._waiters, waiter)
+        try:
+            while True:
+                if self._waiters[0] is not waiter:
+                    # Woken when this waiter reaches the head
+                    await waiter[2]
+                    waiter[2] = loop.create_future()
+                    continue
+                
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+        finally:
+            if self._waiters[0] is waiter:
+                heapq.heappop(self._waiters)
+            else:
+                # Cancelled while queued
+                self._waiters.remove(waiter)
+                heapq.heapify(self._waiters)
+            if self._waiters and not self._waiters[0][2].done():
+                self._waiters[0][2].set_result(None)
+
+
+class RequestScheduler:
+    """Single funnel for every DexScreener HTTP request.
+    
+    Bounds the number of requests in flight with a semaphore, spaces them
+    with a token bucket matched to the API quota (served by priority, see
+    ``request_priority``), and backs off adaptively
+    on HTTP 429 and 5xx: a shared pause (honouring ``Retry-After``) that
+    grows with consecutive failures, plus a rate cut on 429 that recovers
+    gradually as requests succeed again.
+    """
+    
+    def __init__(
+        self,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        rate_per_minute: float = DEXSCREENER_RATE_LIMIT_PER_MINUTE,
+        max_retries: int = 3,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.base_rate = rate_per_minute / 60
+        self.min_rate = self.base_rate / 10
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        # Allow short bursts of up to a few seconds' worth of quota
+        self.bucket = TokenBucket(self.base_rate, capacity=max(1.0, self.base_rate * 5))
+        
+        self._backoff_until = 0.0
+        self._consecutive_failures = 0
+        
+        # Counters
+        self.requests = 0
+        self.throttled = 0
+        self.retries = 0
+    
+    async def get_json(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        timeout: Optional[aiohttp.ClientTimeout] = None,
+        endpoint: str = 'other',
+    ) -> Tuple[int, Optional[Any]]:
+        """
+        GET a URL through the scheduler.
+        
+        Args:
+            session: aiohttp session to use
+            url: Request URL
+            timeout: Per-attempt timeout
+            endpoint: Endpoint label for metrics
+            
+        Returns:
+            (HTTP status, parsed JSON body or None if the status wasn't 200)
+        """
+        status = 0
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                self.retries += 1
+            
+            queued_at = time.perf_counter()
+            await self._wait_for_backoff()
+            await self.bucket.acquire(_priority.get())
+            
+            async with self.semaphore:
+                self.requests += 1
+                started_at = time.perf_counter()
+                QUEUE_WAIT_SECONDS.observe(started_at - queued_at)
+                async with session.get(url, timeout=timeout) as response:
+                    status = response.status
+                    HTTP_SECONDS.observe(time.perf_counter() - started_at, endpoint=endpoint)
+                    RESPONSES.inc(status=status)
+                    
+                    if status == 429 or status >= 500:
+                        self._on_throttled(status, response.headers.get('Retry-After'))
+                        continue
+                    
+                    self._on_success()
+                    data = await response.json() if status == 200 else None
+                    return status, data
+        
+        logger.warning(f"Giving up on {url} after {self.max_retries + 1} attempts (HTTP {status})")
+        return status, None
+    
+    async def _wait_for_backoff(self) -> None:
+        delay = self._backoff_until - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+    
+    def _on_throttled(self, status: int, retry_after: Optional[str]) -> None:
+        """Pause all requests and, on 429, cut the request rate."""
+        self.throttled += 1
+        self._consecutive_failures += 1
+        
+        try:
+            delay = float(retry_after) if retry_after else None
+        except ValueError:
+            delay = None
+        if delay is None:
+            delay = min(self.max_backoff, self.base_backoff * 2 ** (self._consecutive_failures - 1))
+            delay *= random.uniform(0.8, 1.2)
+        
+        self._backoff_until = max(self._backoff_until, time.monotonic() + delay)
+        
+        if status == 429:
+            self.bucket.rate = max(self.min_rate, self.bucket.rate / 2)
+        
+        logger.warning(
+            f"DexScreener returned HTTP {status}; backing off {delay:.1f}s "
+            f"(rate now {self.bucket.rate * 60:.0f}/min)"
+        )
+    
+    def _on_success(self) -> None:
+        """Recover the request rate additively after throttling."""
+        self._consecutive_failures = 0
+        if self.bucket.rate < self.base_rate:
+            self.bucket.rate = min(self.base_rate, self.bucket.rate + self.base_rate / 20)
@@ -0,0 +1,540 @@
+import json
+import os
+import sqlite3
+import uuid
+import logging
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Any
+from threading import RLock
+
+from alert_record import AlertRecord
+from database import DATA_DIR
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DB_PATH = os.path.join(DATA_DIR, 'bot.db')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS alerts (
+    id TEXT PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    address_key TEXT NOT NULL,
+    active INTEGER NOT NULL DEFAULT 1,
+    triggered INTEGER NOT NULL DEFAULT 0,
+    triggered_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_alerts_user ON alerts (user_id);
+CREATE INDEX IF NOT EXISTS idx_alerts_address_active ON alerts (address_key, active);
+
+CREATE TABLE IF NOT EXISTS users (
+    user_id INTEGER PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS watchlist (
+    user_id INTEGER NOT NULL,
+    contract_address TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (user_id, contract_address)
+);
+CREATE INDEX IF NOT EXISTS idx_watchlist_address ON watchlist (contract_address);
+"""
+
+# Alert fields kept in their own columns rather than in the JSON blob
+_ALERT_STATE_FIELDS = ('id', 'active', 'triggered', 'triggered_at')
+
+
+class SQLiteDatabase:
+    """SQLite-backed database with the same interface as ``Database``.
+    
+    Alerts, users and watchlist entries live in indexed tables; the
+    remaining alert fields are stored as a JSON blob so the alert dicts
+    handed out match the JSON backend exactly. The database runs in WAL
+    mode so readers never block the writer.
+    """
+    
+    def __init__(self, db_path: str = DEFAULT_DB_PATH):
+        self.db_path = db_path
+        self.lock = RLock()
+        
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(SCHEMA)
+        
+        # Alert change listeners (see subscribe())
+        self._listeners: List[Callable[[str, Any], None]] = []
+    
+    def close(self) -> None:
+        """Close the connection."""
+        with self.lock:
+            self.conn.close()
+    
+    @staticmethod
+    def _row_to_alert(row: sqlite3.Row) -> Dict:
+        """Rebuild an alert dict from its row."""
+        alert = json.loads(row['data'])
+        alert['id'] = row['id']
+        alert['active'] = bool(row['active'])
+        alert['triggered'] = bool(row['triggered'])
+        if row['triggered_at'] is not None:
+            alert['triggered_at'] = row['triggered_at']
+        return alert
+    
+    @staticmethod
+    def _alert_blob(alert: Dict) -> str:
+        return json.dumps(
+            {k: v for k, v in alert.items() if k not in _ALERT_STATE_FIELDS},
+            default=str
+        )
+    
+    # ==================== LISTENERS ====================
+    
+    def subscribe(self, callback: Callable[[str, Any], None]) -> None:
+        """
+        Register a callback for alert changes.
+        
+        The callback receives ``('alert_added', record)`` with the new
+        alert as an ``AlertRecord`` (shared, so don't modify it), or
+        ``('alert_removed', alert_id)``; it runs on the thread that made the
+        change, so it should be quick and thread-safe.
+        """
+        self._listeners.append(callback)
+    
+    def _notify(self, event: str, payload: Any) -> None:
+        for callback in self._listeners:
+            try:
+                callback(event, payload)
+            except Exception as e:
+                logger.error(f"Alert listener failed on {event}: {e}")
+    
+    # ==================== ALERTS ====================
+    
+    def add_alert(self, alert_data: Dict[str, Any]) -> str:
+        """
+        Add a new price alert.
+        
+        Args:
+            alert_data: Alert data dictionary
+            
+        Returns:
+            Alert ID
+        """
+        with self.lock:
+            alert_id = str(uuid.uuid4())[:8]
+            while self.conn.execute('SELECT 1 FROM alerts WHERE id = ?', (alert_id,)).fetchone():
+                alert_id = str(uuid.uuid4())[:8]
+            
+            with self.conn:
+                self.conn.execute('BEGIN')
+                self.conn.execute(
+                    'INSERT INTO alerts (id, user_id, address_key, active, triggered, data) '
+                    'VALUES (?, ?, ?, 1, 0, ?)',
+                    (alert_id, int(alert_data['user_id']),
+                     alert_data['contract_address'].lower(), self._alert_blob(alert_data))
+                )
+                self._ensure_user(alert_data['user_id'])
+            
+            record = AlertRecord.from_dict(dict(alert_data, id=alert_id, active=True, triggered=False))
+            self._notify('alert_added', record)
+            logger.info(f"Alert {alert_id} created for user {alert_data['user_id']}")
+            return alert_id
+    
+    def get_user_alerts(self, user_id: int, active_only: bool = True) -> List[Dict]:
+        """
+        Get all alerts for a user.
+        
+        Args:
+            user_id: Telegram user ID
+            active_only: Only return active alerts
+            
+        Returns:
+            List of alert dictionaries
+        """
+        query = 'SELECT * FROM alerts WHERE user_id = ?'
+        if active_only:
+            query += ' AND active = 1'
+        query += ' ORDER BY rowid'
+        
+        with self.lock:
+            rows = self.conn.execute(query, (int(user_id),)).fetchall()
+        return [self._row_to_alert(row) for row in rows]
+    
+    def get_all_active_alerts(self) -> List[Dict]:
+        """Get all active alerts from all users."""
+        with self.lock:
+            rows = self.conn.execute('SELECT * FROM alerts WHERE active = 1').fetchall()
+        return [self._row_to_alert(row) for row in rows]
+    
+    def get_active_alerts_by_address(self, address_filter: Optional[Callable[[str], bool]] = None) -> Dict[str, List[AlertRecord]]:
+        """
+        Get all active alerts grouped by lowercased contract address.
+        
+        With a filter, only the distinct addresses are read and tested; the
+        alerts of the accepted ones are then selected through a temporary
+        table, so other addresses' alerts are never loaded.
+        
+        Args:
+            address_filter: Only include addresses for which this returns True
+        """
+        query = (
+            "SELECT address_key, json_group_array(json_set(json(data), '$.id', id)) AS alerts "
+            "FROM alerts WHERE active = 1 {} GROUP BY address_key"
+        )
+        with self.lock:
+            if address_filter is None:
+                rows = self.conn.execute(query.format('')).fetchall()
+            else:
+                with self.conn:
+                    self.conn.execute('BEGIN')
+                    addresses = [
+                        (row[0],)
+                        for row in self.conn.execute('SELECT DISTINCT address_key FROM alerts WHERE active = 1')
+                        if address_filter(row[0])
+                    ]
+                    self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS address_filter (address_key TEXT PRIMARY KEY)')
+                    self.conn.execute('DELETE FROM temp.address_filter')
+                    self.conn.executemany('INSERT INTO temp.address_filter (address_key) VALUES (?)', addresses)
+                    rows = self.conn.execute(
+                        query.format('AND address_key IN (SELECT address_key FROM temp.address_filter)')
+                    ).fetchall()
+                    self.conn.execute('DELETE FROM temp.address_filter')
+        
+        return {
+            row['address_key']: [AlertRecord.from_dict(alert) for alert in json.loads(row['alerts'])]
+            for row in rows
+        }
+    
+    def get_alert_by_id(self, user_id: int, alert_id: str) -> Optional[Dict]:
+        """Get a specific alert by ID."""
+        with self.lock:
+            row = self.conn.execute(
+                'SELECT * FROM alerts WHERE id = ? AND user_id = ?', (alert_id, int(user_id))
+            ).fetchone()
+        return self._row_to_alert(row) if row else None
+    
+    def delete_alert(self, user_id: int, alert_id: str) -> bool:
+        """
+        Delete/deactivate an alert.
+        
+        Args:
+            user_id: Telegram user ID
+            alert_id: Alert ID to delete
+            
+        Returns:
+            True if deleted, False if not found
+        """
+        with self.lock:
+            cursor = self.conn.execute(
+                'DELETE FROM alerts WHERE id = ? AND user_id = ?', (alert_id, int(user_id))
+            )
+        
+        if cursor.rowcount:
+            self._notify('alert_removed', alert_id)
+            logger.info(f"Alert {alert_id} deleted for user {user_id}")
+            return True
+        return False
+    
+    def mark_alert_triggered(self, alert_id: str) -> bool:
+        """
+        Mark an alert as triggered and deactivate it.
+        
+        Args:
+            alert_id: Alert ID
+            
+        Returns:
+            True if updated, False if not found
+        """
+        with self.lock:
+            cursor = self.conn.execute(
+                'UPDATE alerts SET active = 0, triggered = 1, triggered_at = ? WHERE id = ?',
+                (datetime.now().isoformat(), alert_id)
+            )
+        
+        if cursor.rowcount:
+            self._notify('alert_removed', alert_id)
+            logger.info(f"Alert {alert_id} marked as triggered")
+            return True
+        return False
+    
+    def mark_alerts_triggered(self, alert_ids: List[str]) -> int:
+        """
+        Mark many alerts as triggered in one transaction.
+        
+        Alerts that are unknown or no longer active are left alone.
+        
+        Args:
+            alert_ids: Alert IDs
+            
+        Returns:
+            Number of alerts updated
+        """
+        if not alert_ids:
+            return 0
+        
+        triggered_at = datetime.now().isoformat()
+        updated = []
+        with self.lock, self.conn:
+            self.conn.execute('BEGIN')
+            for alert_id in alert_ids:
+                row = self.conn.execute(
+                    'UPDATE alerts SET active = 0, triggered = 1, triggered_at = ? '
+                    'WHERE id = ? AND active = 1 RETURNING id',
+                    (triggered_at, alert_id)
+                ).fetchone()
+                if row is not None:
+                    updated.append(row[0])
+        
+        for alert_id in updated:
+            self._notify('alert_removed', alert_id)
+        logger.info(f"{len(updated)} alerts marked as triggered")
+        return len(updated)
+    
+    def clear_user_alerts(self, user_id: int) -> int:
+        """
+        Clear all alerts for a user.
+        
+        Args:
+            user_id: Telegram user ID
+            
+        Returns:
+            Number of alerts cleared
+        """
+        with self.lock:
+            rows = self.conn.execute('DELETE FROM alerts WHERE user_id = ? RETURNING id', (int(user_id),)).fetchall()
+        
+        for row in rows:
+            self._notify('alert_removed', row['id'])
+        return len(rows)
+    
+    # ==================== WATCHLIST ====================
+    
+    def add_to_watchlist(self, user_id: int, token_info: Dict) -> bool:
+        """
+        Add a token to user's watchlist.
+        
+        Args:
+            user_id: Telegram user ID
+            token_info: Token information dictionary
+            
+        Returns:
+            True if added, False if already exists
+        """
+        contract_address = token_info.get('address', '').lower()
+        watchlist_entry = {
+            'contract_address': contract_address,
+            'name': token_info.get('name'),
+            'symbol': token_info.get('symbol'),
+            'chain': token_info.get('chain'),
+            'initial_price': token_info.get('priceUsd'),
+            'added_at': datetime.now().isoformat()
+        }
+        
+        with self.lock:
+            cursor = self.conn.execute(
+                'INSERT OR IGNORE INTO watchlist (user_id, contract_address, data) VALUES (?, ?, ?)',
+                (int(user_id), contract_address, json.dumps(watchlist_entry, default=str))
+            )
+        return cursor.rowcount > 0
+    
+    def get_watchlist(self, user_id: int) -> List[Dict]:
+        """Get user's watchlist."""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT data FROM watchlist WHERE user_id = ? ORDER BY rowid', (int(user_id),)
+            ).fetchall()
+        return [json.loads(row['data']) for row in rows]
+    
+    def remove_from_watchlist(self, user_id: int, contract_address: str) -> bool:
+        """Remove a token from watchlist."""
+        with self.lock:
+            cursor = self.conn.execute(
+                'DELETE FROM watchlist WHERE user_id = ? AND contract_address = ?',
+                (int(user_id), contract_address.lower())
+            )
+        return cursor.rowcount > 0
+    
+    def get_watchers(self, contract_address: str) -> List[int]:
+        """IDs of the users watching a token."""
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT user_id FROM watchlist WHERE contract_address = ?', (contract_address.lower(),)
+            ).fetchall()
+        return [row['user_id'] for row in rows]
+    
+    def get_watched_addresses(self) -> List[str]:
+        """Lowercased addresses of every token on some user's watchlist."""
+        with self.lock:
+            rows = self.conn.execute('SELECT DISTINCT contract_address FROM watchlist').fetchall()
+        return [row['contract_address'] for row in rows]
+    
+    # ==================== USERS ====================
+    
+    def _ensure_user(self, user_id: int) -> None:
+        """Ensure user exists in database."""
+        user = {
+            'user_id': user_id,
+            'created_at': datetime.now().isoformat(),
+            'alerts_created': 0,
+            'alerts_triggered': 0
+        }
+        self.conn.execute(
+            'INSERT OR IGNORE INTO users (user_id, data) VALUES (?, ?)',
+            (int(user_id), json.dumps(user))
+        )
+    
+    def get_user(self, user_id: int) -> Optional[Dict]:
+        """Get user data."""
+        with self.lock:
+            row = self.conn.execute('SELECT data FROM users WHERE user_id = ?', (int(user_id),)).fetchone()
+        return json.loads(row['data']) if row else None
+    
+    def update_user(self, user_id: int, data: Dict) -> None:
+        """Update user data."""
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO users (user_id, data) VALUES (?, json(?)) '
+                'ON CONFLICT (user_id) DO UPDATE SET data = json_patch(users.data, excluded.data)',
+                (int(user_id), json.dumps(data, default=str))
+            )
+    
+    def get_user_stats(self, user_id: int) -> Dict:
+        """Get user statistics."""
+        with self.lock:
+            counts = self.conn.execute(
+                'SELECT COUNT(*) AS total, '
+                'COALESCE(SUM(active), 0) AS active, '
+                'COALESCE(SUM(triggered), 0) AS triggered, '
+                '(SELECT COUNT(*) FROM watchlist WHERE user_id = :uid) AS watching '
+                'FROM alerts WHERE user_id = :uid',
+                {'uid': int(user_id)}
+            ).fetchone()
+            user = self.conn.execute(
+                "SELECT json_extract(data, '$.created_at') AS created_at FROM users WHERE user_id = ?",
+                (int(user_id),)
+            ).fetchone()
+        
+        created_at = user['created_at'] if user and user['created_at'] else datetime.now().isoformat()
+        
+        try:
+            member_since = datetime.fromisoformat(created_at).strftime('%Y-%m-%d')
+        except ValueError:
+            member_since = 'Unknown'
+        
+        return {
+            'active_alerts': counts['active'],
+            'triggered_alerts': counts['triggered'],
+            'watchlist_count': counts['watching'],
+            'member_since': member_since,
+            'total_alerts_created': counts['total']
+        }
+    
+    def get_all_users(self) -> List[int]:
+        """Get all user IDs."""
+        with self.lock:
+            rows = self.conn.execute('SELECT user_id FROM users').fetchall()
+        return [row['user_id'] for row in rows]
+    
+    # ==================== MIGRATION ====================
+    
+    def import_json_store(self, data_dir: str = DATA_DIR) -> Dict[str, int]:
+        """
+        Copy the JSON store (snapshots plus pending journal) into this database.
+        
+        The JSON store is opened read-only, so this can run while the bot is
+        still serving from it (its compaction waits until the store is
+        loaded, see ``Database``). Rows are upserted and rows missing from the
+        store are deleted in the same transaction, so the database ends up a
+        copy of the store, and running it again right before switching
+        ``DB_BACKEND`` over picks up anything created or deleted since.
+        
+        Args:
+            data_dir: Directory of the JSON store
+            
+        Returns:
+            Number of alerts, users and watchlist entries imported, and of
+            rows deleted because the store no longer has them
+        """
+        from database import Database
+        
+        source = Database(data_dir=data_dir, read_only=True)
+        counts = {'alerts': 0, 'users': 0, 'watchlist': 0, 'deleted': 0}
+        user_ids = set()
+        alert_ids = set()
+        watch_keys = set()
+        
+        with self.lock, self.conn:
+            self.conn.execute('BEGIN')
+            
+            for user_id, user in source.users.items():
+                self.conn.execute(
+                    'INSERT OR REPLACE INTO users (user_id, data) VALUES (?, ?)',
+                    (int(user_id), json.dumps(user, default=str))
+                )
+                user_ids.add(int(user_id))
+                counts['users'] += 1
+            
+            for user_alerts in source.alerts.values():
+                for record in user_alerts:
+                    alert = record.to_dict()
+                    self.conn.execute(
+                        'INSERT OR REPLACE INTO alerts '
+                        '(id, user_id, address_key, active, triggered, triggered_at, data) '
+                        'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                        (alert['id'], int(alert['user_id']), alert['contract_address'].lower(),
+                         int(bool(alert.get('active', True))), int(bool(alert.get('triggered', False))),
+                         alert.get('triggered_at'), self._alert_blob(alert))
+                    )
+                    alert_ids.add(alert['id'])
+                    counts['alerts'] += 1
+            
+            for user_id, entries in source.watchlist.items():
+                for entry in entries:
+                    key = (int(user_id), entry.get('contract_address', '').lower())
+                    self.conn.execute(
+                        'INSERT OR REPLACE INTO watchlist (user_id, contract_address, data) VALUES (?, ?, ?)',
+                        (*key, json.dumps(entry, default=str))
+                    )
+                    watch_keys.add(key)
+                    counts['watchlist'] += 1
+            
+            # Drop what was deleted from the store since an earlier import
+            stale_users = [
+                (row[0],) for row in self.conn.execute('SELECT user_id FROM users') if row[0] not in user_ids
+            ]
+            stale_alerts = [
+                (row[0],) for row in self.conn.execute('SELECT id FROM alerts') if row[0] not in alert_ids
+            ]
+            stale_watches = [
+                tuple(row) for row in self.conn.execute('SELECT user_id, contract_address FROM watchlist')
+                if tuple(row) not in watch_keys
+            ]
+            self.conn.executemany('DELETE FROM users WHERE user_id = ?', stale_users)
+            self.conn.executemany('DELETE FROM alerts WHERE id = ?', stale_alerts)
+            self.conn.executemany('DELETE FROM watchlist WHERE user_id = ? AND contract_address = ?', stale_watches)
+            counts['deleted'] = len(stale_users) + len(stale_alerts) + len(stale_watches)
+        
+        logger.info(
+            f"Imported {counts['alerts']} alerts, {counts['users']} users and "
+            f"{counts['watchlist']} watchlist entries from {data_dir}, "
+            f"deleted {counts['deleted']} rows no longer in it"
+        )
+        return counts
+
+
+if __name__ == '__main__':
+    # One-shot migration: python sqlite_database.py [json_data_dir] [sqlite_path]
+    import sys
+    
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    
+    src_dir = sys.argv[1] if len(sys.argv) > 1 else DATA_DIR
+    dst_path = sys.argv[2] if len(sys.argv) > 2 else DEFAULT_DB_PATH
+    
+    target = SQLiteDatabase(dst_path)
+    target.import_json_store(src_dir)
+    target.close()
@@ -0,0 +1,123 @@
+import pytest
+
+from alert_engine import AlertEngine, create_alert_engine, evaluate_alert
+
+TOKEN = '0x' + 'ab' * 20
+
+
+def _alert(alert_id, direction, initial=100.0, target=None, percent=10, created_at=None, address=TOKEN):
+    if target is None:
+        target = {'up': initial + initial * percent / 100, 'down': initial - initial * percent / 100}.get(direction, percent)
+    return {
+        'id': alert_id,
+        'user_id': 1,
+        'contract_address': address,
+        'initial_price': initial,
+        'target_price': target,
+        'direction': direction,
+        'percent': percent,
+        'created_at': created_at,
+    }
+
+
+def _ids(triggered):
+    return sorted(alert['id'] for alert in triggered)
+
+
+def test_evaluate_alert_semantics():
+    assert evaluate_alert(_alert('u', 'up'), 110.0) == 10.0
+    assert evaluate_alert(_alert('u', 'up'), 109.0) is None
+    assert evaluate_alert(_alert('d', 'down'), 90.0) == -10.0
+    assert evaluate_alert(_alert('a', 'any'), 89.0) == -11.0
+    assert evaluate_alert(_alert('a', 'any'), 95.0) is None
+    assert evaluate_alert(_alert('z', 'up', initial=0.0, target=1.0), 5.0) is None
+
+
+def test_price_pops_only_crossed_alerts():
+    engine = AlertEngine()
+    engine.load({TOKEN: [
+        _alert('up10', 'up', percent=10),
+        _alert('up20', 'up', percent=20),
+        _alert('down10', 'down', percent=10),
+        _alert('any5', 'any', percent=5),
+    ]})
+    
+    assert _ids(engine.evaluate(TOKEN, 104.0)) == []
+    assert _ids(engine.evaluate(TOKEN, 112.0)) == ['any5', 'up10']
+    assert len(engine) == 2
+    
+    # Triggered alerts are gone; the rest still fire
+    assert _ids(engine.evaluate('0x' + 'AB' * 20, 125.0)) == ['up20']
+    assert _ids(engine.evaluate(TOKEN, 80.0)) == ['down10']
+    assert engine.addresses() == []
+
+
+def test_triggered_alert_reports_prices():
+    engine = AlertEngine()
+    engine.add(_alert('up10', 'up', percent=10))
+    
+    [alert] = engine.evaluate(TOKEN, 115.0)
+    assert alert['current_price'] == 115.0
+    assert alert['trigger_price'] == 115.0
+    assert round(alert['actual_change'], 9) == 15.0
+
+
+def test_removed_alerts_never_fire():
+    engine = AlertEngine()
+    for i in range(10):
+        engine.add(_alert(f"a{i}", 'up', percent=10))
+    for i in range(9):
+        engine.remove(f"a{i}")
+    
+    assert _ids(engine.evaluate(TOKEN, 200.0)) == ['a9']
+    assert len(engine) == 0
+
+
+def test_range_catches_wick_for_old_alerts_only():
+    engine = AlertEngine()
+    engine.load({TOKEN: [
+        _alert('old', 'up', percent=10, created_at=1000),
+        _alert('young', 'up', percent=10, created_at=3000),
+        _alert('undated', 'down', percent=10),
+    ]})
+    
+    # The wick to 120 and 85 happened after 2000: only the old alert saw it
+    triggered = engine.evaluate(TOKEN, 105.0, (85.0, 120.0, 2000.0))
+    assert [(a['id'], a['trigger_price'], a['current_price']) for a in triggered] == [('old', 120.0, 105.0)]
+    assert len(engine) == 2
+
+
+def test_any_alert_crossed_both_ways_reports_high():
+    engine = AlertEngine()
+    engine.add(_alert('any', 'any', percent=10, created_at=1000))
+    
+    [alert] = engine.evaluate(TOKEN, 100.0, (80.0, 130.0, 2000.0))
+    assert alert['trigger_price'] == 130.0
+    assert round(alert['actual_change'], 9) == 30.0
+
+
+def test_unparseable_and_zero_price_alerts_are_skipped():
+    engine = AlertEngine()
+    engine.add(_alert('zero', 'up', initial=0.0, target=1.0))
+    engine.add(dict(_alert('bad', 'up'), target_price='n/a'))
+    engine.add(_alert('sideways', 'sideways'))
+    
+    assert len(engine) == 0
+    assert engine.evaluate(TOKEN, 1e9) == []
+
+
+def test_trigger_distances():
+    engine = AlertEngine()
+    engine.add(_alert('up10', 'up', percent=10))
+    engine.add(_alert('down20', 'down', percent=20))
+    
+    distances = engine.trigger_distances({TOKEN: 100.0, '0xother': 5.0})
+    assert list(distances) == [TOKEN]
+    assert round(distances[TOKEN], 9) == 0.1
+    assert engine.trigger_distances({TOKEN: 150.0}) == {TOKEN: 0.0}
+
+
+def test_create_alert_engine_by_name():
+    assert isinstance(create_alert_engine(), AlertEngine)
+    with pytest.raises(ValueError):
+        create_alert_engine('btree')
@@ -0,0 +1,88 @@
+import asyncio
+
+import pytest
+
+from backend import BackendServer
+from backend_client import BackendClient, BackendError
+
+
+class StubDatabase:
+    def __init__(self):
+        self.alerts = {}
+    
+    async def add_alert(self, alert_data):
+        alert_id = f"a{len(self.alerts) + 1}"
+        self.alerts[alert_id] = dict(alert_data, id=alert_id)
+        return alert_id
+    
+    async def get_user_alerts(self, user_id, active_only=True):
+        return [alert for alert in self.alerts.values() if alert['user_id'] == user_id]
+    
+    def get_active_alerts_by_address(self):
+        raise AssertionError("not exposed over RPC")
+
+
+class StubMonitor:
+    def __init__(self):
+        self.delay = 0.0
+    
+    async def get_current_price(self, contract_address):
+        await asyncio.sleep(self.delay)
+        return 1.25
+    
+    async def get_tokens_info(self, contract_addresses, keep_warm=False):
+        return {address: {'price_usd': 2.0, 'keep_warm': keep_warm} for address in contract_addresses}
+    
+    async def close(self):
+        raise AssertionError("not exposed over RPC")
+
+
+def run_with_backend(tmp_path, test):
+    async def run():
+        server = BackendServer(StubDatabase(), StubMonitor(), socket_path=str(tmp_path / 'backend.sock'))
+        await server.start()
+        client = BackendClient(server.socket_path, timeout=5)
+        try:
+            await test(server, client)
+        finally:
+            await client.close()
+            await server.stop()
+    
+    asyncio.run(run())
+
+
+def test_round_trip_through_remote_wrappers(tmp_path):
+    async def test(server, client):
+        alert_id = await client.db.add_alert({'user_id': 7, 'contract_address': '0xabc'})
+        assert alert_id == 'a1'
+        assert await client.db.get_user_alerts(7) == [{'user_id': 7, 'contract_address': '0xabc', 'id': 'a1'}]
+        assert await client.price_monitor.get_current_price('0xabc') == 1.25
+        assert await client.price_monitor.get_tokens_info(['0xabc'], keep_warm=True) == {
+            '0xabc': {'price_usd': 2.0, 'keep_warm': True},
+        }
+    
+    run_with_backend(tmp_path, test)
+
+
+def test_concurrent_calls_share_the_connection(tmp_path):
+    async def test(server, client):
+        server.targets['monitor'].delay = 0.05
+        slow = asyncio.create_task(client.price_monitor.get_current_price('0xabc'))
+        await asyncio.sleep(0.01)
+        # A fast call on the same connection isn't held up by the slow one
+        assert await client.db.get_user_alerts(1) == []
+        assert not slow.done()
+        assert await slow == 1.25
+    
+    run_with_backend(tmp_path, test)
+
+
+def test_methods_outside_the_whitelist_are_rejected(tmp_path):
+    async def test(server, client):
+        for method in ('db.get_active_alerts_by_address', 'monitor.close', 'db.__init__', 'nope.add_alert', 'add_alert'):
+            with pytest.raises(BackendError, match='Unknown method'):
+                await client.call(method)
+        # The connection survives rejected calls
+        assert await client.price_monitor.get_current_price('0xabc') == 1.25
+    
+    run_with_backend(tmp_path, test)
@@ -0,0 +1,36 @@
+import pytest
+
+import backend
+from sqlite_database import SQLiteDatabase
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    database = SQLiteDatabase(str(tmp_path / 'bot.db'))
+    database.add_alert({
+        'user_id': 1, 'contract_address': '0xabc', 'initial_price': 1.0,
+        'target_price': 2.0, 'direction': 'up', 'percent': 100,
+    })
+    monkeypatch.setattr(backend, 'create_database', lambda: database)
+    monkeypatch.setattr(backend, 'PRICE_HISTORY', False)
+    monkeypatch.setattr(backend, 'TOKEN_INDEX', False)
+    yield database
+    database.close()
+
+
+def test_single_process_monitor_tracks_the_alerts(store, monkeypatch):
+    monkeypatch.setattr(backend, 'MONITOR_WORKERS', 0)
+    db, price_monitor = backend.create_services()
+    
+    assert len(price_monitor.engine) == 1
+    assert price_monitor._on_db_event in store._listeners
+
+
+def test_sharded_mode_builds_a_lookup_only_monitor(store, monkeypatch):
+    monkeypatch.setattr(backend, 'MONITOR_WORKERS', 2)
+    db, price_monitor = backend.create_services()
+    
+    # The workers check the alerts; the bot's monitor neither loads nor follows them
+    assert len(price_monitor.engine) == 0
+    assert store._listeners == []
+    assert db.database is store
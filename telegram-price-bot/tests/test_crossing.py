@@ -0,0 +1,93 @@
+import time
+import asyncio
+
+from price_monitor import PriceMonitor
+
+TOKEN = '0x' + 'cd' * 20
+
+
+class StubDatabase:
+    def __init__(self, alerts):
+        self.alerts = alerts
+    
+    def get_active_alerts_by_address(self):
+        return {TOKEN: self.alerts}
+    
+    def subscribe(self, callback):
+        pass
+
+
+def alert(alert_id, direction, target, created_at='2020-01-01T00:00:00'):
+    return {
+        'id': alert_id,
+        'user_id': 1,
+        'contract_address': TOKEN,
+        'initial_price': 100.0,
+        'target_price': target,
+        'direction': direction,
+        'percent': 10,
+        'created_at': created_at,
+    }
+
+
+class FakeApi:
+    """Stands in for PriceMonitor._get_json, serving one pair at ``price``."""
+    
+    def __init__(self, price):
+        self.price = price
+        self.change_5m = 0
+    
+    async def __call__(self, url, endpoint='other'):
+        return {'pairs': [{
+            'baseToken': {'address': TOKEN, 'name': 'Token', 'symbol': 'TKN'},
+            'quoteToken': {'address': '0xquote', 'name': 'Wrapped Ether', 'symbol': 'WETH'},
+            'priceUsd': str(self.price),
+            'priceChange': {'m5': self.change_5m},
+            'liquidity': {'usd': 1000},
+            'chainId': 'ethereum',
+            'pairAddress': '0xpair',
+        }]}
+
+
+def make_monitor(alerts, price=100.0):
+    monitor = PriceMonitor(StubDatabase(alerts), poll_interval=0, adaptive_polling=False)
+    api = monitor._get_json = FakeApi(price)
+    return monitor, api
+
+
+def test_wick_seen_by_another_lookup_fires_on_next_tick():
+    async def run():
+        monitor, api = make_monitor([alert('up', 'up', 110.0), alert('down', 'down', 90.0)])
+        first = await monitor.check_alerts()
+        
+        # A user lookup between ticks sees the spike, then the price comes back
+        api.price = 115.0
+        await monitor.get_tokens_info([TOKEN], refresh=True)
+        api.price = 100.0
+        second = await monitor.check_alerts()
+        return first, second
+    
+    first, second = asyncio.run(run())
+    assert first == []
+    assert [(a['id'], a['trigger_price']) for a in second] == [('up', 115.0)]
+
+
+def test_wick_from_price_change_window_fires_unchanged_token():
+    async def run():
+        monitor, api = make_monitor([
+            alert('up', 'up', 110.0),
+            alert('down', 'down', 90.0),
+            # Created after the last evaluation: only sees the spot price
+            alert('young', 'up', 110.0, created_at=time.time() - 60),
+        ])
+        await monitor.check_alerts()
+        # Last evaluated long enough ago that the 5m window is new information
+        monitor.feed.get(TOKEN).evaluated_at = time.time() - 600
+        
+        # Same spot price, but it was 125 five minutes ago
+        api.change_5m = -20
+        return await monitor.check_alerts()
+    
+    triggered = asyncio.run(run())
+    assert [(a['id'], a['trigger_price'], a['current_price']) for a in triggered] == [('up', 125.0, 100.0)]
+
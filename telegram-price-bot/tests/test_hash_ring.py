@@ -0,0 +1,34 @@
+from monitor_workers import HashRing
+
+ADDRESSES = [f"0x{i:040x}" for i in range(5000)]
+
+
+def test_assignment_is_deterministic_and_case_insensitive():
+    ring, other = HashRing(4), HashRing(4)
+    for address in ADDRESSES[:500]:
+        shard = ring.shard_for(address)
+        assert 0 <= shard < 4
+        assert other.shard_for(address) == shard
+        assert ring.shard_for(address.upper()) == shard
+
+
+def test_shards_get_similar_shares():
+    ring = HashRing(4)
+    counts = [0] * 4
+    for address in ADDRESSES:
+        counts[ring.shard_for(address)] += 1
+    
+    assert min(counts) > len(ADDRESSES) / 4 * 0.5
+
+
+def test_adding_a_shard_only_moves_addresses_to_it():
+    before, after = HashRing(4), HashRing(5)
+    moved = [address for address in ADDRESSES if before.shard_for(address) != after.shard_for(address)]
+    
+    assert all(after.shard_for(address) == 4 for address in moved)
+    assert len(moved) < len(ADDRESSES) * 0.35
+
+
+def test_single_shard_owns_everything():
+    ring = HashRing(1)
+    assert {ring.shard_for(address) for address in ADDRESSES[:100]} == {0}
@@ -0,0 +1,64 @@
+import json
+
+from database import Database
+from journal import Journal
+
+
+def _alert(alert_id, address='0xabc'):
+    return {
+        'id': alert_id,
+        'user_id': 1,
+        'contract_address': address,
+        'initial_price': 1.0,
+        'target_price': 2.0,
+        'direction': 'up',
+        'percent': 100,
+    }
+
+
+def test_replay_skips_torn_last_line(tmp_path):
+    path = str(tmp_path / 'journal.log')
+    journal = Journal(path)
+    journal.append({'op': 'a', 'n': 1})
+    journal.append({'op': 'a', 'n': 2})
+    journal.close()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('{"op":"a","n":')
+    
+    assert [record['n'] for record in Journal.replay(path)] == [1, 2]
+
+
+def test_replay_stops_at_corrupt_record(tmp_path):
+    path = tmp_path / 'journal.log'
+    path.write_text('{"n":1}\nnot json\n{"n":3}\n', encoding='utf-8')
+    
+    assert list(Journal.replay(str(path))) == [{'n': 1}]
+
+
+def test_replay_of_missing_journal_is_empty(tmp_path):
+    assert list(Journal.replay(str(tmp_path / 'missing.log'))) == []
+
+
+def test_database_recovers_records_before_torn_line(tmp_path):
+    # A crash mid-append leaves the last record half written
+    journal_path = str(tmp_path / 'journal.log')
+    journal = Journal(journal_path)
+    for alert_id in ('a1', 'a2'):
+        journal.append({'op': 'add_alert', 'alert': _alert(alert_id)})
+    journal.close()
+    with open(journal_path, 'a', encoding='utf-8') as f:
+        f.write(json.dumps({'op': 'add_alert', 'alert': _alert('a3')})[:20])
+    
+    reopened = Database(data_dir=str(tmp_path), read_only=True)
+    assert sorted(alert['id'] for alert in reopened.get_all_active_alerts()) == ['a1', 'a2']
+    
+    # Opening it for writing compacts the recovered records into the snapshots
+    recovered = Database(data_dir=str(tmp_path))
+    try:
+        assert sorted(alert['id'] for alert in recovered.get_all_active_alerts()) == ['a1', 'a2']
+        assert list(Journal.replay(journal_path)) == []
+    finally:
+        recovered.close()
+    
+    snapshot = Database(data_dir=str(tmp_path), read_only=True)
+    assert sorted(alert['id'] for alert in snapshot.get_all_active_alerts()) == ['a1', 'a2']
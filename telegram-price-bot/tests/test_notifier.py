@@ -0,0 +1,81 @@
+import asyncio
+
+from telegram.error import BadRequest, Forbidden, TimedOut
+
+from notifier import NotificationDispatcher
+
+
+class FakeBot:
+    """Records send_message calls and fails them as told."""
+    
+    def __init__(self, fail):
+        self.fail = fail
+        self.calls = []
+    
+    async def send_message(self, chat_id, text, parse_mode=None):
+        self.calls.append(parse_mode)
+        error = self.fail(parse_mode)
+        if error is not None:
+            raise error
+
+
+def deliver(fail, max_retries=3):
+    bot = FakeBot(fail)
+    restored = []
+    
+    async def run():
+        dispatcher = NotificationDispatcher(
+            bot, lambda alert: '*alert*', on_undelivered=restored.append,
+            per_chat_interval=0, max_retries=max_retries,
+        )
+        dispatcher.start()
+        dispatcher.submit([{'id': 'a1', 'user_id': 42}])
+        await dispatcher.join()
+        await dispatcher.stop()
+        return dispatcher
+    
+    dispatcher = asyncio.run(run())
+    return bot.calls, dispatcher, [alert['id'] for alert in restored]
+
+
+def test_sent_alert_is_completed():
+    calls, dispatcher, restored = deliver(lambda parse_mode: None)
+    assert calls == ['Markdown']
+    assert dispatcher.drain_completed() == ['a1']
+    assert restored == []
+
+
+def test_unparseable_markdown_is_resent_as_plain_text():
+    calls, dispatcher, restored = deliver(
+        lambda parse_mode: BadRequest("Can't parse entities") if parse_mode else None
+    )
+    assert calls == ['Markdown', None]
+    assert dispatcher.drain_completed() == ['a1']
+    assert dispatcher.sent == 1
+    assert restored == []
+
+
+def test_bad_request_twice_is_dropped_not_restored():
+    calls, dispatcher, restored = deliver(lambda parse_mode: BadRequest('Chat not found'))
+    assert calls == ['Markdown', None]
+    assert dispatcher.drain_completed() == ['a1']
+    assert dispatcher.failed == 1
+    assert restored == []
+
+
+def test_forbidden_is_dropped():
+    calls, dispatcher, restored = deliver(lambda parse_mode: Forbidden('bot was blocked by the user'))
+    assert calls == ['Markdown']
+    assert dispatcher.drain_completed() == ['a1']
+    assert restored == []
+
+
+def test_network_errors_exhaust_to_on_undelivered(monkeypatch):
+    async def no_sleep(delay):
+        pass
+    monkeypatch.setattr('notifier.asyncio.sleep', no_sleep)
+    
+    calls, dispatcher, restored = deliver(lambda parse_mode: TimedOut(), max_retries=2)
+    assert len(calls) == 3
+    assert dispatcher.drain_completed() == []
+    assert restored == ['a1']
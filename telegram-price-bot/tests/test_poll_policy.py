@@ -0,0 +1,60 @@
+import pytest
+
+from price_feed import AdaptivePollPolicy, TokenState
+
+
+def state(address, price, volatility):
+    token = TokenState(address)
+    token.price = price
+    token.volatility = volatility
+    return token
+
+
+def make_policy(distances, **kwargs):
+    return AdaptivePollPolicy(lambda prices: {a: d for a, d in distances.items() if a in prices}, **kwargs)
+
+
+def test_unpolled_token_has_no_interval():
+    assert make_policy({}).interval('0xa') is None
+
+
+def test_close_and_volatile_tokens_are_polled_sooner():
+    policy = make_policy(
+        {'0xnear': 0.01, '0xfar': 0.5},
+        min_interval=1, max_interval=600, budget_interval=1e9, safety=0.5,
+    )
+    policy.update([state('0xnear', 1.0, 1.0), state('0xfar', 1.0, 1.0), state('0xcalm', 1.0, 0.0)])
+    
+    # Scale factor is 1 with a huge budget, so these are the base intervals:
+    # safety * distance(%) / volatility(%/min) * 60
+    assert policy._base == {
+        '0xnear': pytest.approx(30.0),
+        '0xfar': 600,
+        '0xcalm': 600,
+    }
+
+
+def test_intervals_are_clamped():
+    policy = make_policy({'0xa': 0.0, '0xb': 10.0}, min_interval=5, max_interval=300, budget_interval=1e9)
+    policy.update([state('0xa', 1.0, 5.0), state('0xb', 1.0, 0.001)])
+    assert policy._base == {'0xa': 5, '0xb': 300}
+
+
+def test_schedule_spends_the_fixed_interval_budget():
+    distances = {f"0x{i}": 0.001 * (i + 1) for i in range(20)}
+    policy = make_policy(distances, min_interval=0.01, max_interval=1000, budget_interval=30)
+    policy.update([state(address, 1.0, 2.0) for address in distances])
+    
+    lookups_per_second = sum(1 / policy.interval(address) for address in distances)
+    assert lookups_per_second == pytest.approx(len(distances) / 30)
+    assert policy.interval('0x0') < policy.interval('0x19')
+
+
+def test_forget_drops_the_token_from_the_budget():
+    policy = make_policy({'0xa': 0.01, '0xb': 0.01}, budget_interval=30)
+    policy.update([state('0xa', 1.0, 1.0), state('0xb', 1.0, 1.0)])
+    policy.forget('0xb')
+    
+    assert policy.interval('0xb') is None
+    assert policy._demand == pytest.approx(1 / policy._base['0xa'])
+    assert policy.interval('0xa') == pytest.approx(30)
@@ -0,0 +1,100 @@
+import pytest
+
+import metrics
+import price_cache
+from price_cache import MISS, PriceCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+    
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(price_cache.time, 'monotonic', clock)
+    return clock
+
+
+def test_evicts_least_recently_used(clock):
+    cache = PriceCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    assert cache.get('a') == 1  # 'b' is now the least recently used
+    cache.set('c', 3)
+    
+    assert cache.get('b') is MISS
+    assert cache.get('a') == 1
+    assert cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_overwrite_refreshes_recency(clock):
+    cache = PriceCache(max_entries=2)
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.set('a', 10)
+    cache.set('c', 3)
+    
+    assert cache.get('a') == 10
+    assert cache.get('b') is MISS
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = PriceCache(ttl=30)
+    cache.set('a', 1)
+    cache.set('b', 2, ttl=60)
+    
+    clock.now += 29.9
+    assert cache.get('a') == 1
+    clock.now += 0.1
+    assert cache.get('a') is MISS
+    assert cache.get('b') == 2
+    assert len(cache) == 1
+    assert cache.stats()['expirations'] == 1
+
+
+def test_missing_entries_use_negative_ttl(clock):
+    cache = PriceCache(ttl=30, negative_ttl=10)
+    cache.set_missing('gone')
+    
+    assert cache.get('gone') is None
+    clock.now += 10
+    assert cache.get('gone') is MISS
+    
+    stats = cache.stats()
+    assert stats['negative_hits'] == 1
+    assert stats['misses'] == 1
+
+
+def test_peek_and_ttl_remaining_ignore_expiry(clock):
+    cache = PriceCache(ttl=30)
+    cache.set('a', 1)
+    clock.now += 40
+    
+    assert cache.ttl_remaining('a') == pytest.approx(-10)
+    assert cache.peek('a') == 1
+    assert cache.ttl_remaining('missing') is None
+    assert cache.stats()['misses'] == 0
+
+
+def test_named_cache_stats_are_exported():
+    cache = PriceCache(max_entries=1, name='test_export')
+    cache.set('a', 1)
+    cache.set('b', 2)
+    cache.get('b')
+    cache.get('a')
+    unnamed = PriceCache()
+    unnamed.get('a')
+    
+    text = metrics.REGISTRY.render()
+    assert 'price_cache_entries{cache="test_export"} 1' in text
+    assert 'price_cache_events{cache="test_export",event="hits"} 1' in text
+    assert 'price_cache_events{cache="test_export",event="misses"} 1' in text
+    assert 'price_cache_events{cache="test_export",event="evictions"} 1' in text
+    assert 'cache=""' not in text
+    assert 'price_cache_events{cache="test_export",event="hits"} 1' in metrics.REGISTRY.summary()
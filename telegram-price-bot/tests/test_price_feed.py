@@ -0,0 +1,109 @@
+import asyncio
+
+from price_feed import PriceFeed
+
+
+class FakeMonitor:
+    """Serves ``prices`` to the feed and records every batch it asks for."""
+    
+    def __init__(self, prices):
+        self.prices = prices
+        self.batches = []
+    
+    async def get_tokens_info(self, addresses, refresh=False):
+        self.batches.append(list(addresses))
+        return {
+            address: {'priceUsd': str(self.prices[address])} if self.prices.get(address) else None
+            for address in addresses
+        }
+
+
+def make_feed(prices, **kwargs):
+    monitor = FakeMonitor(prices)
+    feed = PriceFeed(monitor, **kwargs)
+    tracked = set(prices)
+    feed.add_source(lambda: tracked)
+    published = []
+    feed.subscribe(published.append)
+    return feed, monitor, tracked, published
+
+
+def test_publishes_only_changed_prices():
+    async def run():
+        feed, monitor, _, published = make_feed({'0xa': 1.0, '0xb': 2.0}, default_interval=0)
+        first = await feed.poll()
+        monitor.prices['0xb'] = 2.5
+        second = await feed.poll()
+        third = await feed.poll()
+        return first, second, third, published
+    
+    first, second, third, published = asyncio.run(run())
+    assert first == {'0xa': 1.0, '0xb': 2.0}
+    assert second == {'0xb': 2.5}
+    assert third == {}
+    assert published == [first, second]
+
+
+def test_only_due_tokens_are_fetched():
+    async def run():
+        feed, monitor, _, _ = make_feed({'0xa': 1.0, '0xb': 2.0}, default_interval=60, batch_size=1)
+        await feed.poll()
+        monitor.batches.clear()
+        await feed.poll()
+        not_due = list(monitor.batches)
+        feed.set_interval('0xB', 0)
+        await feed.poll()
+        return not_due, monitor.batches, feed.interval('0xb')
+    
+    not_due, batches, interval = asyncio.run(run())
+    assert not_due == []
+    assert batches == [['0xb']]
+    assert interval == 0
+
+
+def test_invalidate_publishes_an_unchanged_price():
+    async def run():
+        feed, _, _, _ = make_feed({'0xa': 1.0}, default_interval=60)
+        await feed.poll()
+        feed.invalidate('0xA')
+        return await feed.poll()
+    
+    assert asyncio.run(run()) == {'0xa': 1.0}
+
+
+def test_failed_lookup_keeps_last_price():
+    async def run():
+        feed, monitor, _, _ = make_feed({'0xa': 1.0}, default_interval=0)
+        await feed.poll()
+        monitor.prices['0xa'] = None
+        changes = await feed.poll()
+        return changes, feed.last_price('0xa')
+    
+    assert asyncio.run(run()) == ({}, 1.0)
+
+
+def test_tracks_source_changes():
+    async def run():
+        feed, monitor, tracked, _ = make_feed({'0xa': 1.0, '0xb': 2.0}, default_interval=0)
+        await feed.poll()
+        tracked.discard('0xb')
+        monitor.batches.clear()
+        await feed.poll()
+        return len(feed), monitor.batches, feed.get('0xb')
+    
+    assert asyncio.run(run()) == (1, [['0xa']], None)
+
+
+def test_last_batch_is_topped_up_with_tokens_due_soonest():
+    async def run():
+        prices = {f"0x{i}": float(i + 1) for i in range(4)}
+        feed, monitor, _, _ = make_feed(prices, default_interval=60, batch_size=3)
+        await feed.poll()
+        feed.invalidate('0x0')
+        monitor.batches.clear()
+        await feed.poll()
+        return monitor.batches
+    
+    [batch] = asyncio.run(run())
+    assert batch[0] == '0x0'
+    assert len(batch) == 3
@@ -0,0 +1,102 @@
+import threading
+
+from price_history import PriceHistory, _Series
+
+TOKEN = '0x' + 'ef' * 20
+
+
+def make_history(path, **kwargs):
+    kwargs.setdefault('sample_capacity', 4)
+    kwargs.setdefault('rollups', {60: 3, 300: 2})
+    kwargs.setdefault('retention', None)
+    return PriceHistory(str(path), **kwargs)
+
+
+def test_sample_ring_wraps_keeping_the_newest(tmp_path):
+    history = make_history(tmp_path)
+    for i in range(6):
+        assert history.record(TOKEN, 1.0 + i, t=1000.0 + i)
+    # Samples not newer than the last one are dropped
+    assert not history.record(TOKEN, 9.0, t=1005.0)
+    
+    assert history.samples(TOKEN) == [(1002.0, 3.0), (1003.0, 4.0), (1004.0, 5.0), (1005.0, 6.0)]
+    assert history.samples(TOKEN, since=1004.0) == [(1004.0, 5.0), (1005.0, 6.0)]
+    assert history.price_range(TOKEN, since=1002.0) == (4.0, 6.0)
+    assert history.price_range(TOKEN, since=1005.0) is None
+    history.close()
+
+
+def test_ohlc_rollups(tmp_path):
+    history = make_history(tmp_path)
+    for t, price in [(0, 10.0), (20, 12.0), (40, 9.0), (59, 11.0), (60, 11.5), (250, 8.0), (310, 7.0)]:
+        history.record(TOKEN, price, t=1_000_020.0 + t)
+    
+    # Four minutes were touched; capacity 3 keeps the newest
+    assert history.ohlc(TOKEN, 60) == [
+        (1_000_080, 11.5, 11.5, 11.5, 11.5),
+        (1_000_260, 8.0, 8.0, 8.0, 8.0),
+        (1_000_320, 7.0, 7.0, 7.0, 7.0),
+    ]
+    
+    [first, second] = history.ohlc(TOKEN, 300)
+    assert first == (999_900, 10.0, 12.0, 9.0, 11.5)
+    assert second == (1_000_200, 8.0, 8.0, 7.0, 7.0)
+    assert history.ohlc(TOKEN, 300, since=1_000_250.0) == [second]
+    history.close()
+
+
+def test_reopen_keeps_history_and_layout(tmp_path):
+    history = make_history(tmp_path)
+    history.record(TOKEN, 1.0, t=1000.0)
+    history.record(TOKEN, 2.0, t=1001.0)
+    history.close()
+    
+    # A different configuration doesn't change an existing file's layout
+    reopened = make_history(tmp_path, sample_capacity=100, rollups={3600: 10})
+    assert reopened.samples(TOKEN) == [(1000.0, 1.0), (1001.0, 2.0)]
+    assert reopened.ohlc(TOKEN, 60) == [(960, 1.0, 2.0, 1.0, 2.0)]
+    reopened.record(TOKEN, 3.0, t=1002.0)
+    assert [price for _, price in reopened.samples(TOKEN)] == [1.0, 2.0, 3.0]
+    reopened.close()
+
+
+def test_opening_a_mapped_file_does_not_truncate_it(tmp_path):
+    path = str(tmp_path / 'token.bin')
+    first = _Series(path, 4, {60: 2})
+    first.append(1000.0, 1.0)
+    
+    # Another process opening the same file sees (and shares) its contents
+    second = _Series(path, 4, {60: 2})
+    assert second.read(0, None) == [(1000.0, 1.0)]
+    second.append(1001.0, 2.0)
+    assert first.read(0, None) == [(1000.0, 1.0), (1001.0, 2.0)]
+    first.close()
+    second.close()
+
+
+def test_concurrent_creation_lays_the_file_out_once(tmp_path):
+    for round_ in range(20):
+        path = str(tmp_path / f"token{round_}.bin")
+        start = threading.Barrier(8)
+        opened = []
+        appended = []
+        
+        def open_and_append(i):
+            start.wait()
+            series = _Series(path, 16, {60: 2})
+            if series.append(1000.0 + i, float(i)):
+                appended.append(1000.0 + i)
+            opened.append(series)
+        
+        threads = [threading.Thread(target=open_and_append, args=(i,)) for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        samples = opened[0].read(0, None)
+        for series in opened:
+            series.close()
+        # Appends older than the last sample are dropped, but none that went in
+        # was wiped by a later opener laying the file out again
+        assert [t for t, _ in samples] == sorted(appended)
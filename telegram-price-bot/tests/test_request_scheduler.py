@@ -0,0 +1,134 @@
+import asyncio
+
+from request_scheduler import (
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_MONITOR,
+    RequestScheduler,
+    TokenBucket,
+    request_priority,
+)
+
+
+class FakeResponse:
+    def __init__(self, status, headers=None):
+        self.status = status
+        self.headers = headers or {}
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, *exc):
+        return False
+    
+    async def json(self):
+        return {'ok': True}
+
+
+class FakeSession:
+    """Answers GETs with a scripted list of (status, headers)."""
+    
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.urls = []
+    
+    def get(self, url, timeout=None):
+        self.urls.append(url)
+        return FakeResponse(*self.responses.pop(0))
+
+
+def test_bucket_serves_waiters_by_priority():
+    async def run():
+        bucket = TokenBucket(rate=50, capacity=1)
+        await bucket.acquire()  # Empty the bucket so everyone queues
+        order = []
+        
+        async def take(name, priority):
+            await bucket.acquire(priority)
+            order.append(name)
+        
+        tasks = [
+            asyncio.create_task(take('background', PRIORITY_BACKGROUND)),
+            asyncio.create_task(take('monitor-1', PRIORITY_MONITOR)),
+            asyncio.create_task(take('monitor-2', PRIORITY_MONITOR)),
+            asyncio.create_task(take('user', PRIORITY_INTERACTIVE)),
+        ]
+        await asyncio.sleep(0)
+        await asyncio.gather(*tasks)
+        return order, len(bucket)
+    
+    order, waiting = asyncio.run(run())
+    # A more urgent waiter takes over the head even from one already waiting for the refill
+    assert order == ['user', 'monitor-1', 'monitor-2', 'background']
+    assert waiting == 0
+
+
+def test_cancelled_waiter_leaves_the_queue():
+    async def run():
+        bucket = TokenBucket(rate=20, capacity=1)
+        await bucket.acquire()
+        head = asyncio.create_task(bucket.acquire(PRIORITY_MONITOR))
+        queued = asyncio.create_task(bucket.acquire(PRIORITY_MONITOR))
+        await asyncio.sleep(0)
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+        await asyncio.wait_for(head, timeout=1)
+        return len(bucket)
+    
+    assert asyncio.run(run()) == 0
+
+
+def test_request_priority_context():
+    async def run():
+        bucket = TokenBucket(rate=1000, capacity=10)
+        seen = []
+        original = bucket.acquire
+        
+        async def acquire(priority=PRIORITY_INTERACTIVE):
+            seen.append(priority)
+            await original(priority)
+        
+        scheduler = RequestScheduler(rate_per_minute=60_000)
+        scheduler.bucket.acquire = acquire
+        session = FakeSession([(200, {}), (200, {})])
+        with request_priority(PRIORITY_BACKGROUND):
+            await scheduler.get_json(session, 'http://x/1')
+        await scheduler.get_json(session, 'http://x/2')
+        return seen
+    
+    assert asyncio.run(run()) == [PRIORITY_BACKGROUND, PRIORITY_INTERACTIVE]
+
+
+def test_429_cuts_the_rate_and_success_recovers_it():
+    async def run():
+        scheduler = RequestScheduler(rate_per_minute=6000, base_backoff=0.001)
+        session = FakeSession([(429, {'Retry-After': '0'}), (429, {}), (200, {})])
+        status, data = await scheduler.get_json(session, 'http://x/tokens')
+        return scheduler, status, data, session
+    
+    scheduler, status, data, session = asyncio.run(run())
+    assert (status, data) == (200, {'ok': True})
+    assert len(session.urls) == 3
+    assert scheduler.throttled == 2
+    assert scheduler.retries == 2
+    # Halved twice, then one additive recovery step
+    assert scheduler.bucket.rate == scheduler.base_rate / 4 + scheduler.base_rate / 20
+
+
+def test_rate_never_drops_below_a_tenth():
+    scheduler = RequestScheduler(rate_per_minute=600, base_backoff=0)
+    for _ in range(10):
+        scheduler._on_throttled(429, '0')
+    assert scheduler.bucket.rate == scheduler.min_rate == scheduler.base_rate / 10
+
+
+def test_gives_up_after_max_retries_on_5xx():
+    async def run():
+        scheduler = RequestScheduler(max_retries=1, base_backoff=0.001)
+        session = FakeSession([(502, {}), (503, {})])
+        return await scheduler.get_json(session, 'http://x/tokens'), scheduler
+    
+    (status, data), scheduler = asyncio.run(run())
+    assert (status, data) == (503, None)
+    # 5xx pauses requests but doesn't cut the rate
+    assert scheduler.bucket.rate == scheduler.base_rate
@@ -0,0 +1,117 @@
+import asyncio
+
+from price_monitor import PriceMonitor
+
+TOKEN_A = '0x' + 'aa' * 20
+TOKEN_B = '0x' + 'bb' * 20
+
+
+class StubDatabase:
+    def get_active_alerts_by_address(self):
+        return {}
+    
+    def subscribe(self, callback):
+        pass
+
+
+def pair(address, price):
+    return {
+        'baseToken': {'address': address, 'name': 'Token', 'symbol': 'TKN'},
+        'quoteToken': {'address': '0xquote', 'name': 'Wrapped Ether', 'symbol': 'WETH'},
+        'priceUsd': str(price),
+        'liquidity': {'usd': 1000},
+        'chainId': 'ethereum',
+        'pairAddress': '0xpair',
+    }
+
+
+class GatedApi:
+    """Stands in for PriceMonitor._get_json; responses wait for ``release()``."""
+    
+    def __init__(self):
+        self.urls = []
+        self.gate = asyncio.Event()
+    
+    def release(self):
+        self.gate.set()
+    
+    async def __call__(self, url, endpoint='other'):
+        self.urls.append(url)
+        await self.gate.wait()
+        addresses = url.rsplit('/', 1)[1].split(',')
+        return {'pairs': [pair(address, 1.5) for address in addresses]}
+
+
+def make_monitor():
+    monitor = PriceMonitor(StubDatabase(), adaptive_polling=False)
+    api = monitor._get_json = GatedApi()
+    return monitor, api
+
+
+def test_concurrent_lookups_share_one_request():
+    async def run():
+        monitor, api = make_monitor()
+        lookups = [asyncio.create_task(monitor.get_token_info(TOKEN_A)) for _ in range(5)]
+        await asyncio.sleep(0)
+        api.release()
+        results = await asyncio.gather(*lookups)
+        return api.urls, results, monitor._inflight
+    
+    urls, results, inflight = asyncio.run(run())
+    assert len(urls) == 1
+    assert all(result is results[0] for result in results)
+    assert results[0]['priceUsd'] == '1.5'
+    assert inflight == {}
+
+
+def test_cancelled_caller_does_not_cancel_the_shared_lookup():
+    async def run():
+        monitor, api = make_monitor()
+        first = asyncio.create_task(monitor.get_token_info(TOKEN_A))
+        second = asyncio.create_task(monitor.get_token_info(TOKEN_A))
+        await asyncio.sleep(0)
+        first.cancel()
+        await asyncio.sleep(0)
+        api.release()
+        result = await second
+        cached = await monitor.get_token_info(TOKEN_A)
+        return first, result, cached, api.urls
+    
+    first, result, cached, urls = asyncio.run(run())
+    assert first.cancelled()
+    assert result['priceUsd'] == '1.5'
+    assert cached is result
+    assert len(urls) == 1
+
+
+def test_lookup_finishes_and_caches_when_every_caller_is_cancelled():
+    async def run():
+        monitor, api = make_monitor()
+        caller = asyncio.create_task(monitor.get_token_info(TOKEN_A))
+        await asyncio.sleep(0)
+        caller.cancel()
+        await asyncio.gather(caller, return_exceptions=True)
+        api.release()
+        while monitor._inflight:
+            await asyncio.sleep(0)
+        return monitor.price_cache.peek(TOKEN_A)
+    
+    assert asyncio.run(run())['priceUsd'] == '1.5'
+
+
+def test_batch_lookup_joins_single_lookup_in_flight():
+    async def run():
+        monitor, api = make_monitor()
+        single = asyncio.create_task(monitor.get_token_info(TOKEN_A))
+        await asyncio.sleep(0)
+        batch = asyncio.create_task(monitor.get_tokens_info([TOKEN_A, TOKEN_B]))
+        await asyncio.sleep(0)
+        api.release()
+        return await single, await batch, api.urls
+    
+    single, batch, urls = asyncio.run(run())
+    assert sorted(batch) == [TOKEN_A, TOKEN_B]
+    assert batch[TOKEN_A] is single
+    # One request for A's single lookup, one batch request for B only
+    assert len(urls) == 2
+    assert urls[1].endswith(f"/dex/tokens/{TOKEN_B}")
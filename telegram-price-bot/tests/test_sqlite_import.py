@@ -0,0 +1,140 @@
+import threading
+
+import pytest
+
+from alert_record import AlertRecord
+from database import Database
+from monitor_workers import HashRing, ShardView
+from sqlite_database import SQLiteDatabase
+
+
+def _alert(user_id, address):
+    return {
+        'user_id': user_id,
+        'contract_address': address,
+        'initial_price': 1.0,
+        'target_price': 2.0,
+        'direction': 'up',
+        'percent': 100,
+    }
+
+
+@pytest.fixture
+def stores(tmp_path):
+    source = Database(data_dir=str(tmp_path / 'json'))
+    target = SQLiteDatabase(str(tmp_path / 'bot.db'))
+    yield source, target
+    target.close()
+    source.close()
+
+
+def test_import_copies_the_json_store(stores):
+    source, target = stores
+    ids = [source.add_alert(_alert(1, f"0xAbC{i}")) for i in range(3)]
+    source.add_to_watchlist(1, {'address': '0xW1', 'symbol': 'ONE'})
+    source.update_user(2, {'language': 'en'})
+    
+    counts = target.import_json_store(source.data_dir)
+    
+    assert counts == {'alerts': 3, 'users': 2, 'watchlist': 1, 'deleted': 0}
+    assert sorted(alert['id'] for alert in target.get_all_active_alerts()) == sorted(ids)
+    assert [entry['symbol'] for entry in target.get_watchlist(1)] == ['ONE']
+    assert sorted(target.get_all_users()) == [1, 2]
+    assert set(target.get_active_alerts_by_address()) == {f"0xabc{i}" for i in range(3)}
+
+
+def test_import_is_not_torn_by_a_concurrent_compaction(stores, monkeypatch):
+    source, target = stores
+    ids = [source.add_alert(_alert(1, f"0xabc{i}")) for i in range(3)]
+    replay = Database._replay_journal
+    compactions = []
+    
+    def replay_after_compaction(db):
+        # Compact the live store between reading the snapshots and the journal
+        if db.read_only:
+            thread = threading.Thread(target=source.compact)
+            thread.start()
+            thread.join(timeout=0.2)
+            compactions.append(thread)
+        return replay(db)
+    
+    monkeypatch.setattr(Database, '_replay_journal', replay_after_compaction)
+    counts = target.import_json_store(source.data_dir)
+    [thread] = compactions
+    thread.join(timeout=5)
+    
+    assert counts['alerts'] == 3
+    assert sorted(alert['id'] for alert in target.get_all_active_alerts()) == sorted(ids)
+    # The compaction ran once the import had loaded the store
+    assert not thread.is_alive()
+    assert sorted(alert['id'] for alert in Database(data_dir=source.data_dir, read_only=True).alerts['1']) == sorted(ids)
+
+
+def test_reimport_mirrors_deletions_and_triggers(stores):
+    source, target = stores
+    ids = [source.add_alert(_alert(1, f"0xabc{i}")) for i in range(3)]
+    source.add_to_watchlist(1, {'address': '0xW1', 'symbol': 'ONE'})
+    source.add_to_watchlist(1, {'address': '0xW2', 'symbol': 'TWO'})
+    target.import_json_store(source.data_dir)
+    
+    source.delete_alert(1, ids[0])
+    source.mark_alert_triggered(ids[1])
+    source.remove_from_watchlist(1, '0xw2')
+    counts = target.import_json_store(source.data_dir)
+    
+    assert counts['deleted'] == 2
+    assert [alert['id'] for alert in target.get_all_active_alerts()] == [ids[2]]
+    assert target.get_alert_by_id(1, ids[0]) is None
+    assert target.get_alert_by_id(1, ids[1])['triggered'] is True
+    assert [entry['symbol'] for entry in target.get_watchlist(1)] == ['ONE']
+    
+    # Importing an unchanged store changes nothing
+    assert target.import_json_store(source.data_dir)['deleted'] == 0
+
+
+def test_shard_view_selects_only_owned_addresses(stores):
+    _, target = stores
+    for i in range(200):
+        target.add_alert(_alert(i % 3, f"0x{i % 50:040x}"))
+    
+    ring = HashRing(3)
+    everything = target.get_active_alerts_by_address()
+    seen = set()
+    for shard in range(3):
+        owned = ShardView(target, ring, shard).get_active_alerts_by_address()
+        assert all(ring.shard_for(address) == shard for address in owned)
+        assert {address: len(alerts) for address, alerts in owned.items()} == {
+            address: len(alerts) for address, alerts in everything.items() if ring.shard_for(address) == shard
+        }
+        seen.update(owned)
+    assert seen == set(everything)
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_mark_alerts_triggered_counts_and_notifies_changed_alerts_only(stores, backend):
+    db = stores[0] if backend == 'json' else stores[1]
+    ids = [db.add_alert(_alert(1, f"0xabc{i}")) for i in range(3)]
+    db.mark_alert_triggered(ids[0])
+    events = []
+    db.subscribe(lambda event, payload: events.append((event, payload)))
+    
+    assert db.mark_alerts_triggered([ids[0], ids[1], ids[1], 'missing']) == 1
+    assert events == [('alert_removed', ids[1])]
+    assert db.mark_alerts_triggered([ids[1]]) == 0
+    assert [alert['id'] for alert in db.get_all_active_alerts()] == [ids[2]]
+
+
+@pytest.mark.parametrize('backend', ['json', 'sqlite'])
+def test_listeners_get_the_same_payloads_from_both_backends(stores, backend):
+    db = stores[0] if backend == 'json' else stores[1]
+    events = []
+    db.subscribe(lambda event, payload: events.append((event, payload)))
+    
+    alert_id = db.add_alert(_alert(1, '0xAbC'))
+    db.delete_alert(1, alert_id)
+    
+    [(added, record), removed] = events
+    assert added == 'alert_added'
+    assert isinstance(record, AlertRecord)
+    assert (record.id, record['contract_address'], record.active) == (alert_id, '0xAbC', True)
+    assert removed == ('alert_removed', alert_id)
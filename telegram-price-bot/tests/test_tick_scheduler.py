@@ -0,0 +1,120 @@
+import time
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import tick_scheduler
+from price_feed import PriceFeed
+from tick_scheduler import TickScheduler
+
+
+class FakeClock:
+    """``time.monotonic`` stand-in; ``sleep`` advances it instead of waiting."""
+    
+    def __init__(self, now=100.0):
+        self.now = now
+        self.sleeps = []
+    
+    def __call__(self):
+        return self.now
+    
+    async def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(tick_scheduler, 'time', SimpleNamespace(monotonic=clock))
+    monkeypatch.setattr(tick_scheduler, 'asyncio', SimpleNamespace(sleep=clock.sleep))
+    return clock
+
+
+def test_deadline_is_budget_into_the_slot(clock):
+    ticks = TickScheduler(interval=5.0, budget=0.8)
+    assert ticks.begin() == 104.0
+    clock.now += 1.5
+    asyncio.run(ticks.wait())
+    # Slept out the rest of the period rather than a full interval after the work
+    assert clock.now == 105.0
+    assert ticks.begin() == 109.0
+    assert (ticks.ticks, ticks.overruns, ticks.skipped) == (2, 0, 0)
+
+
+def test_late_start_gets_what_is_left_of_the_budget(clock):
+    ticks = TickScheduler(interval=5.0, budget=0.8)
+    ticks.begin()
+    asyncio.run(ticks.wait())
+    clock.now += 4.5  # The loop was held up before starting the tick
+    assert ticks.begin() == clock.now
+    assert ticks.lag == 4.5
+
+
+def test_overrun_skips_missed_slots(clock):
+    ticks = TickScheduler(interval=5.0, budget=0.8)
+    ticks.begin()
+    clock.now += 12.0  # Ran past the slots at 105 and 110
+    asyncio.run(ticks.wait())
+    assert (ticks.overruns, ticks.skipped) == (1, 2)
+    assert clock.now == 115.0
+    assert ticks.begin() == 119.0
+    assert ticks.lag == 0.0
+
+
+def test_wait_returns_early_when_stopped(clock):
+    ticks = TickScheduler(interval=5.0)
+    ticks.begin()
+    asyncio.run(ticks.wait(stop=lambda: clock.now >= 102.0))
+    assert clock.now == 102.0
+    assert max(clock.sleeps) <= 1.0
+
+
+def test_rejects_bad_settings():
+    with pytest.raises(ValueError):
+        TickScheduler(interval=0)
+    with pytest.raises(ValueError):
+        TickScheduler(interval=5.0, budget=1.5)
+
+
+class SlowMonitor:
+    """Answers batches containing a token in ``slow`` only once ``release()`` is called."""
+    
+    def __init__(self, prices, slow):
+        self.prices = prices
+        self.slow = slow
+        self.batches = []
+        self.gate = asyncio.Event()
+    
+    def release(self):
+        self.gate.set()
+    
+    async def get_tokens_info(self, addresses, refresh=False):
+        self.batches.append(list(addresses))
+        if self.slow.intersection(addresses):
+            await self.gate.wait()
+        return {address: {'priceUsd': str(self.prices[address])} for address in addresses}
+
+
+def test_batches_past_the_deadline_carry_over():
+    async def run():
+        monitor = SlowMonitor({'0xa': 1.0, '0xb': 2.0}, slow={'0xb'})
+        feed = PriceFeed(monitor, default_interval=0, batch_size=1)
+        feed.add_source(lambda: ['0xa', '0xb'])
+        
+        first = await feed.poll(deadline=time.monotonic() + 0.05)
+        carried = feed.last_carried
+        
+        # The carried batch isn't fetched again while it's still in flight
+        monitor.batches.clear()
+        monitor.release()
+        second = await feed.poll(deadline=time.monotonic() + 1.0)
+        return first, carried, second, monitor.batches, feed.last_carried
+    
+    first, carried, second, batches, carried_after = asyncio.run(run())
+    assert first == {'0xa': 1.0}
+    assert carried == 1
+    assert second == {'0xb': 2.0}
+    assert batches == [['0xa']]
+    assert carried_after == 0
@@ -0,0 +1,159 @@
+import asyncio
+
+from price_monitor import PriceMonitor, SEARCH_LIMIT
+from token_index import TokenIndex
+
+
+def token(n, symbol, name, liquidity=1000):
+    return {'address': f"0x{n:040x}", 'symbol': symbol, 'name': name, 'liquidity': liquidity, 'priceUsd': '1.0'}
+
+
+TOKENS = [
+    token(1, 'PEPE', 'Pepe', liquidity=5000),
+    token(2, 'PEPE', 'Pepe Classic', liquidity=9000),
+    token(3, 'PEPE2', 'Pepe 2.0'),
+    token(4, 'WOJAK', 'Wojak Pepe Friend'),
+    token(5, 'DOGE', 'Dogecoin'),
+]
+
+
+def _symbols(results):
+    return [(meta['symbol'], meta['name']) for meta in results]
+
+
+def test_search_ranks_exact_then_prefix_then_substring(tmp_path):
+    index = TokenIndex(str(tmp_path / 'tokens.json'))
+    index.add_many(TOKENS)
+    
+    assert _symbols(index.search('$pepe')) == [
+        ('PEPE', 'Pepe Classic'),  # Exact symbol, most liquid first
+        ('PEPE', 'Pepe'),
+        ('PEPE2', 'Pepe 2.0'),  # Symbol prefix
+        ('WOJAK', 'Wojak Pepe Friend'),  # Substring of the name
+    ]
+    assert _symbols(index.search('dogec')) == [('DOGE', 'Dogecoin')]
+    assert _symbols(index.search('ecoi')) == [('DOGE', 'Dogecoin')]
+    assert _symbols(index.search(TOKENS[4]['address'].upper())) == [('DOGE', 'Dogecoin')]
+    assert index.search('pepe', limit=2) == index.search('pepe')[:2]
+    assert index.search('zzz') == []
+    assert index.resolve_symbol('pepe') == TOKENS[1]['address']
+    index.close()
+
+
+def test_renamed_token_is_reindexed(tmp_path):
+    index = TokenIndex(str(tmp_path / 'tokens.json'))
+    index.add(token(1, 'OLD', 'Old Name'))
+    index.add(token(1, 'NEW', 'New Name'))
+    
+    assert index.search('old') == []
+    assert _symbols(index.search('new')) == [('NEW', 'New Name')]
+    assert len(index) == 1
+    index.close()
+
+
+def test_journal_is_replayed_after_an_unfinished_rotation(tmp_path):
+    path = str(tmp_path / 'tokens.json')
+    index = TokenIndex(path)
+    index.add_many(TOKENS[:2])
+    index.compact()
+    index.add(TOKENS[2])
+    # Crash mid-compaction: journal rotated aside, snapshot never rewritten
+    index._journal.rotate(index.rotated_journal_path)
+    index.add(TOKENS[3])
+    index._journal.close()
+    
+    reopened = TokenIndex(path)
+    assert len(reopened) == 4
+    assert _symbols(reopened.search('pepe2')) == [('PEPE2', 'Pepe 2.0')]
+    assert _symbols(reopened.search('friend')) == [('WOJAK', 'Wojak Pepe Friend')]
+    reopened.close()
+    
+    # Closing compacts everything into the snapshot
+    assert len(TokenIndex(path)) == 4
+
+
+class StubDatabase:
+    def get_active_alerts_by_address(self):
+        return {}
+    
+    def subscribe(self, callback):
+        pass
+
+
+class FakeApi:
+    """Stands in for PriceMonitor._get_json: serves searches and token lookups."""
+    
+    def __init__(self, known, search_tokens):
+        self.known = known
+        self.search_tokens = search_tokens
+        self.urls = []
+    
+    @staticmethod
+    def pair(info):
+        return {
+            'baseToken': {'address': info['address'], 'name': info['name'], 'symbol': info['symbol']},
+            'priceUsd': info['priceUsd'],
+            'liquidity': {'usd': info['liquidity']},
+        }
+    
+    async def __call__(self, url, endpoint='other'):
+        self.urls.append(url)
+        if endpoint == 'search':
+            return {'pairs': [self.pair(info) for info in self.search_tokens]}
+        addresses = url.rsplit('/', 1)[1].split(',')
+        return {'pairs': [self.pair(info) for info in self.known if info['address'] in addresses]}
+
+
+def make_monitor(tmp_path, known, search_tokens=()):
+    index = TokenIndex(str(tmp_path / 'tokens.json'))
+    index.add_many(known)
+    monitor = PriceMonitor(StubDatabase(), adaptive_polling=False, token_index=index)
+    api = monitor._get_json = FakeApi(list(known) + list(search_tokens), list(search_tokens))
+    return monitor, api
+
+
+def _searched(api):
+    return [url for url in api.urls if '/dex/search' in url]
+
+
+def test_exact_symbol_match_is_answered_locally(tmp_path):
+    async def run():
+        monitor, api = make_monitor(tmp_path, TOKENS, search_tokens=[token(9, 'PEPE', 'Other Pepe')])
+        results = await monitor.search_tokens('PEPE')
+        by_address = await monitor.search_tokens(TOKENS[4]['address'])
+        return results, by_address, api
+    
+    results, by_address, api = asyncio.run(run())
+    assert _symbols(results)[:2] == [('PEPE', 'Pepe Classic'), ('PEPE', 'Pepe')]
+    assert _symbols(by_address) == [('DOGE', 'Dogecoin')]
+    assert _searched(api) == []
+
+
+def test_partial_local_match_is_merged_with_dexscreener(tmp_path):
+    async def run():
+        monitor, api = make_monitor(
+            tmp_path, TOKENS[:3],
+            search_tokens=[token(3, 'PEPE2', 'Pepe 2.0'), token(9, 'PEPEX', 'Pepe X')],
+        )
+        results = await monitor.search_tokens('pep')
+        return results, api, monitor.token_index
+    
+    results, api, index = asyncio.run(run())
+    assert len(_searched(api)) == 1
+    # Local matches first, in the index's order, then new tokens from the search
+    assert _symbols(results) == [
+        ('PEPE', 'Pepe Classic'), ('PEPE', 'Pepe'), ('PEPE2', 'Pepe 2.0'), ('PEPEX', 'Pepe X'),
+    ]
+    # The search fed the index
+    assert _symbols(index.search('pepex')) == [('PEPEX', 'Pepe X')]
+
+
+def test_full_page_of_local_matches_skips_the_search(tmp_path):
+    async def run():
+        known = [token(100 + i, f"MOON{i}", f"Moon {i}") for i in range(SEARCH_LIMIT)]
+        monitor, api = make_monitor(tmp_path, known)
+        return await monitor.search_tokens('moon'), api
+    
+    results, api = asyncio.run(run())
+    assert len(results) == SEARCH_LIMIT
+    assert _searched(api) == []
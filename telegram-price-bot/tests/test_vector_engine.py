@@ -0,0 +1,150 @@
+import random
+
+import pytest
+
+from alert_engine import AlertEngine
+
+np = pytest.importorskip('numpy')
+
+import vector_engine  # noqa: E402
+from vector_engine import VectorAlertEngine  # noqa: E402
+
+TOKENS = [f"0x{i:040x}" for i in range(40)]
+
+
+def make_alerts(rng, count, prefix='a'):
+    """Random alerts of every direction, with and without a creation time."""
+    base = {address: 10 ** rng.uniform(-6, 3) for address in TOKENS}
+    alerts = {address: [] for address in TOKENS}
+    for i in range(count):
+        address = rng.choice(TOKENS)
+        initial = base[address] * rng.uniform(0.9, 1.1)
+        direction = rng.choice(['up', 'down', 'any'])
+        percent = rng.choice([5, 10, 20, 50])
+        if direction == 'up':
+            target = initial * (1 + percent / 100)
+        elif direction == 'down':
+            target = initial * (1 - percent / 100)
+        else:
+            target = percent
+        alerts[address].append({
+            'id': f"{prefix}{i}",
+            'user_id': i % 7,
+            'contract_address': address,
+            'initial_price': initial,
+            'target_price': target,
+            'direction': direction,
+            'percent': percent,
+            'created_at': rng.choice([1000.0, 2000.0, None]),
+        })
+    return alerts, base
+
+
+def random_tick(rng, base, tokens):
+    prices = {address: base[address] * rng.uniform(0.8, 1.2) for address in tokens}
+    ranges = {
+        address: (price * rng.uniform(0.6, 1.0), price * rng.uniform(1.0, 1.5), rng.choice([500.0, 1500.0, 2500.0]))
+        for address, price in prices.items()
+        if rng.random() < 0.7
+    }
+    return prices, ranges
+
+
+def outcome(triggered):
+    return {
+        alert['id']: (alert['current_price'], alert['trigger_price'], round(alert['actual_change'], 9))
+        for alert in triggered
+    }
+
+
+@pytest.fixture
+def engines():
+    rng = random.Random(7)
+    alerts, base = make_alerts(rng, 3000)
+    heap, vector = AlertEngine(), VectorAlertEngine()
+    heap.load(alerts)
+    vector.load(alerts)
+    return rng, alerts, base, heap, vector
+
+
+def test_full_ticks_match(engines):
+    rng, _, base, heap, vector = engines
+    triggered = 0
+    for _ in range(6):
+        prices, ranges = random_tick(rng, base, TOKENS)
+        expected = outcome(heap.evaluate_many(prices, ranges))
+        assert outcome(vector.evaluate_many(prices, ranges)) == expected
+        triggered += len(expected)
+    assert triggered > 0
+    assert len(vector) == len(heap)
+    assert sorted(vector.addresses()) == sorted(heap.addresses())
+
+
+def test_partial_ticks_match(engines):
+    # Batches touching a few tokens take the gathered-slots path
+    rng, _, base, heap, vector = engines
+    for _ in range(30):
+        prices, ranges = random_tick(rng, base, rng.sample(TOKENS, rng.choice([1, 3, 8])))
+        assert outcome(vector.evaluate_many(prices, ranges)) == outcome(heap.evaluate_many(prices, ranges))
+    assert len(vector) == len(heap)
+
+
+def test_range_only_counts_for_alerts_older_than_since(engines):
+    _, _, _, heap, vector = engines
+    alert = {
+        'id': 'young',
+        'user_id': 1,
+        'contract_address': TOKENS[0],
+        'initial_price': 100.0,
+        'target_price': 110.0,
+        'direction': 'up',
+        'percent': 10,
+        'created_at': 3000.0,
+    }
+    for engine in (heap, vector):
+        engine.load({})
+        engine.add(alert)
+        # The wick to 120 happened before the alert was created
+        assert engine.evaluate(TOKENS[0], 105.0, (100.0, 120.0, 2500.0)) == []
+        triggered = engine.evaluate(TOKENS[0], 105.0, (100.0, 120.0, 3500.0))
+        assert [(a['id'], a['trigger_price'], a['current_price']) for a in triggered] == [('young', 120.0, 105.0)]
+
+
+def test_churn_with_compaction_matches(engines, monkeypatch):
+    monkeypatch.setattr(vector_engine, 'COMPACT_MIN_FREE', 64)
+    rng, alerts, base, heap, vector = engines
+    ids = [alert['id'] for token_alerts in alerts.values() for alert in token_alerts]
+    rng.shuffle(ids)
+    for alert_id in ids[:2500]:
+        heap.remove(alert_id)
+        vector.remove(alert_id)
+    assert vector._size < 3000
+    
+    extra, _ = make_alerts(rng, 500, prefix='b')
+    for token_alerts in extra.values():
+        for alert in token_alerts:
+            heap.add(alert)
+            vector.add(alert)
+    
+    for _ in range(6):
+        prices, ranges = random_tick(rng, base, TOKENS)
+        assert outcome(vector.evaluate_many(prices, ranges)) == outcome(heap.evaluate_many(prices, ranges))
+    assert len(vector) == len(heap)
+    assert sorted(vector.addresses()) == sorted(heap.addresses())
+
+
+def test_token_ids_are_recycled():
+    vector = VectorAlertEngine()
+    alert = {
+        'user_id': 1,
+        'initial_price': 1.0,
+        'target_price': 2.0,
+        'direction': 'up',
+        'percent': 100,
+    }
+    for i in range(100):
+        vector.add({**alert, 'id': f"a{i}", 'contract_address': f"0x{i:040x}"})
+        vector.remove(f"a{i}")
+    
+    assert len(vector._token_addresses) == 1
+    assert vector.addresses() == []
@@ -0,0 +1,88 @@
+import time
+import asyncio
+import logging
+from typing import Callable, Optional
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Default tick period (seconds) and the fraction of it a tick may spend polling
+DEFAULT_TICK_INTERVAL = 5.0
+DEFAULT_TICK_BUDGET = 0.8
+
+TICK_LAG_SECONDS = metrics.histogram('monitor_tick_lag_seconds', 'How late monitor ticks start against their schedule')
+TICK_OVERRUNS = metrics.counter('monitor_tick_overruns_total', 'Monitor ticks that ran past the next scheduled tick')
+TICKS_SKIPPED = metrics.counter('monitor_ticks_skipped_total', 'Scheduled monitor ticks dropped after an overrun')
+
+
+class TickScheduler:
+    """Fixed-cadence clock for the monitor loop.
+    
+    Ticks are scheduled at ``start + k * interval`` rather than "sleep after
+    the work", so the period doesn't stretch as ticks get slower. Each tick
+    gets a deadline ``budget`` of the way into its slot. A tick that runs
+    past the next slot is counted as an overrun and the missed slots are
+    skipped (ticks never overlap or bunch up to catch up).
+    
+    Usage::
+    
+        ticks = TickScheduler(5.0)
+        while True:
+            deadline = ticks.begin()
+            await do_work(deadline)
+            await ticks.wait()
+    """
+    
+    def __init__(self, interval: float = DEFAULT_TICK_INTERVAL, budget: float = DEFAULT_TICK_BUDGET):
+        if interval <= 0 or not 0 < budget <= 1:
+            raise ValueError("Tick interval must be positive and budget in (0, 1]")
+        self.interval = interval
+        self.budget = budget
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+        self.lag = 0.0  # How late the current tick started (seconds)
+        self._slot: Optional[float] = None
+    
+    def begin(self) -> float:
+        """
+        Start a tick.
+        
+        Returns:
+            ``time.monotonic()`` deadline for the tick's work
+        """
+        now = time.monotonic()
+        if self._slot is None:
+            self._slot = now
+        
+        self.ticks += 1
+        self.lag = max(0.0, now - self._slot)
+        TICK_LAG_SECONDS.observe(self.lag)
+        return max(now, self._slot + self.interval * self.budget)
+    
+    async def wait(self, stop: Optional[Callable[[], bool]] = None) -> None:
+        """
+        Sleep until the next scheduled tick.
+        
+        Args:
+            stop: Polled at least once a second; returns early once it's true
+        """
+        now = time.monotonic()
+        next_slot = self._slot + self.interval
+        
+        if now > next_slot:
+            missed = int((now - next_slot) // self.interval) + 1
+            self.overruns += 1
+            self.skipped += missed
+            TICK_OVERRUNS.inc()
+            TICKS_SKIPPED.inc(missed)
+            logger.warning(
+                f"Monitor tick took {now - self._slot:.2f}s (period {self.interval:g}s), "
+                f"skipping {missed} tick(s)"
+            )
+            next_slot += missed * self.interval
+        
+        self._slot = next_slot
+        while (stop is None or not stop()) and time.monotonic() < next_slot:
+            await asyncio.sleep(min(1.0, next_slot - time.monotonic()))
@@ -0,0 +1,279 @@
+import bisect
+import heapq
+import json
+import os
+import logging
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Any
+from threading import Lock, Thread
+
+from journal import Journal, atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# Fold the journal into the snapshot once it grows past this
+COMPACT_MAX_BYTES = 1024 * 1024
+
+# Token info fields kept in the index (prices are not: they go stale)
+META_FIELDS = ('address', 'name', 'symbol', 'chain', 'dex', 'pairAddress', 'quoteToken', 'url')
+
+# Search match classes, best first
+_EXACT_SYMBOL, _EXACT_NAME, _SYMBOL_PREFIX, _NAME_PREFIX, _SUBSTRING = range(5)
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def _liquidity(token_info: Dict[str, Any]) -> float:
+    try:
+        return float(token_info.get('liquidity') or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class TokenIndex:
+    """Persistent local index of token metadata, searchable by symbol and name.
+    
+    Every token the bot looks up is remembered by address (name, symbol,
+    chain, DEX, pair, quote token). Lowercased symbols and names are kept
+    in a sorted list for prefix search, and their trigrams in an inverted
+    index for substring search. Repeat searches and symbol lookups are
+    answered from memory instead of a DexScreener round trip.
+    
+    New and changed tokens are appended to a journal (``tokens.log``).
+    Once it passes ``COMPACT_MAX_BYTES`` it is rotated aside, a snapshot
+    (``tokens.json``) is written in the background and the rotated journal
+    is dropped, the same way ``Database.compact`` does it. Liquidity is
+    kept for ranking but only saved with a metadata change.
+    """
+    
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Snapshot file (the journal sits next to it)
+        """
+        self.path = path
+        self.journal_path = f"{os.path.splitext(path)[0]}.log"
+        self.rotated_journal_path = f"{self.journal_path}.1"
+        self.lock = Lock()
+        self._compact_lock = Lock()
+        self._compacting = False
+        self._tokens: Dict[str, Dict[str, Any]] = {}  # Lowercased address -> metadata
+        self._keys: List[Tuple[str, str]] = []  # Sorted (lowercased symbol or name, address)
+        self._trigrams: Dict[str, Set[str]] = {}
+        
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._load()
+        self._journal = Journal(self.journal_path)
+    
+    def __len__(self) -> int:
+        return len(self._tokens)
+    
+    # ==================== PERSISTENCE ====================
+    
+    def _load(self) -> None:
+        """Load the snapshot and replay the rotated and current journals on top."""
+        tokens: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                tokens = json.load(f)
+        except FileNotFoundError:
+            pass
+        except json.JSONDecodeError as e:
+            logger.error(f"Corrupt token index {self.path}, starting empty: {e}")
+        
+        # A rotated journal is left over if a compaction never finished
+        for path in [self.rotated_journal_path, self.journal_path]:
+            for record in Journal.replay(path):
+                meta = record.get('token')
+                if record.get('op') == 'token' and meta:
+                    tokens[meta['address'].lower()] = meta
+        
+        for meta in tokens.values():
+            self._index(meta, sort=False)
+        self._keys.sort()
+        logger.info(f"Token index loaded: {len(self._tokens)} tokens")
+    
+    def compact(self) -> None:
+        """Write an atomic snapshot of the index and truncate the journal."""
+        with self._compact_lock:
+            with self.lock:
+                serialized = json.dumps(self._tokens, separators=(',', ':'), default=str)
+                self._journal.rotate(self.rotated_journal_path)
+            
+            # Only the journal rotated above is dropped, once the snapshot is on disk
+            atomic_write_json(self.path, None, serialized=serialized)
+            os.remove(self.rotated_journal_path)
+            logger.debug("Token index journal compacted")
+    
+    def _compact_in_background(self) -> None:
+        try:
+            self.compact()
+        except Exception as e:
+            logger.error(f"Token index compaction failed: {e}")
+        finally:
+            self._compacting = False
+    
+    def close(self) -> None:
+        """Compact and close the journal."""
+        if self._journal.size > 0:
+            self.compact()
+        self._journal.close()
+    
+    # ==================== INDEXING ====================
+    
+    def _index(self, meta: Dict[str, Any], sort: bool = True) -> None:
+        address = meta['address'].lower()
+        self._tokens[address] = meta
+        for key in self._text_keys(meta):
+            if sort:
+                bisect.insort(self._keys, (key, address))
+            else:
+                self._keys.append((key, address))
+            for gram in _trigrams(key):
+                postings = self._trigrams.get(gram)
+                if postings is None:
+                    self._trigrams[gram] = {address}
+                else:
+                    postings.add(address)
+    
+    def _unindex(self, address: str) -> None:
+        meta = self._tokens.pop(address)
+        for key in self._text_keys(meta):
+            i = bisect.bisect_left(self._keys, (key, address))
+            if i < len(self._keys) and self._keys[i] == (key, address):
+                del self._keys[i]
+            for gram in _trigrams(key):
+                postings = self._trigrams.get(gram)
+                if postings is not None:
+                    postings.discard(address)
+                    if not postings:
+                        del self._trigrams[gram]
+    
+    @staticmethod
+    def _text_keys(meta: Dict[str, Any]) -> Set[str]:
+        return {key for key in (str(meta.get('symbol') or '').lower(), str(meta.get('name') or '').lower()) if key}
+    
+    def add(self, token_info: Dict[str, Any]) -> None:
+        """
+        Remember a token's metadata.
+        
+        Cheap when nothing changed, so it can be called on every lookup.
+        
+        Args:
+            token_info: Token info as returned by ``PriceMonitor.get_token_info``
+        """
+        address = token_info.get('address')
+        if not address:
+            return
+        key = address.lower()
+        
+        with self.lock:
+            meta = self._tokens.get(key)
+            if meta is not None and all(meta.get(field) == token_info.get(field) for field in META_FIELDS):
+                meta['liquidity'] = _liquidity(token_info)
+                return
+            
+            if meta is not None:
+                self._unindex(key)
+            meta = {field: token_info.get(field) for field in META_FIELDS}
+            meta['liquidity'] = _liquidity(token_info)
+            self._index(meta)
+            self._journal.append({'op': 'token', 'token': meta})
+            
+            compact = not self._compacting and self._journal.size >= COMPACT_MAX_BYTES
+            if compact:
+                self._compacting = True
+        
+        if compact:
+            Thread(target=self._compact_in_background, name='token-index-compaction', daemon=True).start()
+    
+    def add_many(self, token_infos: Iterable[Optional[Dict[str, Any]]]) -> None:
+        """Remember several tokens (None entries are skipped)."""
+        for token_info in token_infos:
+            if token_info:
+                self.add(token_info)
+    
+    # ==================== LOOKUPS ====================
+    
+    def get(self, address: str) -> Optional[Dict[str, Any]]:
+        """Metadata of a token by address."""
+        meta = self._tokens.get(address.lower())
+        return dict(meta) if meta else None
+    
+    def search(self, query: str, limit: int = 20) -> List[Dict[str, Any]]:
+        """
+        Find known tokens by address, symbol or name.
+        
+        Exact symbol matches come first, then exact names, symbol and name
+        prefixes, and finally substrings of either; ties go to the most
+        liquid token.
+        
+        Args:
+            query: Address, symbol (``$`` prefix optional) or part of a name
+            limit: Maximum number of results
+            
+        Returns:
+            Token metadata dictionaries, best match first
+        """
+        q = query.strip().lower()
+        if q.startswith('$'):
+            q = q[1:]
+        if not q:
+            return []
+        
+        with self.lock:
+            if q in self._tokens:
+                return [dict(self._tokens[q])]
+            
+            ranks: Dict[str, int] = {}
+            
+            def consider(address: str, rank: int) -> None:
+                if rank < ranks.get(address, _SUBSTRING + 1):
+                    ranks[address] = rank
+            
+            i = bisect.bisect_left(self._keys, (q, ''))
+            while i < len(self._keys) and self._keys[i][0].startswith(q):
+                key, address = self._keys[i]
+                meta = self._tokens[address]
+                is_symbol = key == str(meta.get('symbol') or '').lower()
+                if key == q:
+                    consider(address, _EXACT_SYMBOL if is_symbol else _EXACT_NAME)
+                else:
+                    consider(address, _SYMBOL_PREFIX if is_symbol else _NAME_PREFIX)
+                i += 1
+            
+            if len(q) >= 3:
+                postings = sorted((self._trigrams.get(gram, set()) for gram in _trigrams(q)), key=len)
+                candidates = set(postings[0]).intersection(*postings[1:]) if postings else set()
+                for address in candidates:
+                    if address not in ranks and any(q in key for key in self._text_keys(self._tokens[address])):
+                        ranks[address] = _SUBSTRING
+            
+            best = heapq.nsmallest(limit, ranks, key=lambda a: (ranks[a], -self._tokens[a].get('liquidity', 0)))
+            return [dict(self._tokens[address]) for address in best]
+    
+    def resolve_symbol(self, symbol: str) -> Optional[str]:
+        """
+        Address of the most liquid known token with exactly this symbol.
+        
+        Args:
+            symbol: Token symbol, case-insensitive (``$`` prefix optional)
+            
+        Returns:
+            Contract address, or None if no known token has that symbol
+        """
+        q = symbol.strip().lower()
+        if q.startswith('$'):
+            q = q[1:]
+        
+        with self.lock:
+            best = None
+            i = bisect.bisect_left(self._keys, (q, ''))
+            while i < len(self._keys) and self._keys[i][0] == q:
+                meta = self._tokens[self._keys[i][1]]
+                if str(meta.get('symbol') or '').lower() == q:
+                    if best is None or meta.get('liquidity', 0) > best.get('liquidity', 0):
+                        best = meta
+                i += 1
+            return best['address'] if best else None
@@ -0,0 +1,348 @@
+import logging
+from itertools import chain
+from typing import Dict, List, Optional, Set, Tuple, Union, Any
+from threading import Lock
+
+from alert_record import AlertRecord
+
+try:
+    import numpy as np
+except ImportError:  # Optional dependency, only needed for ALERT_ENGINE=numpy
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Direction codes (``alert_record.Direction`` values)
+DIR_INVALID, DIR_UP, DIR_DOWN, DIR_ANY = -1, 0, 1, 2
+
+# Up to this share of all slots, a tick gathers only the changed tokens'
+# alerts; above it one pass over every slot is cheaper
+GATHER_MAX_SHARE = 0.25
+
+# Rebuild the arrays once more than half the slots (and at least this many) are free
+COMPACT_MIN_FREE = 1024
+
+
+class VectorAlertEngine:
+    """Column-oriented alert engine evaluated with NumPy.
+    
+    Alerts are stored in parallel arrays (initial price, target price,
+    direction code, percent, creation time, token index, active flag). A
+    tick gathers each alert's current price (and the token's low/high since
+    its last evaluation) through its token index and builds one boolean
+    mask per direction, so evaluating every token costs a handful of
+    vectorized operations instead of a Python loop per alert. A per-token
+    slot index lets a tick that only touches a few tokens gather just their
+    alerts. Results are identical to ``alert_engine.AlertEngine``.
+    
+    Removed slots and the ids of tokens without alerts are recycled, and the
+    arrays are rebuilt smaller once most slots are free.
+    """
+    
+    def __init__(self, capacity: int = 1024):
+        if np is None:
+            raise RuntimeError("VectorAlertEngine requires numpy (pip install numpy)")
+        
+        self.lock = Lock()
+        self._reset_locked(capacity)
+    
+    def _reset_locked(self, capacity: int) -> None:
+        self._size = 0
+        self._free: List[int] = []
+        self._allocate(capacity)
+        
+        self._alerts: List[Optional[AlertRecord]] = [None] * capacity
+        self._slot_by_id: Dict[str, int] = {}
+        
+        self._token_index: Dict[str, int] = {}
+        self._token_addresses: List[Optional[str]] = []
+        self._token_slots: List[Set[int]] = []
+        self._free_tokens: List[int] = []
+    
+    def _allocate(self, capacity: int) -> None:
+        self.initial_price = np.zeros(capacity, dtype=np.float64)
+        self.target_price = np.zeros(capacity, dtype=np.float64)
+        self.percent = np.zeros(capacity, dtype=np.float64)
+        self.created_at = np.zeros(capacity, dtype=np.float64)
+        self.direction = np.full(capacity, DIR_INVALID, dtype=np.int8)
+        self.token = np.zeros(capacity, dtype=np.int32)
+        self.active = np.zeros(capacity, dtype=bool)
+    
+    def _grow(self) -> None:
+        capacity = len(self.initial_price) * 2
+        for name in ('initial_price', 'target_price', 'percent', 'created_at', 'direction', 'token', 'active'):
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=old.dtype)
+            if name == 'direction':
+                new.fill(DIR_INVALID)
+            new[:len(old)] = old
+            setattr(self, name, new)
+        self._alerts.extend([None] * (capacity - len(self._alerts)))
+    
+    def __len__(self) -> int:
+        return len(self._slot_by_id)
+    
+    def addresses(self) -> List[str]:
+        """Lowercased addresses of tokens that have active alerts."""
+        with self.lock:
+            return [addr for addr, slots in zip(self._token_addresses, self._token_slots) if slots]
+    
+    def load(self, alerts_by_address: Dict[str, List[Dict[str, Any]]]) -> None:
+        """Replace the engine contents with the given active alerts."""
+        with self.lock:
+            self._reset_locked(max(1024, sum(len(alerts) for alerts in alerts_by_address.values())))
+            for alerts in alerts_by_address.values():
+                for alert in alerts:
+                    self._add_locked(alert)
+    
+    def add(self, alert: Dict[str, Any]) -> None:
+        """Store an active alert."""
+        with self.lock:
+            self._add_locked(alert)
+    
+    def remove(self, alert_id: str) -> None:
+        """Drop an alert."""
+        with self.lock:
+            self._remove_locked(alert_id)
+            self._maybe_compact_locked()
+    
+    def on_db_event(self, event: str, payload: Any) -> None:
+        """Database listener keeping the engine in sync (see ``Database.subscribe``)."""
+        if event == 'alert_added':
+            self.add(payload)
+        elif event == 'alert_removed':
+            self.remove(payload)
+    
+    def _add_locked(self, alert: Any) -> None:
+        alert = AlertRecord.coerce(alert)
+        alert_id = alert.id
+        if alert_id in self._slot_by_id:
+            self._remove_locked(alert_id)
+        
+        initial_price = alert.initial_price
+        target_price = alert.target_price
+        percent = alert.percent or 0.0
+        if initial_price is None or target_price is None:
+            logger.warning(f"Not indexing alert {alert_id}: unparseable prices")
+            return
+        
+        direction = DIR_INVALID if alert.direction is None else int(alert.direction)
+        if initial_price == 0 or direction == DIR_INVALID:
+            # Can never trigger
+            return
+        
+        address = alert.address_key
+        token = self._token_index.get(address)
+        if token is None:
+            if self._free_tokens:
+                token = self._free_tokens.pop()
+                self._token_addresses[token] = address
+            else:
+                token = len(self._token_addresses)
+                self._token_addresses.append(address)
+                self._token_slots.append(set())
+            self._token_index[address] = token
+        
+        if self._free:
+            slot = self._free.pop()
+        else:
+            if self._size == len(self.initial_price):
+                self._grow()
+            slot = self._size
+            self._size += 1
+        
+        self.initial_price[slot] = initial_price
+        self.target_price[slot] = target_price
+        self.percent[slot] = percent
+        self.created_at[slot] = np.inf if alert.created_at is None else alert.created_at
+        self.direction[slot] = direction
+        self.token[slot] = token
+        self.active[slot] = True
+        
+        self._alerts[slot] = alert
+        self._slot_by_id[alert_id] = slot
+        self._token_slots[token].add(slot)
+    
+    def _remove_locked(self, alert_id: str) -> None:
+        slot = self._slot_by_id.pop(alert_id, None)
+        if slot is None:
+            return
+        self.active[slot] = False
+        self._alerts[slot] = None
+        self._free.append(slot)
+        
+        token = int(self.token[slot])
+        slots = self._token_slots[token]
+        slots.discard(slot)
+        if not slots:
+            # Last alert of the token: recycle its id
+            del self._token_index[self._token_addresses[token]]
+            self._token_addresses[token] = None
+            self._free_tokens.append(token)
+    
+    def _maybe_compact_locked(self) -> None:
+        """Rebuild the arrays without free slots once most of them are free."""
+        free = len(self._free)
+        if free < COMPACT_MIN_FREE or free <= self._size // 2:
+            return
+        alerts = [alert for alert in self._alerts[:self._size] if alert is not None]
+        self._reset_locked(max(1024, 2 * len(alerts)))
+        for alert in alerts:
+            self._add_locked(alert)
+        logger.debug(f"Compacted alert arrays to {len(alerts)} alerts ({free} free slots dropped)")
+    
+    def _select_slots(self, tokens: List[int]) -> Union[slice, 'np.ndarray']:
+        """Slots to evaluate for the given tokens: theirs, or all if most are."""
+        count = sum(len(self._token_slots[token]) for token in tokens)
+        if count > self._size * GATHER_MAX_SHARE:
+            return slice(0, self._size)
+        return np.fromiter(
+            chain.from_iterable(self._token_slots[token] for token in tokens),
+            dtype=np.intp,
+            count=count,
+        )
+    
+    def trigger_distances(self, prices: Dict[str, Optional[float]]) -> Dict[str, float]:
+        """
+        Relative distance from each price to the token's nearest trigger.
+        
+        Args:
+            prices: Dict mapping token address to current price
+            
+        Returns:
+            Dict mapping lowercased address to distance as a fraction of the
+            price (0 if a trigger is already crossed), for tokens with alerts
+        """
+        with self.lock:
+            n = self._size
+            if n == 0:
+                return {}
+            
+            token_prices = np.full(len(self._token_addresses), np.nan)
+            changed = []
+            for address, current_price in prices.items():
+                token = self._token_index.get(address.lower())
+                if token is not None and current_price:
+                    token_prices[token] = current_price
+                    changed.append(token)
+            
+            slots = self._select_slots(changed)
+            tokens = self.token[slots]
+            current = token_prices[tokens]
+            initial = self.initial_price[slots]
+            target = self.target_price[slots]
+            margin = np.abs(initial) * self.percent[slots] / 100
+            direction = self.direction[slots]
+            
+            distance = np.select(
+                [direction == DIR_UP, direction == DIR_DOWN, direction == DIR_ANY],
+                [target - current, current - target,
+                 np.minimum(initial + margin - current, current - (initial - margin))],
+                default=np.inf,
+            ) / current
+            distance[~self.active[slots] | np.isnan(current)] = np.inf
+            
+            nearest = np.full(len(self._token_addresses), np.inf)
+            np.minimum.at(nearest, tokens, distance)
+            
+            return {
+                self._token_addresses[token]: max(0.0, float(nearest[token]))
+                for token in np.flatnonzero(np.isfinite(nearest)).tolist()
+            }
+    
+    def evaluate(
+        self,
+        address: str,
+        current_price: float,
+        price_range: Optional[Tuple[float, float, float]] = None,
+    ) -> List[Dict[str, Any]]:
+        """Evaluate a single token; see ``evaluate_many``."""
+        return self.evaluate_many({address: current_price}, {address: price_range} if price_range else None)
+    
+    def evaluate_many(
+        self,
+        prices: Dict[str, Optional[float]],
+        ranges: Optional[Dict[str, Tuple[float, float, float]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Evaluate a tick's worth of token prices in one vectorized pass.
+        
+        Triggered alerts are removed and returned as copies with
+        ``current_price``, ``trigger_price`` and ``actual_change`` filled in.
+        
+        Args:
+            prices: Dict mapping token address to current price (None/0 skipped)
+            ranges: Optional dict mapping token address to the
+                ``(low, high, since)`` seen since its last evaluation
+                
+        Returns:
+            Triggered alert dictionaries
+        """
+        ranges = ranges or {}
+        with self.lock:
+            n = self._size
+            if n == 0:
+                return []
+            
+            token_count = len(self._token_addresses)
+            token_prices = np.full(token_count, np.nan)
+            token_low = np.full(token_count, np.nan)
+            token_high = np.full(token_count, np.nan)
+            token_since = np.full(token_count, -np.inf)
+            changed = []
+            for address, current_price in prices.items():
+                token = self._token_index.get(address.lower())
+                if token is not None and current_price:
+                    changed.append(token)
+                    token_prices[token] = token_low[token] = token_high[token] = current_price
+                    price_range = ranges.get(address)
+                    if price_range is not None:
+                        token_low[token] = min(current_price, price_range[0])
+                        token_high[token] = max(current_price, price_range[1])
+                        token_since[token] = price_range[2]
+            
+            slots = self._select_slots(changed)
+            tokens = self.token[slots]
+            current = token_prices[tokens]
+            # Prices from before an alert existed don't count
+            young = self.created_at[slots] > token_since[tokens]
+            low = np.where(young, current, token_low[tokens])
+            high = np.where(young, current, token_high[tokens])
+            initial = self.initial_price[slots]
+            target = self.target_price[slots]
+            percent = self.percent[slots]
+            direction = self.direction[slots]
+            
+            with np.errstate(invalid='ignore', divide='ignore'):
+                change_high = ((high - initial) / initial) * 100
+                change_low = ((low - initial) / initial) * 100
+                
+                # Same order as the heap engine: an "any" alert crossed on
+                # both sides reports the high
+                hit_high = (
+                    ((direction == DIR_UP) & (high >= target))
+                    | ((direction == DIR_ANY) & (change_high >= percent))
+                )
+                hit_low = (
+                    ((direction == DIR_DOWN) & (low <= target))
+                    | ((direction == DIR_ANY) & (-change_low >= percent))
+                )
+            hit = (hit_high | hit_low) & self.active[slots] & ~np.isnan(current)
+            trigger_price = np.where(hit_high, high, low)
+            actual_change = np.where(hit_high, change_high, change_low)
+            
+            positions = np.flatnonzero(hit)
+            hit_slots = positions if isinstance(slots, slice) else slots[positions]
+            
+            triggered = []
+            for position, slot in zip(positions.tolist(), hit_slots.tolist()):
+                alert = self._alerts[slot]
+                triggered_alert = alert.to_dict()
+                triggered_alert['current_price'] = float(current[position])
+                triggered_alert['trigger_price'] = float(trigger_price[position])
+                triggered_alert['actual_change'] = float(actual_change[position])
+                triggered.append(triggered_alert)
+                self._remove_locked(alert.id)
+            self._maybe_compact_locked()
+            
+            return triggered